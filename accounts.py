@@ -0,0 +1,147 @@
+"""
+Multi-account sync
+Each account has its own Spotify user, sync folder, optional API credentials and
+rate-limit state. The scheduler syncs all accounts at the same time and they share
+one track store, so a track that is in several people's playlists is downloaded once
+"""
+
+import os
+import threading
+import dataclasses
+from dataclasses import dataclass
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import config
+import get_playlists
+import rate_limit
+from track_store import TrackStore
+
+@dataclass
+class AccountSession:
+    """One Spotify user synced into its own folder"""
+    name: str
+    user: str
+    sync_folder: str
+    client_id: str = ''
+    client_secret: str = ''
+    limiter: Optional[rate_limit.RateLimiter] = None  # Shared by accounts that use the same API credentials
+
+    def settings(self, base):
+        """The app settings with this account's user, folder and credentials"""
+        return dataclasses.replace(base, user=self.user, sync_folder=self.sync_folder,
+                                   client_id=self.client_id or base.client_id,
+                                   client_secret=self.client_secret or base.client_secret)
+
+# Rate-limit state per API client id, kept across sync runs
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def _limiter(client_id, min_wait):
+    with _limiters_lock:
+        if client_id not in _limiters:
+            _limiters[client_id] = rate_limit.RateLimiter(min_wait=min_wait)
+        _limiters[client_id].min_wait = min_wait
+        return _limiters[client_id]
+
+def load_accounts(settings=None):
+    """
+    Build the account sessions from ACCOUNTS in settings.json
+    Without ACCOUNTS, the single USER/SYNC_FOLDER account is returned
+    Raises ValueError if accounts are missing a user or share a name or folder
+    """
+    settings = settings or config.load_settings()
+    entries = settings.accounts or [{'NAME': settings.user, 'USER': settings.user, 'SYNC_FOLDER': settings.sync_folder}]
+
+    sessions = []
+    for entry in entries:
+        user = entry.get('USER', '')
+        if not user:
+            raise ValueError(f"Account {entry.get('NAME', '?')} has no USER")
+        name = entry.get('NAME') or user
+        # By default each account gets a folder inside the main sync folder
+        sync_folder = entry.get('SYNC_FOLDER') or os.path.join(settings.sync_folder, name)
+        client_id = entry.get('CLIENT_ID', '')
+        # Spotify counts requests per API client, so accounts on the same credentials back off together
+        limiter = _limiter(client_id or settings.client_id, settings.rate_limit_wait)
+        sessions.append(AccountSession(name, user, os.path.abspath(sync_folder), client_id,
+                                       entry.get('CLIENT_SECRET', ''), limiter))
+
+    for attribute in ('name', 'sync_folder'):
+        values = [getattr(session, attribute) for session in sessions]
+        duplicates = {value for value in values if values.count(value) > 1}
+        if duplicates:
+            raise ValueError(f"Accounts must not share a {attribute}: {', '.join(sorted(duplicates))}")
+    return sessions
+
+def store_folders(settings):
+    """
+    Every sync folder whose playlists link tracks from the main folder's track store:
+    the main folder and the folder of each account
+    Raises ValueError like load_accounts if ACCOUNTS is invalid
+    """
+    folders = [os.path.abspath(settings.sync_folder)]
+    if settings.accounts:
+        folders += [session.sync_folder for session in load_accounts(settings) if session.sync_folder not in folders]
+    return folders
+
+def sync_accounts(sessions, settings=None, force=False, log=print, control=None):
+    """
+    Sync every account at the same time
+    MAX_PARALLEL_SYNCS is split between the accounts, tracks go into one shared store
+    (in the main sync folder) and the in-process engine, if enabled, is shared too
+    control (a sync_control.SyncControl) pauses or cancels every account at once
+    Returns {account name: number of playlists up to date, or the exception that stopped it}
+    """
+    settings = settings or config.load_settings()
+    if not sessions:
+        return {}
+    workers = max(1, settings.max_parallel_syncs // len(sessions))
+    store = TrackStore(settings.sync_folder) if settings.deduplicate_tracks else None
+    engine = None
+    if settings.sync_engine == 'inprocess':
+        engine = get_playlists._start_engine(settings, log)
+
+    # Limiters can be shared by several accounts, so their messages carry no account name
+    for session in sessions:
+        session.limiter.log = log
+
+    listings = {}
+
+    def run(session):
+        def account_log(message):
+            log(f"[{session.name}] {message}")
+        account_settings = dataclasses.replace(session.settings(settings), max_parallel_syncs=workers)
+        if engine is None:
+            # Don't let every account try (and fail) to start its own engine
+            account_settings.sync_engine = 'subprocess'
+        sp = get_playlists.authenticate(account_settings)
+        playlists = get_playlists.get_playlists(sp, session.user, session.sync_folder, account_log)
+        account_log(f"Found {len(playlists)} playlists for {session.user}")
+        listings[session.name] = playlists
+        return get_playlists.sync_playlists(playlists, force=force, log=account_log, sp=sp,
+                                            settings=account_settings, store=store,
+                                            limiter=session.limiter, engine=engine, control=control)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(sessions), thread_name_prefix="account") as pool:
+        futures = {session.name: pool.submit(run, session) for session in sessions}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                log(f"[{name}] Sync failed: {str(e)}")
+                results[name] = e
+
+    # Cleanup waits for every account, since they share the track store
+    if settings.garbage_collect and not (control and control.cancelled):
+        try:
+            for session in sessions:
+                if isinstance(results[session.name], int):
+                    account_settings = dataclasses.replace(session.settings(settings), deduplicate_tracks=False)
+                    get_playlists.collect_garbage(listings[session.name], account_settings,
+                                                  log=lambda message, name=session.name: log(f"[{name}] {message}"))
+            if store is not None:
+                get_playlists.collect_garbage({}, settings, store, store_folders(settings), log)
+        except (OSError, ValueError) as e:
+            log(f"Cleanup failed: {str(e)}")
+    return results
@@ -0,0 +1,137 @@
+"""
+Adaptive concurrency (AIMD)
+A fixed MAX_PARALLEL_SYNCS is too timid on a fast link and draws 429s on a slow one.
+With ADAPTIVE_CONCURRENCY on, the number of playlists synced at once and spotdl's
+--threads are raised one step at a time while the measured tracks per minute keep
+improving, and halved as soon as a job hits a rate limit or an error
+"""
+
+import time
+import itertools
+import threading
+
+# spotdl's own --threads default
+DEFAULT_SPOTDL_THREADS = 4
+# Throughput is measured over windows of at least this many seconds and downloaded tracks
+WINDOW_SECONDS = 15.0
+WINDOW_TRACKS = 10
+# A step up must raise tracks per minute by this much to count as an improvement
+MIN_GAIN = 0.05
+# After a back-off, further errors in this many seconds are part of the same incident
+BACKOFF_HOLD = 10.0
+# Windows spent holding at the best setting before probing upwards again
+PROBE_AFTER = 10
+
+JOBS = 'jobs'
+THREADS = 'threads'
+
+class AdaptiveConcurrency:
+    """
+    Limits how many playlist jobs run at once and how many threads each spotdl gets
+    Jobs call acquire()/release() around their work and pass threads to spotdl;
+    track_done() feeds the throughput measurement and back_off() the error signals
+    """
+
+    def __init__(self, jobs, max_jobs, threads=DEFAULT_SPOTDL_THREADS, max_threads=16, log=print):
+        self.max_jobs = max(1, int(max_jobs))
+        self.max_threads = max(1, int(max_threads))
+        self.jobs = min(max(1, int(jobs)), self.max_jobs)
+        self.threads = min(max(1, int(threads)), self.max_threads)
+        self.log = log
+        self.active = 0
+        self._cond = threading.Condition()
+        # Slots are handed out first come first served, so jobs still start in the sync order
+        self._tickets = itertools.count()
+        self._serving = 0
+        self._window_start = time.monotonic()
+        self._window_tracks = 0
+        self._last_rate = None     # Tracks per minute of the last window
+        self._step = None          # Dimension raised at the end of the last window, if any
+        self._saturated = set()    # Dimensions where a step up did not help
+        self._next = JOBS          # Dimension to try next
+        self._holding = 0
+        self._hold_until = 0.0
+
+    def acquire(self, should_stop=None):
+        """Wait for a job slot; returns False if should_stop() became true first"""
+        with self._cond:
+            ticket = next(self._tickets)
+            while ticket != self._serving or self.active >= self.jobs:
+                if should_stop and should_stop():
+                    return False
+                self._cond.wait(1.0)
+            self._serving += 1
+            self.active += 1
+            self._cond.notify_all()
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def track_done(self):
+        """A track was downloaded"""
+        with self._cond:
+            self._window_tracks += 1
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed >= WINDOW_SECONDS and self._window_tracks >= WINDOW_TRACKS:
+                self._adjust(self._window_tracks * 60 / elapsed)
+                self._window_start = now
+                self._window_tracks = 0
+
+    def back_off(self, reason):
+        """A job hit a rate limit or an error: halve jobs and threads"""
+        with self._cond:
+            now = time.monotonic()
+            if now < self._hold_until:
+                return
+            self._hold_until = now + BACKOFF_HOLD
+            jobs, threads = self.jobs, self.threads
+            self.jobs = max(1, self.jobs // 2)
+            self.threads = max(1, self.threads // 2)
+            # Start measuring again at the new setting and probe every dimension anew
+            self._window_start = now
+            self._window_tracks = 0
+            self._last_rate = None
+            self._step = None
+            self._saturated.clear()
+            self._holding = 0
+            self._cond.notify_all()
+        self.log(f"  ⚙ {reason}: backing off from {jobs} to {self.jobs} parallel sync(s), "
+                 f"{threads} to {self.threads} spotdl thread(s)")
+
+    def _adjust(self, rate):
+        """End of a measuring window; the caller holds the lock"""
+        last, step = self._last_rate, self._step
+        self._step = None
+        if step and last is not None and rate < last * (1 + MIN_GAIN):
+            # The last step up did not pay off: take it back and stop raising that dimension
+            setattr(self, step, getattr(self, step) - 1)
+            self._saturated.add(step)
+            self._log_change(f"{rate:.0f} tracks/min is no better than {last:.0f}, back to")
+            # Measured at the setting that was just abandoned, so the next window starts fresh
+            self._last_rate = None
+            return
+        self._last_rate = rate
+        candidates = [dim for dim in (self._next, JOBS if self._next == THREADS else THREADS)
+                      if dim not in self._saturated and getattr(self, dim) < getattr(self, f"max_{dim}")]
+        if not candidates:
+            self._holding += 1
+            if self._holding >= PROBE_AFTER:
+                # Conditions change (other downloads, time of day): try going up again
+                self._holding = 0
+                self._saturated.clear()
+            return
+        self._step = candidates[0]
+        self._next = THREADS if self._step == JOBS else JOBS
+        setattr(self, self._step, getattr(self, self._step) + 1)
+        self._cond.notify_all()
+        self._log_change(f"{rate:.0f} tracks/min, trying")
+
+    def _log_change(self, message):
+        self.log(f"  ⚙ {message} {self.jobs} parallel sync(s) with {self.threads} spotdl thread(s)")
+
+    def summary(self):
+        return f"Adaptive concurrency ended at {self.jobs} parallel sync(s) with {self.threads} spotdl thread(s)"
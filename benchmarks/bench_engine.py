@@ -0,0 +1,93 @@
+"""
+Benchmark: per-playlist overhead of the subprocess path vs the in-process spotdl engine
+
+Without arguments only the fixed startup cost is measured:
+  - subprocess: spawning `spotdl --version` (interpreter start + spotdl import), paid once per playlist
+  - in-process: building the engine once, then the per-playlist setup of the shared downloader
+
+With --url (and CLIENT_ID/CLIENT_SECRET in settings.json) the same playlist is also synced
+through both paths into temporary folders, so network work is included.
+
+Usage: python benchmarks/bench_engine.py [--runs 5] [--url PLAYLIST_URL]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def time_subprocess_startup(runs):
+    """Wall time of starting spotdl in a fresh process"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(["spotdl", "--version"], capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def time_engine(runs, client_id, client_secret):
+    """Wall time of building the engine once and of reusing it for each playlist"""
+    import spotdl_engine
+    start = time.perf_counter()
+    engine = spotdl_engine.get_engine(client_id, client_secret)
+    init = time.perf_counter() - start
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        # Everything a playlist pays for before spotdl starts fetching metadata
+        engine = spotdl_engine.get_engine(client_id, client_secret)
+        with tempfile.TemporaryDirectory() as folder:
+            engine._spotdl.downloader.settings['output'] = os.path.join(folder, spotdl_engine.OUTPUT_TEMPLATE)
+        samples.append(time.perf_counter() - start)
+    return init, samples
+
+def time_full_sync(url, runs, client_id, client_secret):
+    """Sync one playlist repeatedly through both paths"""
+    import get_playlists
+    import spotdl_engine
+    results = {}
+    for label in ("subprocess", "inprocess"):
+        samples = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as folder:
+                engine = spotdl_engine.get_engine(client_id, client_secret) if label == "inprocess" else None
+                start = time.perf_counter()
+                get_playlists.sync_single_playlist(url, "bench", cwd=folder, engine=engine)
+                samples.append(time.perf_counter() - start)
+        results[label] = samples
+    return results
+
+def report(label, samples):
+    print(f"  {label:<28} median {statistics.median(samples) * 1000:8.1f} ms"
+          f"   min {min(samples) * 1000:8.1f} ms   runs {len(samples)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", help="playlist to sync through both paths")
+    args = parser.parse_args()
+
+    import config
+    settings = config.load_settings()
+    client_id = settings.client_id or 'benchmark'
+    client_secret = settings.client_secret or 'benchmark'
+
+    print("Per-playlist fixed overhead")
+    report("subprocess startup", time_subprocess_startup(args.runs))
+    init, samples = time_engine(args.runs, client_id, client_secret)
+    print(f"  {'in-process engine init':<28} once     {init * 1000:8.1f} ms")
+    report("in-process per playlist", samples)
+
+    if args.url:
+        print("Full sync of one playlist")
+        for label, samples in time_full_sync(args.url, args.runs, client_id, client_secret).items():
+            report(label, samples)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: listing a large account against the local fake Spotify API
+
+Starts benchmarks/fake_spotify.py in-process and points SPOTIFY_API_BASE at it, so no
+network access or Spotify credentials are needed. Runs get_playlists for N playlists
+(5000 by default) and get_playlist_tracks for the first few, three times:
+  - cold:     empty HTTP cache, every page is downloaded
+  - warm:     same data again, pages are revalidated with ETags (304s)
+  - no cache: HTTP_CACHE_MB = 0
+For each it reports wall time, API requests, 304s and 429s. --rate-limit makes the server
+answer that share of requests with 429 and Retry-After, to see what backing off costs.
+
+Usage: python benchmarks/bench_listing.py [--playlists 5000] [--tracks 50] [--track-lists 100]
+           [--latency 0.02] [--rate-limit 0] [--retry-after 1]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import config
+import get_playlists
+import fake_spotify
+
+def run(settings, api, track_lists):
+    """One listing pass; returns (seconds, playlists found, counter deltas)"""
+    before = dict(api.counters)
+    start = time.perf_counter()
+    sp = get_playlists.authenticate(settings)
+    playlists = get_playlists.get_playlists(sp, settings.user, settings.sync_folder, log=lambda message: None)
+    for info in list(playlists.values())[:track_lists]:
+        get_playlists.get_playlist_tracks(sp, info['id'])
+    elapsed = time.perf_counter() - start
+    return elapsed, len(playlists), {name: api.counters[name] - before[name] for name in api.counters}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playlists", type=int, default=5000)
+    parser.add_argument("--tracks", type=int, default=50, help="mean tracks per playlist")
+    parser.add_argument("--track-lists", type=int, default=100, help="playlists whose tracks are listed too")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per API request")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    api = fake_spotify.FakeSpotify("benchuser", args.playlists, args.tracks, args.latency,
+                                   args.rate_limit, args.retry_after)
+    server, base = fake_spotify.serve(api)
+    print(f"{args.playlists} playlists, tracks of {args.track_lists}, {args.latency * 1000:.0f} ms per request, "
+          f"{args.rate_limit:.0%} answered with 429")
+    print(f"{'pass':<10}{'seconds':>9}{'playlists':>11}{'requests':>10}{'304s':>7}{'429s':>7}")
+    with tempfile.TemporaryDirectory() as folder:
+        # The token and HTTP cache files are created in the working directory
+        os.chdir(folder)
+        settings = config.Settings(client_id="bench", client_secret="bench", user="benchuser",
+                                   sync_folder=os.path.join(folder, "music"), spotify_api_base=base)
+        # The shared session keeps its cache once created, so the uncached pass comes last
+        for label, cache_mb in (("cold", 200), ("warm", 200), ("no cache", 0)):
+            settings.http_cache_mb = cache_mb
+            elapsed, found, counts = run(settings, api, args.track_lists)
+            print(f"{label:<10}{elapsed:>9.2f}{found:>11}{counts['requests']:>10}"
+                  f"{counts['not_modified']:>7}{counts['rate_limited']:>7}")
+        os.chdir(ROOT)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: GUI log under a flood of sync output
+
+A background thread writes N log lines (100k by default) as fast as it can while the
+Qt event loop runs on the offscreen platform. For each pipeline it reports:
+  - time until every line has reached the view
+  - the longest event-loop stall (gap between 10 ms heartbeat ticks)
+  - lines held by the view at the end and peak RSS
+Pipelines:
+  - sink:   LogSink + timer flush into a capped QPlainTextEdit (what the GUI uses)
+  - legacy: one queued signal per line into QTextEdit.append (--legacy; slow)
+
+Usage: python benchmarks/bench_log_sink.py [--lines 100000] [--legacy]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+try:
+    import resource  # Unix only, used for peak RSS
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QApplication, QPlainTextEdit, QTextEdit
+import log_sink
+
+class Heartbeat:
+    """Measures the longest gap between ticks of a 10 ms timer"""
+
+    def __init__(self):
+        self.longest = 0.0
+        self._last = time.perf_counter()
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._tick)
+        self.timer.start(10)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.longest = max(self.longest, now - self._last)
+        self._last = now
+
+class Emitter(QObject):
+    line = Signal(str)
+
+def run_sink(app, lines, workdir):
+    view = QPlainTextEdit()
+    view.setMaximumBlockCount(log_sink.MAX_VIEW_LINES)
+    view.show()
+    sink = log_sink.LogSink(os.path.join(workdir, "sink.log"))
+    received = [0]
+
+    def flush():
+        batch, dropped = sink.drain()
+        received[0] += len(batch) + dropped
+        if batch:
+            view.appendPlainText("\n".join(batch))
+
+    timer = QTimer()
+    timer.timeout.connect(flush)
+    timer.start(log_sink.FLUSH_INTERVAL_MS)
+    result = _drive(app, lines, sink.write, received)
+    sink.close()
+    return result + (view.blockCount(),)
+
+def run_legacy(app, lines, workdir):
+    view = QTextEdit()
+    view.show()
+    emitter = Emitter()
+    received = [0]
+
+    def append(text):
+        received[0] += 1
+        view.append(text)
+
+    emitter.line.connect(append)
+    result = _drive(app, lines, emitter.line.emit, received)
+    return result + (view.document().blockCount(),)
+
+def _drive(app, lines, write, received):
+    """Write lines from a thread and spin the event loop until all of them arrived"""
+    heartbeat = Heartbeat()
+    start = time.perf_counter()
+    writer = threading.Thread(target=lambda: [write(f"  ✓ Playlist{i % 50}: Track {i}") for i in range(lines)])
+    writer.start()
+    while received[0] < lines:
+        app.processEvents()
+    writer.join()
+    elapsed = time.perf_counter() - start
+    heartbeat.timer.stop()
+    return elapsed, heartbeat.longest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--legacy", action="store_true", help="also time one signal + QTextEdit.append per line")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    pipelines = [("sink", run_sink)] + ([("legacy", run_legacy)] if args.legacy else [])
+    print(f"Log flood of {args.lines} lines")
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, run in pipelines:
+            elapsed, stall, kept = run(app, args.lines, workdir)
+            rss = f"   peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:6.0f} MB" if resource else ""
+            print(f"  {label:<8} total {elapsed * 1000:9.1f} ms   longest stall {stall * 1000:7.1f} ms"
+                  f"   lines in view {kept:7d}{rss}")
+
+if __name__ == "__main__":
+    main()
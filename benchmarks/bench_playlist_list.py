@@ -0,0 +1,118 @@
+"""
+Benchmark: refreshing the playlist list with a very large account
+
+Runs headless on Qt's offscreen platform. For N playlists (10k by default) it measures,
+including the layout and paint that follow:
+  - first fill of the list
+  - a refresh where nothing changed
+  - a refresh where 1% of the playlists were removed and 1% added
+  - select all / deselect all
+--legacy also times the old layout (one styled QCheckBox per playlist in a scroll area).
+
+Usage: python benchmarks/bench_playlist_list.py [--playlists 10000] [--runs 5] [--legacy]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QListView, QScrollArea, QWidget, QVBoxLayout, QCheckBox
+from playlist_model import PlaylistModel
+
+CHECKBOX_STYLE = """
+    QCheckBox { padding: 8px; font-size: 14px; border-bottom: 1px solid #eee; }
+    QCheckBox::indicator { width: 18px; height: 18px; }
+"""
+
+def timed(app, action):
+    """Run action and wait until Qt has laid out and painted the result"""
+    start = time.perf_counter()
+    action()
+    app.processEvents()
+    return time.perf_counter() - start
+
+def changed_names(names, fraction=0.01):
+    """Drop every n-th playlist and add the same number of new ones"""
+    step = max(1, int(1 / fraction))
+    kept = [name for i, name in enumerate(names) if i % step]
+    return kept + [f"NewPlaylist{i}" for i in range(len(names) - len(kept))]
+
+def bench_model(app, names, runs):
+    results = {}
+    for label in ("first fill", "refresh, no change", "refresh, 1% changed", "select/deselect all"):
+        results[label] = []
+    for _ in range(runs):
+        model = PlaylistModel()
+        view = QListView()
+        view.setModel(model)
+        view.setUniformItemSizes(True)
+        view.resize(800, 400)
+        view.show()
+        app.processEvents()
+        results["first fill"].append(timed(app, lambda: model.set_playlists(names)))
+        results["refresh, no change"].append(timed(app, lambda: model.set_playlists(names)))
+        # Keep a user choice across the refresh
+        model.setData(model.index(1), Qt.Unchecked, Qt.CheckStateRole)
+        updated = changed_names(names)
+        results["refresh, 1% changed"].append(timed(app, lambda: model.set_playlists(updated)))
+        assert names[1] not in model.checked_names(), "checked state was lost"
+        results["select/deselect all"].append(
+            timed(app, lambda: (model.set_all_checked(True), model.set_all_checked(False))))
+        view.close()
+        view.deleteLater()
+        app.processEvents()
+    return results
+
+def bench_legacy(app, names):
+    """One refresh of the old checkbox list"""
+    scroll = QScrollArea()
+    scroll.setWidgetResizable(True)
+    container = QWidget()
+    layout = QVBoxLayout(container)
+    layout.setAlignment(Qt.AlignTop)
+    scroll.setWidget(container)
+    scroll.resize(800, 400)
+    scroll.show()
+    app.processEvents()
+
+    def fill():
+        for name in names:
+            checkbox = QCheckBox(name)
+            checkbox.setChecked(True)
+            checkbox.setStyleSheet(CHECKBOX_STYLE)
+            layout.addWidget(checkbox)
+
+    elapsed = timed(app, fill)
+    scroll.close()
+    scroll.deleteLater()
+    app.processEvents()
+    return elapsed
+
+def report(label, samples):
+    print(f"  {label:<28} median {statistics.median(samples) * 1000:8.1f} ms"
+          f"   min {min(samples) * 1000:8.1f} ms   runs {len(samples)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playlists", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--legacy", action="store_true", help="also time the old QCheckBox list (slow)")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    names = [f"Playlist{i}" for i in range(args.playlists)]
+
+    print(f"Playlist list with {args.playlists} playlists")
+    for label, samples in bench_model(app, names, args.runs).items():
+        report(label, samples)
+    if args.legacy:
+        report("legacy checkbox fill", [bench_legacy(app, names)])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: cold start of the GUI and of headless mode
+
+Each measurement runs in a fresh interpreter, so nothing is cached between runs:
+  - import time of gui and initialization, from `python -X importtime`,
+    with the slowest modules on that path
+  - wall-clock time from process start to the first paint of the main window
+    (Qt's offscreen platform is used, so no display is needed)
+
+--max-paint-ms / --max-import-ms make the run fail when startup gets slower,
+so the benchmark can guard against regressions.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 10] [--max-paint-ms N] [--max-import-ms N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child: show the window and report once it has painted
+FIRST_PAINT = """
+import sys
+from PySide6.QtCore import QObject, QEvent
+from PySide6.QtWidgets import QApplication
+import gui
+
+class PaintWatcher(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print("painted", flush=True)
+            QApplication.instance().exit(0)
+        return False
+
+app = QApplication(sys.argv)
+window = gui.SpotiSyncGUI()
+watcher = PaintWatcher()
+window.installEventFilter(watcher)
+window.show()
+sys.exit(app.exec())
+"""
+
+def _env(workdir):
+    """Environment of the child: offscreen Qt and a settings.json-free working folder"""
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    # Keep the sync folder of the benchmark away from the real one
+    env["HOME"] = workdir
+    return env
+
+def import_times(module, workdir):
+    """Return (total import time in seconds, {module: cumulative seconds}) for importing module"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=workdir, env=_env(workdir), capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative) / 1e6
+    return modules.get(module, 0.0), modules
+
+def time_to_first_paint(workdir):
+    """Wall time from spawning the interpreter until the main window has painted"""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", FIRST_PAINT], cwd=workdir, env=_env(workdir),
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:
+        if line.strip() == "painted":
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        elapsed = None
+    proc.wait(timeout=30)
+    return elapsed
+
+def report(label, samples):
+    print(f"  {label:<28} median {statistics.median(samples) * 1000:8.1f} ms"
+          f"   min {min(samples) * 1000:8.1f} ms   runs {len(samples)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--max-paint-ms", type=float, help="fail if the median time to first paint is higher")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import time of gui is higher")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        print("Import time")
+        for module in ("initialization", "gui"):
+            samples = []
+            slowest = {}
+            for _ in range(args.runs):
+                total, modules = import_times(module, workdir)
+                samples.append(total)
+                slowest = modules
+            report(f"import {module}", samples)
+            for name, seconds in sorted(slowest.items(), key=lambda item: -item[1])[1:args.top + 1]:
+                print(f"      {seconds * 1000:8.1f} ms  {name}")
+            if module == "gui" and args.max_import_ms and statistics.median(samples) * 1000 > args.max_import_ms:
+                print(f"  ❌ gui import is slower than {args.max_import_ms} ms")
+                failed = True
+
+        print("Time to first paint")
+        samples = [time_to_first_paint(workdir) for _ in range(args.runs)]
+        if None in samples:
+            print("  ❌ the window never painted")
+            failed = True
+        else:
+            report("main window", samples)
+            if args.max_paint_ms and statistics.median(samples) * 1000 > args.max_paint_ms:
+                print(f"  ❌ first paint is slower than {args.max_paint_ms} ms")
+                failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Benchmark: end-to-end sync throughput over synthetic libraries
+
+Every playlist is synced for real by sync_playlists (or the GUI's SyncWorker), except that
+SPOTDL_BIN points at benchmarks/fake_spotdl.py, so no network or spotdl install is needed.
+For each library size (10 to 5000 playlists) and driver it reports:
+  - playlists per minute and tracks per minute
+  - peak RSS of the app process and of the largest child process (on Linux a child's
+    figure includes the app's memory at fork time when spotdl is started by fork)
+  - scheduler overhead: wall time beyond what the spotdl processes needed,
+    i.e. wall - (sum of spotdl run times / parallel jobs)
+  - mean time until a playlist is up to date, which --order (SYNC_ORDER_POLICY) changes
+--adaptive turns on ADAPTIVE_CONCURRENCY (starting at --workers) and prints the controller's
+decisions; with --max-threads the fake spotdl rate limits runs with more threads than that.
+Each case runs in a fresh process, so peak RSS is per case.
+
+Drivers:
+  - sync_playlists: what headless mode runs
+  - worker:         SyncWorker on a QThread, like the GUI (needs PySide6; skipped without it)
+
+Usage: python benchmarks/bench_sync.py [--playlists 10,100,1000] [--tracks 20] [--workers 4]
+           [--latency 0.01] [--lines 2] [--fail-rate 0] [--error-rate 0] [--driver both]
+           [--order shortest] [--adaptive] [--max-threads 0]
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import contextlib
+import importlib.util
+try:
+    import resource  # Unix only, used for peak RSS
+except ImportError:
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SPOTDL = os.path.join(ROOT, "benchmarks", "fake_spotdl.py")
+sys.path.insert(0, ROOT)
+
+def library(playlists, tracks, seed=1):
+    """Synthetic get_playlists() result; track counts vary between 1 and twice the mean"""
+    rng = random.Random(seed)
+    result = {}
+    for i in range(playlists):
+        count = rng.randint(1, 2 * tracks - 1)
+        playlist_id = f"pl{i:05d}"
+        result[f"Playlist{i:05d}"] = {
+            'name': f"Playlist {i}",
+            'url': f"https://open.spotify.com/playlist/{playlist_id}?tracks={count}",
+            'id': playlist_id,
+            'snapshot_id': 'snapshot1',
+            'tracks': count
+        }
+    return result
+
+def run_case(args):
+    """One library size with one driver, in this process; prints the result as JSON"""
+    import config
+    import get_playlists
+    from sync_state import SyncState
+
+    playlists = library(args.run_case, args.tracks)
+    with tempfile.TemporaryDirectory() as folder:
+        config.SETTINGS_PATH = os.path.join(folder, "settings.json")
+        settings = config.Settings(
+            sync_folder=os.path.join(folder, "music"),
+            spotdl_bin=shlex.join([sys.executable, FAKE_SPOTDL]),
+            max_parallel_syncs=args.workers,
+            max_retries=0,
+            deduplicate_tracks=False,
+            garbage_collect=False,
+            sync_order_policy=args.order,
+            adaptive_concurrency=args.adaptive
+        )
+        config.save_settings(settings)
+
+        # Time every spotdl run, to tell the scheduler's own cost apart from spotdl's
+        spotdl_time = [0.0]
+        lock = threading.Lock()
+        run_spotdl = get_playlists.sync_single_playlist
+        def timed_spotdl(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return run_spotdl(*a, **kw)
+            finally:
+                with lock:
+                    spotdl_time[0] += time.perf_counter() - start
+        get_playlists.sync_single_playlist = timed_spotdl
+
+        # Seconds from the start until each playlist was done
+        done_at = []
+        run_job = get_playlists.sync_playlist_job
+        def timed_job(*a, **kw):
+            result = run_job(*a, **kw)
+            with lock:
+                done_at.append(time.perf_counter() - start)
+            return result
+        get_playlists.sync_playlist_job = timed_job
+
+        decisions = []
+        def log(message):
+            if "⚙" in message:
+                decisions.append(f"{time.perf_counter() - start:7.1f}s {message.strip()}")
+
+        # sync_single_playlist prints every command it runs
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            if args.driver == "worker":
+                from PySide6.QtCore import QCoreApplication
+                import gui
+                app = QCoreApplication.instance() or QCoreApplication([])
+                worker = gui.SyncWorker(playlists, None, log)
+                worker.start()
+                while not worker.wait(10):
+                    app.processEvents()
+            else:
+                get_playlists.sync_playlists(playlists, settings=settings, log=log)
+            wall = time.perf_counter() - start
+
+        synced = len(SyncState(settings.sync_folder).records())
+
+    jobs = min(args.workers, len(playlists))
+    print(json.dumps({
+        'playlists': len(playlists),
+        'synced': synced,
+        'tracks': sum(info['tracks'] for info in playlists.values()),
+        'wall': wall,
+        'spotdl': spotdl_time[0],
+        'overhead': max(0.0, wall - spotdl_time[0] / jobs),
+        'mean_done': sum(done_at) / len(done_at) if done_at else 0,
+        # ru_maxrss is in KB on Linux
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None,
+        'child_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024 if resource else None,
+        'decisions': decisions,
+    }))
+
+def has_pyside():
+    try:
+        return importlib.util.find_spec("PySide6.QtCore") is not None
+    except ImportError:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playlists", default="10,100,1000", help="comma-separated library sizes")
+    parser.add_argument("--tracks", type=int, default=20, help="mean tracks per playlist")
+    parser.add_argument("--workers", type=int, default=4, help="MAX_PARALLEL_SYNCS")
+    parser.add_argument("--latency", type=float, default=0.01, help="fake spotdl seconds per track")
+    parser.add_argument("--lines", type=int, default=2, help="extra output lines per track")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of tracks that fail")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of spotdl runs that fail")
+    parser.add_argument("--driver", choices=("sync_playlists", "worker", "both"), default="both")
+    parser.add_argument("--order", default="shortest", help="SYNC_ORDER_POLICY: shortest, stale or listing")
+    parser.add_argument("--adaptive", action="store_true", help="ADAPTIVE_CONCURRENCY")
+    parser.add_argument("--max-threads", type=int, default=0, help="fake spotdl rate limits more --threads than this")
+    parser.add_argument("--run-case", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case is not None:
+        run_case(args)
+        return
+
+    drivers = ["sync_playlists", "worker"] if args.driver == "both" else [args.driver]
+    if "worker" in drivers and not has_pyside():
+        print("PySide6 not installed, skipping the worker driver")
+        drivers.remove("worker")
+    env = {**os.environ,
+           "FAKE_SPOTDL_LATENCY": str(args.latency),
+           "FAKE_SPOTDL_LINES": str(args.lines),
+           "FAKE_SPOTDL_FAIL_RATE": str(args.fail_rate),
+           "FAKE_SPOTDL_ERROR_RATE": str(args.error_rate),
+           "FAKE_SPOTDL_MAX_THREADS": str(args.max_threads),
+           "QT_QPA_PLATFORM": "offscreen"}
+
+    print(f"{args.tracks} tracks per playlist on average, {args.workers} parallel jobs, "
+          f"{args.latency * 1000:.0f} ms per track, {args.order} order{', adaptive' if args.adaptive else ''}")
+    print(f"{'driver':<15}{'playlists':>10}{'synced':>8}{'wall s':>9}{'pl/min':>9}{'tracks/min':>12}"
+          f"{'overhead':>10}{'per pl ms':>11}{'mean done s':>13}{'RSS MB':>8}{'child MB':>11}")
+    for size in (int(size) for size in args.playlists.split(",")):
+        for driver in drivers:
+            command = [sys.executable, os.path.abspath(__file__), "--run-case", str(size),
+                       "--driver", driver, "--tracks", str(args.tracks), "--workers", str(args.workers),
+                       "--order", args.order] + (["--adaptive"] if args.adaptive else [])
+            output = subprocess.run(command, env=env, capture_output=True, text=True)
+            if output.returncode != 0:
+                print(f"{driver:<15}{size:>10}  failed:\n{output.stderr}")
+                continue
+            r = json.loads(output.stdout.strip().splitlines()[-1])
+            rss = f"{r['rss_mb']:.0f}" if r['rss_mb'] is not None else "-"
+            child_rss = f"{r['child_rss_mb']:.0f}" if r['child_rss_mb'] is not None else "-"
+            print(f"{driver:<15}{r['playlists']:>10}{r['synced']:>8}{r['wall']:>9.2f}"
+                  f"{r['playlists'] / r['wall'] * 60:>9.0f}{r['tracks'] / r['wall'] * 60:>12.0f}"
+                  f"{r['overhead'] / r['wall'] * 100:>9.1f}%{r['overhead'] / r['playlists'] * 1000:>11.1f}"
+                  f"{r['mean_done']:>13.2f}"
+                  f"{rss:>8}{child_rss:>11}")
+            for decision in r['decisions']:
+                print(f"    {decision}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Stand-in for the spotdl command line, for benchmarks that must run offline
+
+Understands `sync URL --save-file FILE [--threads N]` (other options are accepted and ignored) and
+behaves like a spotdl sync of a playlist: it prints the lines spotdl_output parses,
+writes one small audio file per track and the save file into the working directory.
+Point SPOTDL_BIN at it: "python benchmarks/fake_spotdl.py"
+
+The playlist size comes from the URL (`...?tracks=N`, default 20). The rest is set
+through environment variables:
+  FAKE_SPOTDL_LATENCY      seconds per track (default 0.01)
+  FAKE_SPOTDL_LINES        extra output lines per track (default 2)
+  FAKE_SPOTDL_TRACK_BYTES  size of each audio file (default 4096)
+  FAKE_SPOTDL_FAIL_RATE    share of tracks that fail (default 0)
+  FAKE_SPOTDL_ERROR_RATE   share of runs that exit with an error (default 0)
+  FAKE_SPOTDL_MAX_THREADS  runs with more --threads than this are rate limited (default 0 = no limit)
+FAKE_SPOTDL_LATENCY is the time per track at spotdl's default of 4 threads; --threads N scales it by 4 / N
+Results are random but repeatable: the URL seeds the random generator
+"""
+
+import os
+import sys
+import json
+import time
+import random
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_THREADS = 4
+
+def _env(name, default):
+    return type(default)(os.environ.get(name, default))
+
+def main(argv):
+    if len(argv) < 2 or argv[0] != "sync":
+        print("usage: fake_spotdl.py sync URL --save-file FILE", file=sys.stderr)
+        return 2
+    url = argv[1]
+    save_file = argv[argv.index("--save-file") + 1] if "--save-file" in argv else "playlist.sync.spotdl"
+    threads = int(argv[argv.index("--threads") + 1]) if "--threads" in argv else DEFAULT_THREADS
+    query = parse_qs(urlparse(url).query)
+    tracks = int(query.get("tracks", ["20"])[0])
+    latency = _env("FAKE_SPOTDL_LATENCY", 0.01)
+    extra_lines = _env("FAKE_SPOTDL_LINES", 2)
+    track_bytes = _env("FAKE_SPOTDL_TRACK_BYTES", 4096)
+    fail_rate = _env("FAKE_SPOTDL_FAIL_RATE", 0.0)
+    error_rate = _env("FAKE_SPOTDL_ERROR_RATE", 0.0)
+    max_threads = _env("FAKE_SPOTDL_MAX_THREADS", 0)
+    rng = random.Random(url)
+    playlist_id = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+    print(f"Found {tracks} songs in {playlist_id} (Playlist)", flush=True)
+    if rng.random() < error_rate:
+        print("Exception: fake spotdl failure", flush=True)
+        return 1
+    if max_threads and threads > max_threads:
+        print("HTTP Error 429: Too Many Requests (youtube)", flush=True)
+        return 1
+
+    songs = []
+    payload = b"\0" * track_bytes
+    for i in range(tracks):
+        artist, title = f"Artist {i % 97}", f"Song {playlist_id} {i}"
+        song_id = f"{playlist_id}{i:05d}"
+        for line in range(extra_lines):
+            print(f"[DEBUG] {artist} - {title}: step {line}", flush=True)
+        time.sleep(latency * DEFAULT_THREADS / max(1, threads))
+        if rng.random() < fail_rate:
+            print(f"LookupError: No results found for song: {artist} - {title}", flush=True)
+            continue
+        with open(f"{artist} - {title}.mp3", "wb") as f:
+            f.write(payload)
+        print(f'Downloaded "{artist} - {title}": https://music.youtube.com/watch?v={song_id}', flush=True)
+        songs.append({"name": title, "artists": [artist], "song_id": song_id,
+                      "url": f"https://open.spotify.com/track/{song_id}"})
+
+    with open(save_file, "w", encoding="utf-8") as f:
+        json.dump({"type": "sync", "query": [url], "songs": songs}, f)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,186 @@
+"""
+Local stand-in for the Spotify Web API endpoints the app uses, for offline tests and benchmarks
+
+Serves, for one synthetic user:
+  POST /api/token                                  client credentials token
+  GET  /v1/users/<user>/playlists?limit&offset     the user's playlists, paginated
+  GET  /v1/playlists/<id>/items (or /tracks)       track ids of a playlist, paginated
+  GET  /stats                                      request counters as JSON
+Responses carry an ETag and `Cache-Control: private, max-age=0` like Spotify's, and
+If-None-Match is answered with 304. A share of API requests can be answered with
+429 and a Retry-After header.
+
+Run it and point the app at it with `"SPOTIFY_API_BASE": "http://127.0.0.1:8765"`:
+  python benchmarks/fake_spotify.py [--playlists 5000] [--tracks 50] [--latency 0.02]
+                                    [--rate-limit 0.05] [--retry-after 1] [--port 8765]
+Any client id and secret are accepted. Benchmarks can also start it in-process with serve()
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+PLAYLISTS_MAX_LIMIT = 50
+TRACKS_MAX_LIMIT = 100
+
+class FakeSpotify:
+    """The synthetic dataset and server behaviour, shared by all request threads"""
+
+    def __init__(self, user="fakeuser", playlists=1000, tracks=50, latency=0.0,
+                 rate_limit=0.0, retry_after=1, seed=1):
+        self.user = user
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'tokens': 0, 'not_modified': 0, 'rate_limited': 0}
+        self.playlists = []
+        for i in range(playlists):
+            # Track counts vary between 1 and twice the mean
+            count = self._random.randint(1, max(1, 2 * tracks - 1))
+            playlist_id = f"fake{i:018d}"
+            self.playlists.append({
+                'id': playlist_id,
+                'name': f"Playlist {i}",
+                'snapshot_id': f"snap{i}",
+                'external_urls': {'spotify': f"https://open.spotify.com/playlist/{playlist_id}"},
+                'tracks': {'total': count},
+            })
+        self._by_id = {playlist['id']: playlist for playlist in self.playlists}
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def should_rate_limit(self):
+        with self._lock:
+            return self.rate_limit > 0 and self._random.random() < self.rate_limit
+
+    def playlists_page(self, user, offset, limit, base):
+        if user != self.user:
+            return None
+        items = self.playlists[offset:offset + limit]
+        return self._page(items, offset, limit, len(self.playlists), f"{base}/v1/users/{user}/playlists")
+
+    def tracks_page(self, playlist_id, offset, limit, url):
+        playlist = self._by_id.get(playlist_id)
+        if playlist is None:
+            return None
+        total = playlist['tracks']['total']
+        items = [{'track': {'id': f"{playlist_id[-8:]}{i:014d}"}}
+                 for i in range(offset, min(offset + limit, total))]
+        return self._page(items, offset, limit, total, url)
+
+    def _page(self, items, offset, limit, total, url):
+        following = offset + limit
+        return {
+            'href': f"{url}?{urlencode({'offset': offset, 'limit': limit})}",
+            'items': items,
+            'limit': limit,
+            'offset': offset,
+            'total': total,
+            'next': f"{url}?{urlencode({'offset': following, 'limit': limit})}" if following < total else None,
+            'previous': None,
+        }
+
+_PLAYLISTS = re.compile(r'^/v1/users/([^/]+)/playlists$')
+_TRACKS = re.compile(r'^/v1/playlists/([^/]+)/(?:items|tracks)$')
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    api = None  # FakeSpotify, set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if urlparse(self.path).path != "/api/token":
+            return self._send(404, {'error': 'not found'})
+        self.api.count('tokens')
+        self._send(200, {'access_token': 'fake-token', 'token_type': 'Bearer', 'expires_in': 3600})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            return self._send(200, self.api.counters)
+        self.api.count('requests')
+        if self.api.latency:
+            time.sleep(self.api.latency)
+        if self.api.should_rate_limit():
+            self.api.count('rate_limited')
+            return self._send(429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                              {'Retry-After': str(self.api.retry_after)})
+
+        query = parse_qs(url.query)
+        offset = int(query.get('offset', ['0'])[0])
+        base = f"http://{self.headers.get('Host')}"
+        match = _PLAYLISTS.match(url.path)
+        if match:
+            limit = min(int(query.get('limit', ['20'])[0]), PLAYLISTS_MAX_LIMIT)
+            body = self.api.playlists_page(match.group(1), offset, limit, base)
+        else:
+            match = _TRACKS.match(url.path)
+            limit = min(int(query.get('limit', ['100'])[0]), TRACKS_MAX_LIMIT)
+            body = self.api.tracks_page(match.group(1), offset, limit, base + url.path) if match else None
+        if body is None:
+            return self._send(404, {'error': {'status': 404, 'message': 'Not found'}})
+
+        etag = '"' + hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, max-age=0'}
+        if self.headers.get('If-None-Match') == etag:
+            self.api.count('not_modified')
+            return self._send(304, None, headers)
+        self._send(200, body, headers)
+
+def serve(api, host="127.0.0.1", port=0):
+    """Start the server in a background thread; returns (server, base URL). Stop it with server.shutdown()"""
+    handler = type("BoundHandler", (Handler,), {'api': api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", default="fakeuser")
+    parser.add_argument("--playlists", type=int, default=1000)
+    parser.add_argument("--tracks", type=int, default=50, help="mean tracks per playlist")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API request")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of API requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    api = FakeSpotify(args.user, args.playlists, args.tracks, args.latency, args.rate_limit, args.retry_after)
+    server, base = serve(api, port=args.port)
+    print(f"Fake Spotify API for user {args.user!r} ({args.playlists} playlists) on {base}")
+    print(f'Set "SPOTIFY_API_BASE": "{base}" and "USER": "{args.user}" in settings.json; Ctrl+C stops it')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(api.counters))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Settings store shared by the GUI, headless mode and get_playlists
+settings.json is parsed once and cached until its modification time changes;
+writes go through a temp file + rename under a lock, so concurrent processes
+never see a half-written file
+"""
+
+import os
+import json
+import threading
+import dataclasses
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# Settings file path
+SETTINGS_PATH = "settings.json"
+
+DEFAULT_SYNC_FOLDER = os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync')
+
+@dataclass
+class Settings:
+    """All settings; each field is stored in settings.json under its upper-case name"""
+    client_id: str = ''
+    client_secret: str = ''
+    user: str = ''
+    sync_folder: str = DEFAULT_SYNC_FOLDER
+    yt_premium_enabled: bool = False
+    yt_cookies_file: str = ''
+    playlist_delay: float = 0  # Delay in seconds between playlists (0 = no delay)
+    rate_limit_wait: float = 0  # Minimum wait in seconds when rate limited
+    max_parallel_syncs: int = 4  # Number of playlists synced in parallel
+    deduplicate_tracks: bool = True  # Link tracks shared between playlists instead of downloading them again
+    sync_engine: str = 'subprocess'  # "inprocess" runs spotdl inside the app with one shared downloader
+    max_retries: int = 5  # Retries per playlist on rate limits and network errors
+    spotdl_bin: str = 'spotdl'  # Command that starts spotdl, e.g. "python -m spotdl" or a stub for benchmarks
+    sync_interval: float = 60  # Minutes between syncs in headless mode
+    http_cache_mb: float = 50  # Size of the Spotify API response cache (0 = off)
+    sync_order_policy: str = 'shortest'  # Order of sync jobs: "shortest" (least work first), "stale" or "listing"
+    pinned_playlists: list = field(default_factory=list)  # Playlists synced before all others (names or ids)
+    sync_metrics: bool = True  # Write per-playlist timings to .spotisync/metrics.jsonl and metrics.prom
+    garbage_collect: bool = True  # After a sync, move files no playlist needs any more to the trash
+    trash_retention_days: float = 7  # Days trashed files are kept before they are deleted
+    spotify_api_base: str = ''  # Other server for the Spotify Web API, e.g. benchmarks/fake_spotify.py ('' = Spotify)
+    spotdl_threads: int = 0  # Downloads spotdl runs at once per playlist (--threads, 0 = spotdl's default)
+    adaptive_concurrency: bool = False  # Tune parallel syncs and spotdl threads to the measured tracks per minute
+    max_adaptive_syncs: int = 8  # Most playlists synced in parallel when adaptive
+    max_spotdl_threads: int = 16  # Most spotdl threads per playlist when adaptive
+    # More Spotify users synced side by side: [{"NAME", "USER", "SYNC_FOLDER", "CLIENT_ID", "CLIENT_SECRET"}]
+    accounts: list = field(default_factory=list)
+    # Keys this version does not know about, kept so saving never drops them
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build settings from the JSON layout, falling back to defaults for missing keys"""
+        known = {f.name for f in dataclasses.fields(cls)} - {'extra'}
+        values = {}
+        extra = {}
+        for key, value in data.items():
+            name = key.lower()
+            if name in known:
+                values[name] = value
+            else:
+                extra[key] = value
+        return cls(**values, extra=extra)
+
+    def to_dict(self):
+        """Return the JSON layout (upper-case keys)"""
+        data = {f.name.upper(): getattr(self, f.name) for f in dataclasses.fields(self) if f.name != 'extra'}
+        data.update(self.extra)
+        return data
+
+    @property
+    def has_credentials(self):
+        return bool(self.client_id and self.client_secret and self.user)
+
+    @property
+    def use_yt_premium(self):
+        """YouTube Music Premium is only used when a cookies file is present"""
+        return bool(self.yt_premium_enabled and self.yt_cookies_file and os.path.exists(self.yt_cookies_file))
+
+def _copy(settings):
+    """Copy of settings that shares no mutable values with the original"""
+    return dataclasses.replace(settings, extra=dict(settings.extra),
+                               accounts=[dict(account) for account in settings.accounts],
+                               pinned_playlists=list(settings.pinned_playlists))
+
+_cache = None  # (stat key, Settings)
+_cache_lock = threading.RLock()
+_migrated = False
+
+def _parse_env(path):
+    """Simple parsing of a .env file"""
+    env_settings = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                key = key.strip()
+                value = value.strip()
+                # Remove quotes if present
+                if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                    value = value[1:-1]
+                env_settings[key] = value
+    return env_settings
+
+def migrate_from_env():
+    """Migrate settings from .env file to JSON if .env exists"""
+    if os.path.exists('.env') and not os.path.exists(SETTINGS_PATH):
+        try:
+            env_settings = _parse_env('.env')
+            settings = Settings(
+                client_id=env_settings.get('CLIENT_ID', '') or env_settings.get('SPOTIPY_CLIENT_ID', ''),
+                client_secret=env_settings.get('CLIENT_SECRET', '') or env_settings.get('SPOTIPY_CLIENT_SECRET', ''),
+                user=env_settings.get('USER', ''),
+                sync_folder=env_settings.get('SYNC_FOLDER', DEFAULT_SYNC_FOLDER),
+                yt_premium_enabled=env_settings.get('YT_PREMIUM_ENABLED', '').lower() == 'true',
+                yt_cookies_file=env_settings.get('YT_COOKIES_FILE', '')
+            )
+            save_settings(settings)
+            print("Successfully migrated settings from .env to settings.json")
+            return True
+        except Exception as e:
+            print(f"Migration failed: {e}")
+    return False
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_settings():
+    """
+    Return the current settings
+    The file is only read again when its modification time or size changed;
+    each caller gets its own copy, so changing it does not affect others
+    """
+    global _cache, _migrated
+    with _cache_lock:
+        if not _migrated:
+            # Try migration once per process
+            _migrated = True
+            migrate_from_env()
+        key = _stat_key(SETTINGS_PATH)
+        if _cache is None or _cache[0] != key:
+            try:
+                with open(SETTINGS_PATH, encoding="utf-8") as f:
+                    settings = Settings.from_dict(json.load(f))
+            except FileNotFoundError:
+                # Default settings on first run
+                settings = Settings()
+            except ValueError as e:
+                print(f"settings.json is not valid JSON ({e}), using defaults")
+                settings = Settings()
+            _cache = (key, settings)
+        return _copy(_cache[1])
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock shared with other processes, held while settings.json is written"""
+    with open(path, "a+b") as lock_file:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _write(settings):
+    """Write settings atomically and refresh the cache; the caller holds both locks"""
+    global _cache
+    tmp_path = f"{SETTINGS_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(settings.to_dict(), f, indent=2)
+    os.replace(tmp_path, SETTINGS_PATH)
+    _cache = (_stat_key(SETTINGS_PATH), _copy(settings))
+
+def save_settings(settings):
+    """Replace settings.json with the given settings"""
+    with _cache_lock, _file_lock(SETTINGS_PATH + ".lock"):
+        _write(settings)
+
+def update_settings(**changes):
+    """
+    Change some settings and keep the rest as they are on disk
+    The read and the write happen under the lock, so concurrent updates are not lost
+    """
+    global _cache
+    with _cache_lock, _file_lock(SETTINGS_PATH + ".lock"):
+        _cache = None
+        try:
+            with open(SETTINGS_PATH, encoding="utf-8") as f:
+                settings = Settings.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError):
+            settings = Settings()
+        settings = dataclasses.replace(settings, **changes)
+        _write(settings)
+        return _copy(settings)
@@ -0,0 +1,254 @@
+"""
+Sync folder watcher
+Reports which playlist folders were added, removed or renamed in the sync folder.
+Uses Linux inotify when available and falls back to polling elsewhere.
+Events are debounced, and the folder is only listed once they settle
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from dataclasses import dataclass
+
+ADDED = 'added'
+REMOVED = 'removed'
+RENAMED = 'renamed'
+
+# inotify flags (see <sys/inotify.h>)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+@dataclass
+class FolderChange:
+    """One playlist folder that appeared, disappeared or got a new name"""
+    kind: str
+    name: str
+    old_name: str = ''
+
+def snapshot(path):
+    """
+    Map every visible sub folder to (inode, mtime); renaming a folder keeps both,
+    so renames can be told apart from delete + add even when polling
+    """
+    folders = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                    continue
+                folders[entry.name] = (entry.inode(), entry.stat(follow_symlinks=False).st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return folders
+
+def diff_snapshots(old, new, moves=None):
+    """
+    Compare two snapshots and return the FolderChanges between them
+    moves is the set of (old_name, new_name) pairs inotify reported; without it,
+    renames are matched by inode and mtime
+    """
+    removed = {name: identity for name, identity in old.items() if name not in new}
+    added = {name: identity for name, identity in new.items() if name not in old}
+    changes = []
+    for name in sorted(added):
+        if moves is not None:
+            old_name = next((src for src, dst in moves if dst == name and src in removed), None)
+        else:
+            old_name = next((src for src, identity in removed.items() if identity == added[name]), None)
+        if old_name is not None:
+            del removed[old_name]
+            changes.append(FolderChange(RENAMED, name, old_name))
+        else:
+            changes.append(FolderChange(ADDED, name))
+    for name in sorted(removed):
+        changes.append(FolderChange(REMOVED, name))
+    return changes
+
+def _load_inotify():
+    """Return libc with the inotify functions, or None if they are not available"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class FolderWatcher:
+    """
+    Watch the top level of a sync folder and call callback(changes) with a list of FolderChange
+    once changes have been quiet for `debounce` seconds
+    """
+
+    def __init__(self, path, callback, debounce=2.0, poll_interval=10.0, use_inotify=True, log=None):
+        self.path = path
+        self.callback = callback
+        self.log = log
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._libc = _load_inotify() if use_inotify else None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()  # Held while a listing is compared and reported
+        self._snapshot = snapshot(path)
+        self._moves = None  # Rename pairs inotify reported since the last flush
+        self._pending_moves = {}  # inotify cookie -> folder name moved away
+        self._watch_lost = False  # The sync folder itself was deleted or moved
+        self._lost = False  # Polling since then, until inotify can watch the folder again
+
+    @property
+    def backend(self):
+        return 'inotify' if self._libc else 'polling'
+
+    def start(self):
+        """Watch in a background thread"""
+        self._thread = threading.Thread(target=self.run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def run(self):
+        """Watch until stop() is called"""
+        fd = self._open_inotify()
+        try:
+            while not self._stop.is_set():
+                if fd is None:
+                    # Polling: one listing of the top folder every poll_interval
+                    self._stop.wait(self.poll_interval)
+                    if self._lost and os.path.isdir(self.path):
+                        fd = self._open_inotify()
+                        if fd is not None:
+                            self._lost = False
+                            self._warn(f"{self.path} is back; watching it again")
+                elif not self._wait_for_events(fd):
+                    continue
+                self._flush()
+                if self._watch_lost:
+                    fd = self._rewatch(fd)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _open_inotify(self):
+        """Start an inotify watch on the sync folder, or return None to poll"""
+        if not self._libc:
+            return None
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if self._libc.inotify_add_watch(fd, os.fsencode(self.path), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        self._moves = set()
+        return fd
+
+    def _rewatch(self, fd):
+        """
+        The watch on the sync folder is gone with the folder: watch it again once it exists
+        under its path, polling meanwhile; returns the new inotify fd or None
+        """
+        self._watch_lost = False
+        os.close(fd)
+        self._moves = None
+        self._pending_moves.clear()
+        new_fd = self._open_inotify() if os.path.isdir(self.path) else None
+        if new_fd is None:
+            self._lost = bool(self._libc)
+            self._warn(f"⚠️ {self.path} was deleted or moved; polling until it is back")
+        else:
+            self._warn(f"⚠️ {self.path} was replaced; watching the new folder")
+        return new_fd
+
+    def _warn(self, message):
+        if self.log:
+            self.log(message)
+
+    def _wait_for_events(self, fd):
+        """
+        Sleep until a folder event arrives, then keep reading until it has been quiet for
+        `debounce` seconds. Returns True if something about a folder changed
+        """
+        relevant = False
+        timeout = 1.0  # Wake up once a second to notice stop()
+        while not self._stop.is_set():
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                if relevant:
+                    return True
+                continue
+            relevant = self._read_events(fd) or relevant
+            if relevant:
+                timeout = self.debounce
+        return False
+
+    def _read_events(self, fd):
+        """Drain the inotify queue; only folder events matter, moves are paired by their cookie"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return relevant
+                raise
+            offset = 0
+            while offset < len(data):
+                _, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                start = offset + _EVENT_HEADER.size
+                name = os.fsdecode(data[start:start + length].rstrip(b'\0'))
+                offset = start + length
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    # No more events come for this watch; run() sets up a new one
+                    self._watch_lost = True
+                    relevant = True
+                    continue
+                if not mask & IN_ISDIR:
+                    continue
+                relevant = True
+                if mask & IN_MOVED_FROM:
+                    self._pending_moves[cookie] = name
+                elif mask & IN_MOVED_TO and cookie in self._pending_moves:
+                    self._moves.add((self._pending_moves.pop(cookie), name))
+
+    def _flush(self):
+        """List the folder once and report what changed since the last listing"""
+        with self._lock:
+            current = snapshot(self.path)
+            changes = diff_snapshots(self._snapshot, current, self._moves)
+            self._snapshot = current
+            if self._moves is not None:
+                self._moves = set()
+                self._pending_moves.clear()
+            if changes:
+                self.callback(changes)
+
+    def rebase(self):
+        """
+        Take the folder as it is now as the last listing, so changes made until now are not reported
+        Once this returns, no report of those changes is still on its way to the callback
+        """
+        with self._lock:
+            self._snapshot = snapshot(self.path)
+            if self._moves is not None:
+                self._moves = set()
+                self._pending_moves.clear()
@@ -0,0 +1,236 @@
+"""
+Garbage collector for the sync folder
+Finds what no playlist needs any more: folders of playlists that are gone from
+Spotify, audio files of songs spotdl's save file no longer lists and shared-store tracks
+that no playlist links to. They are moved to a trash folder first and deleted
+once the retention window has passed, so nothing is lost by mistake; nothing
+asks questions, so the GUI and headless mode both run it after a sync
+"""
+
+import os
+import json
+import time
+from dataclasses import dataclass
+from playlist_index import PlaylistIndex
+from sync_state import SyncState, STATE_DIR, AUDIO_EXTENSIONS
+from track_store import read_save_file, _normalize, _song_id
+
+TRASH_DIR = 'trash'
+# {playlist folder: {track id: file name}} of the songs each save file listed at the last pass
+LISTED_FILE = 'listed_tracks.json'
+
+# Files deleted per batch when purging, with a short pause in between so a running sync keeps its disk
+DELETE_BATCH = 200
+DELETE_PAUSE = 0.05
+
+def freed_bytes(path):
+    """Bytes deleting path would free: files with other hardlinks (store tracks) free nothing"""
+    if os.path.islink(path) or os.path.isfile(path):
+        stat = os.lstat(path)
+        return stat.st_size if stat.st_nlink <= 1 else 0
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            stat = os.lstat(os.path.join(root, name))
+            if stat.st_nlink <= 1:
+                total += stat.st_size
+    return total
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+@dataclass
+class GcReport:
+    playlists: int = 0         # Playlist folders moved to the trash
+    tracks: int = 0            # Audio files moved out of playlist folders
+    stored: int = 0            # Shared-store tracks moved to the trash
+    quarantined_bytes: int = 0
+    reclaimed_bytes: int = 0   # Freed by deleting expired trash
+
+    def summary(self):
+        return (f"Cleanup: {self.playlists} playlist folder(s), {self.tracks} track(s) and "
+                f"{self.stored} stored track(s) moved to the trash ({_mb(self.quarantined_bytes)}), "
+                f"{_mb(self.reclaimed_bytes)} reclaimed")
+
+class Trash:
+    """
+    <sync folder>/.spotisync/trash/<unix time>/<path relative to the sync folder>
+    Every pass gets its own batch, so a batch is deleted as a whole when it expires
+    and anything can be restored by moving it back to the same relative path
+    """
+
+    def __init__(self, sync_folder):
+        self.sync_folder = sync_folder
+        self.root = os.path.join(sync_folder, STATE_DIR, TRASH_DIR)
+        self.batch = os.path.join(self.root, str(int(time.time())))
+
+    def put(self, path):
+        """Move path into this pass's batch; returns the bytes it will free once purged"""
+        size = freed_bytes(path)
+        target = os.path.join(self.batch, os.path.relpath(path, self.sync_folder))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        return size
+
+    def batches(self):
+        """(created at, path) of every batch in the trash"""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        batches = []
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                created = int(name)
+            except ValueError:
+                created = os.path.getmtime(path)
+            batches.append((created, path))
+        return sorted(batches)
+
+    def purge(self, retention_days):
+        """Delete batches older than retention_days in small batches of files; returns the bytes freed"""
+        cutoff = time.time() - retention_days * 86400
+        freed = 0
+        deleted = 0
+        for created, path in self.batches():
+            if created > cutoff:
+                break
+            for root, dirs, files in os.walk(path, topdown=False):
+                for name in files:
+                    freed += freed_bytes(os.path.join(root, name))
+                    os.remove(os.path.join(root, name))
+                    deleted += 1
+                    if deleted % DELETE_BATCH == 0:
+                        time.sleep(DELETE_PAUSE)
+                for name in dirs:
+                    os.rmdir(os.path.join(root, name))
+            os.rmdir(path)
+        return freed
+
+def quarantine_playlists(sync_folder, playlist_ids, trash, log=print):
+    """Move the folders of indexed playlists that are not in playlist_ids to the trash"""
+    index = PlaylistIndex(sync_folder)
+    state = SyncState(sync_folder)
+    count = size = 0
+    for playlist_id, folder in index.orphans(playlist_ids).items():
+        size += trash.put(os.path.join(sync_folder, folder))
+        index.forget(playlist_id)
+        state.forget(playlist_id)
+        log(f"Playlist no longer on Spotify, moved to the trash: {folder}")
+        count += 1
+    return count, size
+
+def _song_stem(song):
+    """The "artists - title" name the track store uses to find spotdl's file of a song"""
+    return _normalize(f"{', '.join(song.get('artists') or [song.get('artist', '')])} - {song.get('name', '')}")
+
+def _load_listed(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _save_listed(path, listed):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(listed, f)
+    os.replace(tmp_path, path)
+
+def quarantine_tracks(sync_folder, folders, trash):
+    """
+    Move the audio files of songs a playlist's save file listed at the last pass but no longer
+    lists to the trash. Only files that were matched to a listed song by name are remembered,
+    so a file spotdl named differently (truncated, templated) is never moved
+    Folders without a save file (never synced, or a sync that failed early) are left alone
+    """
+    listed_path = os.path.join(sync_folder, STATE_DIR, LISTED_FILE)
+    previous = _load_listed(listed_path)
+    listed = {}
+    count = size = 0
+    for folder in folders:
+        path = os.path.join(sync_folder, folder)
+        songs = read_save_file(os.path.join(path, f"{folder}.sync.spotdl"))
+        if not songs:
+            if folder in previous:
+                listed[folder] = previous[folder]
+            continue
+        stems = {_song_stem(song): _song_id(song) for song in songs}
+        track_ids = set(stems.values())
+        files = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in AUDIO_EXTENSIONS:
+                    files[_normalize(stem)] = entry.name
+        for track_id, filename in previous.get(folder, {}).items():
+            stem = _normalize(os.path.splitext(filename)[0])
+            # Another listed song may have the same name and still need the file
+            if track_id in track_ids or stem in stems or files.get(stem) != filename:
+                continue
+            size += trash.put(os.path.join(path, filename))
+            count += 1
+        listed[folder] = {track_id: files[stem] for stem, track_id in stems.items()
+                          if track_id and stem in files}
+    _save_listed(listed_path, listed)
+    return count, size
+
+def referenced_tracks(sync_folders):
+    """Spotify track ids listed in any save file of the given sync folders"""
+    track_ids = set()
+    for sync_folder in sync_folders:
+        try:
+            entries = list(os.scandir(sync_folder))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            save_file = os.path.join(entry.path, f"{entry.name}.sync.spotdl")
+            track_ids.update(filter(None, (_song_id(song) for song in read_save_file(save_file))))
+    return track_ids
+
+def quarantine_store(store, sync_folders, trash):
+    """
+    Move shared-store tracks to the trash once no playlist uses them
+    A track is kept while any save file lists it or any hardlink to it is left
+    """
+    referenced = referenced_tracks(sync_folders)
+    unused = []
+    for track_id in store.track_ids():
+        path = store.path_of(track_id)
+        if track_id in referenced or (path and os.stat(path).st_nlink > 1):
+            continue
+        unused.append((track_id, path))
+    size = 0
+    for track_id, path in unused:
+        if path:
+            size += trash.put(path)
+    store.forget([track_id for track_id, path in unused])
+    return len(unused), size
+
+def collect(sync_folder, playlists, retention_days=7, store=None, store_folders=None, log=print):
+    """
+    One cleanup pass over a sync folder; playlists is the full listing from get_playlists
+    Pass store (and the sync folders of every account using it) to clean the shared store too
+    Returns a GcReport
+    """
+    report = GcReport()
+    trash = Trash(sync_folder)
+    # An empty listing more likely means a failed request than a user without playlists
+    if playlists:
+        report.playlists, size = quarantine_playlists(
+            sync_folder, [info['id'] for info in playlists.values()], trash, log)
+        report.quarantined_bytes += size
+        report.tracks, size = quarantine_tracks(sync_folder, playlists.keys(), trash)
+        report.quarantined_bytes += size
+    if store is not None:
+        store_trash = Trash(os.path.dirname(os.path.dirname(store.root)))
+        report.stored, size = quarantine_store(store, store_folders or [sync_folder], store_trash)
+        report.quarantined_bytes += size
+        if store_trash.root != trash.root:
+            report.reclaimed_bytes += store_trash.purge(retention_days)
+    report.reclaimed_bytes += trash.purge(retention_days)
+    return report
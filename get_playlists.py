@@ -1,104 +1,36 @@
-from os import mkdir
 import os
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from spotipy.oauth2 import SpotifyClientCredentials
 from pathlib import Path
-import shutil
 import os.path
-import re
 import subprocess
-import json
+import shlex
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sync_state import SyncState
+from track_store import TrackStore
+from playlist_index import PlaylistIndex
+from collections import deque
+import spotdl_output
+import rate_limit
+import config
+import profiling
+import sync_order
+import sync_control
 
-# Settings file path
-SETTINGS_PATH = "settings.json"
+# Nothing runs at import time: settings are read and the sync folder is created
+# when a sync starts, so the GUI and headless mode start without touching the disk
 
-def migrate_from_env():
-    """Migrate settings from .env file to JSON if .env exists"""
-    if os.path.exists('.env') and not os.path.exists(SETTINGS_PATH):
-        try:
-            # Simple parsing of .env file
-            env_settings = {}
-            with open('.env', 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        # Remove quotes if present
-                        if value.startswith('"') and value.endswith('"'):
-                            value = value[1:-1]
-                        elif value.startswith("'") and value.endswith("'"):
-                            value = value[1:-1]
-                        env_settings[key] = value
-            
-            # Convert to our settings format
-            settings = {
-                'CLIENT_ID': env_settings.get('CLIENT_ID', '') or env_settings.get('SPOTIPY_CLIENT_ID', ''),
-                'CLIENT_SECRET': env_settings.get('CLIENT_SECRET', '') or env_settings.get('SPOTIPY_CLIENT_SECRET', ''),
-                'USER': env_settings.get('USER', ''),
-                'SYNC_FOLDER': env_settings.get('SYNC_FOLDER', os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync')),
-                'YT_PREMIUM_ENABLED': env_settings.get('YT_PREMIUM_ENABLED', '').lower() == 'true',
-                'YT_COOKIES_FILE': env_settings.get('YT_COOKIES_FILE', ''),
-                'PLAYLIST_DELAY': 0,
-                'RATE_LIMIT_WAIT': 0
-            }
-            
-            # Save to JSON
-            with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
-                json.dump(settings, f, indent=2)
-            print("Successfully migrated settings from .env to settings.json")
-            return True
-        except Exception as e:
-            print(f"Migration failed: {e}")
-    return False
-
-def load_settings():
-    """Load settings from JSON file"""
-    # Try migration first
-    migrate_from_env()
-    
-    try:
-        with open(SETTINGS_PATH, encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Return default settings
-        return {
-            "CLIENT_ID": "",
-            "CLIENT_SECRET": "",
-            "USER": "",
-            "SYNC_FOLDER": os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync'),
-            "YT_PREMIUM_ENABLED": False,
-            "YT_COOKIES_FILE": "",
-            "PLAYLIST_DELAY": 0,
-            "RATE_LIMIT_WAIT": 0
-        }
-
-# Load configuration from JSON
-settings = load_settings()
-
-# Configuration from settings
-CLIENT_ID = settings.get('CLIENT_ID', '')
-CLIENT_SECRET = settings.get('CLIENT_SECRET', '')
-USER = settings.get('USER', '')
-SYNC_FOLDER = settings.get('SYNC_FOLDER', os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync'))
-
-# Create sync folder if it doesn't exist
-os.makedirs(SYNC_FOLDER, exist_ok=True)
-
-REMOVE = False
-
-EXISTING_PLAYLISTS = os.listdir(SYNC_FOLDER) if os.path.exists(SYNC_FOLDER) else []
-
-def authenticate():
+@profiling.traced()
+def authenticate(settings=None):
     '''
     Authenticate Spotify api using Client Credentials Flow
     Note: This can only access public playlists, not private ones
+    The client is created once per set of credentials and reused: its token is cached
+    on disk until it expires, and all requests share one keep-alive connection pool
     '''
-    # Use module variables which are set by the GUI
-    client_id = CLIENT_ID
-    client_secret = CLIENT_SECRET
+    settings = settings or config.load_settings()
+    client_id = settings.client_id
+    client_secret = settings.client_secret
     
     # Validate credentials
     if not client_id:
@@ -106,80 +38,613 @@ def authenticate():
     if not client_secret:
         raise ValueError("No Client Secret found. Please configure your settings.")
     
-    # Use Client Credentials Flow (no user authentication needed)
-    auth_manager = SpotifyClientCredentials(
-        client_id=client_id,
-        client_secret=client_secret
-    )
-    sp = spotipy.Spotify(auth_manager=auth_manager)
-    return sp
+    # spotipy pulls in requests/urllib3, so it is only imported once it is needed
+    import spotify_session
+    # Responses are cached on disk and revalidated with ETags, so unchanged playlists cost a 304.
+    # Each parallel sync job fetches its track pages with PAGE_FETCH_WORKERS threads
+    pool_size = min(64, PAGE_FETCH_WORKERS * max(1, settings.max_parallel_syncs))
+    return spotify_session.get_client(client_id, client_secret,
+                                      int(settings.http_cache_mb * 1024 * 1024), pool_size,
+                                      settings.spotify_api_base)
+
+# Spotify returns at most 50 playlists per page
+PLAYLISTS_PAGE_SIZE = 50
+# Number of pages fetched at the same time once the total is known
+PAGE_FETCH_WORKERS = 8
+
+def _playlist_info(entry):
+    '''
+    extract the fields later stages need from a playlist entry
+    '''
+    return {
+        'name': entry["name"],
+        'url': entry["external_urls"]["spotify"],
+        'id': entry["id"],
+        'snapshot_id': entry.get("snapshot_id", ""),
+        'tracks': (entry.get("tracks") or {}).get("total", 0)
+    }
+
+def cache_summary(sp):
+    '''Hit/miss counters of the HTTP cache behind sp, or None if it has none'''
+    session = getattr(sp, '_session', None)
+    return session.summary() if hasattr(session, 'summary') else None
 
-def get_playlists(sp, user=USER):
+@profiling.traced(lambda sp, user=None, *args, **kwargs: user)
+def get_playlists(sp, user=None, sync_folder=None, log=print):
     '''
-    fetch playlists names from Spotify
+    fetch all playlists of a user from Spotify
+    The first page tells us the total, the remaining pages are then fetched concurrently
+    Folder names come from the playlist index of the sync folder, so renamed playlists
+    keep (and move) their folder
+    Returns {folder_name: {'name', 'url', 'id', 'snapshot_id', 'tracks'}}
     '''
-    playlists = {}
-    results = sp.user_playlists(user=user)
-    for entry in results["items"]:
-        playlist_name = re.sub(r"[^A-Za-z0-9]", "", entry["name"]) #remove whitespaces and stuff
-        playlists[playlist_name] = entry["external_urls"]["spotify"]
-    return playlists
+    if user is None or sync_folder is None:
+        settings = config.load_settings()
+        user = user or settings.user
+        sync_folder = sync_folder or settings.sync_folder
+    first = sp.user_playlists(user=user, limit=PLAYLISTS_PAGE_SIZE)
+    pages = [first]
+    
+    total = first.get("total") or 0
+    offsets = list(range(len(first["items"]), total, PLAYLISTS_PAGE_SIZE)) if first.get("next") else []
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, len(offsets))) as pool:
+            # map keeps the page order, so playlists stay in Spotify order
+            pages.extend(pool.map(
+                lambda offset: sp.user_playlists(user=user, limit=PLAYLISTS_PAGE_SIZE, offset=offset),
+                offsets
+            ))
+    
+    # Follow next links in case playlists were added while we were fetching
+    while pages[-1].get("next") and pages[-1]["items"]:
+        pages.append(sp.next(pages[-1]))
+    
+    infos = {}
+    for page in pages:
+        for entry in page["items"]:
+            if entry and entry["id"] not in infos:
+                infos[entry["id"]] = _playlist_info(entry)
+    
+    folders, moves = PlaylistIndex(sync_folder).resolve(
+        [(playlist_id, info['name']) for playlist_id, info in infos.items()], log)
+    if moves:
+        state = SyncState(sync_folder)
+        for playlist_id, old, new in moves:
+            state.rename(playlist_id, new)
+    return {folders[playlist_id]: info for playlist_id, info in infos.items()}
+
+# Spotify returns at most 100 playlist items per page
+TRACKS_PAGE_SIZE = 100
+
+@profiling.traced(lambda sp, playlist_id: playlist_id)
+def get_playlist_tracks(sp, playlist_id):
+    '''
+    fetch the Spotify track ids of a playlist, fetching pages concurrently like get_playlists
+    '''
+    fields = "items(track(id)),next,total"
+    first = sp.playlist_items(playlist_id, fields=fields, limit=TRACKS_PAGE_SIZE)
+    pages = [first]
+    
+    total = first.get("total") or 0
+    offsets = list(range(len(first["items"]), total, TRACKS_PAGE_SIZE)) if first.get("next") else []
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, len(offsets))) as pool:
+            pages.extend(pool.map(
+                lambda offset: sp.playlist_items(playlist_id, fields=fields, limit=TRACKS_PAGE_SIZE, offset=offset),
+                offsets
+            ))
+    
+    track_ids = []
+    for page in pages:
+        for item in page["items"]:
+            track = item.get("track") if item else None
+            # Local files and removed tracks have no id
+            if track and track.get("id"):
+                track_ids.append(track["id"])
+    return track_ids
+
+# Only the last lines of spotdl output are kept, for error messages
+OUTPUT_TAIL_LINES = 50
 
-def sync_single_playlist(url, name, use_yt_premium=False, cookies_file=''):
+@profiling.traced(lambda url, name, *args, **kwargs: name)
+def sync_single_playlist(url, name, use_yt_premium=False, cookies_file='', cwd=None, on_event=None, engine=None, limiter=None, spotdl_bin='spotdl', metrics=None, control=None, threads=0):
     '''
     Use spotdl to sync a single playlist 
     Supports YouTube Music Premium for higher quality downloads (256kbps)
+    The playlist folder is passed as cwd so parallel jobs never touch the process-wide working directory
+    spotdl output is streamed line by line; on_event receives a spotdl_output.TrackEvent per track step
+    With an engine (see spotdl_engine) spotdl runs in this process instead of a subprocess
+    Rate limits spotdl reports while running are passed on to the limiter so other jobs hold off
+    spotdl_bin is the command that starts spotdl, split like a shell would (e.g. "python -m spotdl")
+    metrics (a sync_metrics.PlaylistMetrics) times the phases of the run from its output
+    control (a sync_control.SyncControl) stops the spotdl process when the run is cancelled
+    threads is spotdl's --threads (0 = spotdl's default)
+    Raises a rate_limit.SyncError subclass when the sync fails, sync_control.SyncCancelled when it was cancelled
     '''
-    command = f"spotdl sync {url} --save-file {name}.sync.spotdl"
+    def handle_line(line):
+        """Pass a line on to metrics, on_event and the limiter; returns the rate limit it reports, if any"""
+        event = spotdl_output.parse_line(line)
+        if metrics:
+            metrics.on_line(event)
+        if event and on_event:
+            on_event(event)
+        rate_limited = rate_limit.classify_line(spotdl_output.error_text(line, event))
+        if rate_limited and limiter:
+            limiter.observe(rate_limited)
+        return rate_limited
+    
+    if metrics:
+        metrics.spotdl_started()
+    if engine:
+        print("sync in-process: ", url)
+        try:
+            engine.sync(url, name, cwd or os.getcwd(), handle_line, threads=threads, control=control)
+        except sync_control.SyncCancelled:
+            raise
+        except Exception as e:
+            if control and control.cancelled:
+                raise sync_control.SyncCancelled(name)
+            raise rate_limit.classify_exception(e)
+        return
+    
+    command = shlex.split(spotdl_bin) + ["sync", url, "--save-file", f"{name}.sync.spotdl"]
+    if threads:
+        command += ["--threads", str(threads)]
     
     # Add YouTube Music Premium options if enabled
     if use_yt_premium and cookies_file and os.path.exists(cookies_file):
-        command += f" --cookie-file \"{cookies_file}\""
+        command += ["--cookie-file", cookies_file]
         # Always use M4A format with bitrate disabled for best quality
-        command += " --format m4a"
-        command += " --bitrate disable"
+        command += ["--format", "m4a"]
+        command += ["--bitrate", "disable"]
     
-    print("run: ", command)
+    print("run: ", shlex.join(command))
     
-    # Use subprocess for better error handling
+    # Stream output through a pipe so memory stays flat on huge playlists
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    rate_limited = None
+    process = None
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            # Check if it's a rate limit error
-            if "429" in result.stderr or "rate limit" in result.stderr.lower():
-                raise Exception("Rate limit error: Too many requests to Spotify API")
+        process = subprocess.Popen(
+            command, cwd=cwd,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding="utf-8", errors="replace", bufsize=1,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
+        )
+        if control:
+            control.register(process)
+        with process.stdout:
+            for line in process.stdout:
+                line = line.rstrip()
+                if not line:
+                    continue
+                tail.append(line)
+                # Remember rate limits even if they scroll out of the tail
+                rate_limited = handle_line(line) or rate_limited
+        returncode = process.wait()
+    except (OSError, subprocess.SubprocessError) as e:
+        raise rate_limit.SyncError(f"Failed to run spotdl: {str(e)}")
+    finally:
+        if control and process:
+            control.unregister(process)
+    
+    if returncode != 0:
+        if control and control.cancelled:
+            raise sync_control.SyncCancelled(name)
+        error = rate_limit.classify_output(tail, returncode)
+        if rate_limited and not isinstance(error, rate_limit.RateLimitError):
+            error = rate_limited
+        raise error
+
+@profiling.traced(lambda info, name, *args, **kwargs: name)
+def sync_playlist_job(info, name, sync_folder, settings, state=None, force=False, log=print, sp=None, store=None, on_event=None, engine=None, limiter=None, metrics=None, control=None, concurrency=None):
+    '''
+    Sync one playlist inside its own folder, using the given config.Settings
+    Rate limits and network errors are retried through the shared limiter (exponential backoff,
+    Retry-After and circuit breakers), up to MAX_RETRIES times
+    Playlists whose snapshot_id matches the last successful sync are skipped unless force is set
+    With a track store, tracks already downloaded for another playlist are linked in first
+    (this needs sp to list the playlist's tracks) and new downloads are moved into the store
+    on_event receives the per-track events of spotdl's output
+    engine is an optional in-process spotdl engine shared by all jobs
+    metrics is an optional sync_metrics.PlaylistMetrics that receives phase timings and retries
+    control is an optional sync_control.SyncControl; a cancel stops spotdl and ends the retries
+    concurrency is an optional adaptive_concurrency.AdaptiveConcurrency: it sets spotdl's threads
+    and is told about rate limits and errors, so it can back off
+    Returns "synced", "skipped", "failed" or "cancelled"
+    '''
+    url = info['url']
+    use_yt_premium = settings.use_yt_premium
+    cookies_file = settings.yt_cookies_file
+    max_retries = settings.max_retries
+    limiter = limiter or rate_limit.shared_limiter(settings.rate_limit_wait, log)
+    
+    # Create playlist folder
+    playlist_folder = os.path.join(sync_folder, name)
+    Path(playlist_folder).mkdir(parents=True, exist_ok=True)
+    
+    # Nothing changed upstream and every file is still there
+    if state and not force and state.is_unchanged(info.get('id'), info.get('snapshot_id'), playlist_folder, name):
+        log(f"Skipping {name} (unchanged since last sync)")
+        return "skipped"
+    
+    if store and sp and info.get('id'):
+        try:
+            with profiling.span("link stored tracks", playlist=name):
+                linked = store.link_into(get_playlist_tracks(sp, info['id']), playlist_folder)
+            if linked:
+                log(f"  Reusing {linked} track(s) already downloaded for other playlists")
+                if metrics:
+                    # Linked tracks were not downloaded, so they are not bytes written
+                    metrics.files_present(playlist_folder)
+        except Exception as e:
+            log(f"  ⚠️ Could not reuse stored tracks for {name}: {str(e)}")
+    
+    log(f"Syncing playlist: {name}")
+    if use_yt_premium:
+        log("  Using YouTube Music Premium (M4A @ 256kbps)")
+    
+    # spotdl exits 0 even when some tracks failed; those must be retried next run
+    failed_tracks = set()
+    def on_track_event(event):
+        if event.kind == spotdl_output.FAILED:
+            failed_tracks.add(event.track)
+        if on_event:
+            on_event(event)
+    
+    attempt = 0
+    while True:
+        # Wait while any upstream is cooling down or its circuit is open
+        with profiling.span("rate limit wait", playlist=name):
+            trials = limiter.acquire(should_stop=control and (lambda: control.cancelled))
+        if control and control.cancelled:
+            # acquire may have handed this job a half-open circuit's trial slot
+            limiter.release(trials)
+            log(f"  Cancelled {name}")
+            return "cancelled"
+        threads = concurrency.threads if concurrency else settings.spotdl_threads
+        failed_tracks.clear()
+        try:
+            sync_single_playlist(url, name, use_yt_premium, cookies_file, cwd=playlist_folder,
+                                 on_event=on_track_event, engine=engine, limiter=limiter,
+                                 spotdl_bin=settings.spotdl_bin, metrics=metrics, control=control,
+                                 threads=threads)
+            limiter.on_success()
+            break
+        except sync_control.SyncCancelled:
+            limiter.release(trials)
+            log(f"  Cancelled {name}")
+            return "cancelled"
+        except rate_limit.TransientError as e:
+            attempt += 1
+            if metrics:
+                metrics.retries = attempt
+            if isinstance(e, rate_limit.RateLimitError):
+                delay = limiter.on_rate_limit(e)
+                limiter.on_failure([u for u in trials if u != e.upstream])
+                reason = f"Rate limit hit ({e.upstream})"
             else:
-                raise Exception(f"Command failed with error: {result.stderr}")
-    except subprocess.SubprocessError as e:
-        raise Exception(f"Failed to run spotdl: {str(e)}")
+                limiter.on_failure(trials)
+                delay = rate_limit.backoff_delay(attempt)
+                reason = str(e)
+            if concurrency:
+                concurrency.back_off(f"{reason} in {name}")
+            if attempt > max_retries:
+                log(f"  ❌ Failed to sync {name} after {max_retries} retries: {str(e)}")
+                return "failed"
+            log(f"  ⚠️ {reason} for {name}. Retrying in {delay:.0f}s ({attempt}/{max_retries})...")
+            if not isinstance(e, rate_limit.RateLimitError):
+                # Network errors only slow down this job; rate limits pause everyone through the limiter
+                if control:
+                    if not control.sleep(delay):
+                        log(f"  Cancelled {name}")
+                        return "cancelled"
+                else:
+                    time.sleep(delay)
+        except Exception as e:
+            limiter.on_failure(trials)
+            if concurrency:
+                concurrency.back_off(f"Error in {name}")
+            log(f"  ❌ Error syncing {name}: {str(e)}")
+            return "failed"
+    
+    # Move new downloads into the shared store so other playlists can link them
+    if store:
+        try:
+            with profiling.span("ingest into track store", playlist=name):
+                store.ingest(playlist_folder, f"{name}.sync.spotdl")
+        except OSError as e:
+            log(f"  ⚠️ Could not add {name} to the track store: {str(e)}")
+    
+    if failed_tracks:
+        log(f"  ⚠️ {len(failed_tracks)} track(s) of {name} failed; they will be retried next run")
+    # Remember the snapshot so the next run can skip this playlist
+    elif state and info.get('id'):
+        state.mark_synced(info['id'], info.get('snapshot_id'), playlist_folder, name)
+    return "synced"
 
-def sync_playlists(playlists, sync_folder=SYNC_FOLDER):
+def _start_engine(settings, log=print):
     '''
-    create playlist classes for each playlist
+    Get the shared in-process spotdl engine, or None to fall back to one subprocess per playlist
     '''
-    # Load current settings
-    settings = load_settings()
-    use_yt_premium = settings.get('YT_PREMIUM_ENABLED', False)
-    cookies_file = settings.get('YT_COOKIES_FILE', '')
+    try:
+        import spotdl_engine
+        engine = spotdl_engine.get_engine(
+            settings.client_id,
+            settings.client_secret,
+            settings.yt_premium_enabled,
+            settings.yt_cookies_file
+        )
+        log("Using the in-process spotdl engine (one playlist at a time)")
+        return engine
+    except Exception as e:
+        log(f"  ⚠️ In-process spotdl engine unavailable ({str(e)}), using spotdl subprocesses")
+        return None
+
+class SyncProgress:
+    '''
+    Thread-safe progress of a sync run, counted per track
+    Falls back to counting playlists when no track counts are known
+    '''
+    def __init__(self, playlists, callback=None):
+        self.tracks = {name: info.get('tracks', 0) for name, info in playlists.items()}
+        self.finished = dict.fromkeys(playlists, 0)
+        self.playlists_done = 0
+        self.callback = callback
+        self._last_percent = -1
+        self._lock = threading.Lock()
+    
+    def set_tracks(self, name, count):
+        '''use the track count spotdl reports, it is more accurate than the listing'''
+        with self._lock:
+            self.tracks[name] = count
+        self._report()
     
-    for name, url in playlists.items():
-        os.chdir(SYNC_FOLDER)
-        Path(name).mkdir(parents=True, exist_ok=True)
-        os.chdir(os.path.join(SYNC_FOLDER, name))
-        sync_single_playlist(url, name, use_yt_premium, cookies_file)
+    def track_finished(self, name):
+        with self._lock:
+            # Clamp so a retried playlist does not count its tracks twice
+            self.finished[name] = min(self.finished[name] + 1, self.tracks[name])
+        self._report()
+    
+    def playlist_finished(self, name):
+        with self._lock:
+            self.finished[name] = self.tracks[name]
+            self.playlists_done += 1
+        self._report()
+    
+    def percent(self):
+        with self._lock:
+            total_tracks = sum(self.tracks.values())
+            if total_tracks:
+                return int(sum(self.finished.values()) / total_tracks * 100)
+            return int(self.playlists_done / max(1, len(self.tracks)) * 100)
+    
+    def _report(self):
+        percent = self.percent()
+        # Only emit when the bar moves forward, not once per track
+        # (it can dip when spotdl reports more tracks than the listing did)
+        if self.callback and percent > self._last_percent:
+            self._last_percent = percent
+            self.callback(percent)
 
+# Checkpoint status of each sync_playlist_job result
+CHECKPOINT_STATUS = {
+    "synced": sync_control.DONE,
+    "skipped": sync_control.DONE,
+    "failed": sync_control.FAILED,
+    "cancelled": sync_control.CANCELLED,
+}
 
-def fetch_playlists_to_remove(playlists, existing_playlists=set(EXISTING_PLAYLISTS)):
-    playlist_names = set(playlists.keys())
-    playlists_to_remove = existing_playlists.difference(playlist_names)
-    return playlists_to_remove
+@profiling.traced()
+def sync_playlists(playlists, sync_folder=None, max_workers=None, force=False, log=print, progress=None, status=None, sp=None, track=None, settings=None, store=None, limiter=None, engine=None, control=None):
+    '''
+    Sync playlists with a pool of parallel spotdl jobs
+    playlists maps names to the info dicts returned by get_playlists
+    Unchanged playlists are skipped using the stored snapshot_id unless force is set
+    Pass sp to reuse tracks already downloaded for other playlists
+    log/progress/status are optional callbacks (the GUI passes its Qt signals here);
+    progress moves per track and track(name, kind, title) receives every per-track event
+    settings is a config.Settings; by default the current settings are loaded
+    store/limiter/engine can be passed in to share them between several runs (see accounts)
+    Jobs start in the order SYNC_ORDER_POLICY and PINNED_PLAYLISTS give (see sync_order)
+    With SYNC_METRICS on, per-playlist timings go to .spotisync/metrics.jsonl and metrics.prom
+    control is an optional sync_control.SyncControl to pause, resume or cancel the run
+    With ADAPTIVE_CONCURRENCY on, MAX_PARALLEL_SYNCS and SPOTDL_THREADS are only the starting
+    point; see adaptive_concurrency
+    Progress is checkpointed in .spotisync/checkpoint.json; after a cancel or crash the next run
+    syncs the interrupted playlists first and skips the ones that were done
+    Returns the number of playlists that are up to date
+    '''
+    # Load current settings
+    settings = settings or config.load_settings()
+    sync_folder = sync_folder or settings.sync_folder
+    if max_workers is None:
+        max_workers = settings.max_parallel_syncs
+    max_workers = max(1, int(max_workers))
+    playlist_delay = settings.playlist_delay
+    # Create sync folder if it doesn't exist
+    os.makedirs(sync_folder, exist_ok=True)
+    state = SyncState(sync_folder)
+    if store is None and settings.deduplicate_tracks:
+        store = TrackStore(sync_folder)
+    
+    total = len(playlists)
+    if total == 0:
+        return 0
+    
+    # One limiter for every job, so a 429 in one job slows down all of them
+    if limiter is None:
+        limiter = rate_limit.shared_limiter(settings.rate_limit_wait, log)
+    
+    if engine is None and settings.sync_engine == 'inprocess':
+        engine = _start_engine(settings, log)
+    
+    # Pinned playlists first, then the rest by SYNC_ORDER_POLICY (shortest job first by default)
+    try:
+        playlists = sync_order.order(playlists, settings.sync_order_policy, state,
+                                     settings.pinned_playlists, force)
+    except ValueError as e:
+        log(f"  ⚠️ {str(e)}; syncing in Spotify's order")
+    
+    control = control or sync_control.SyncControl()
+    checkpoint = sync_control.Checkpoint(sync_folder)
+    previous = checkpoint.load()
+    resumed = {}
+    if any(info.get('id') in previous for info in playlists.values()):
+        playlists, resumed = sync_control.resume_order(playlists, previous)
+        log(f"Resuming the interrupted sync: {len(resumed)} playlist(s) already done, {len(playlists)} to go")
+    checkpoint.start({**playlists, **resumed}, previous)
+    
+    concurrency = None
+    pool_size = max_workers
+    if settings.adaptive_concurrency:
+        import adaptive_concurrency
+        concurrency = adaptive_concurrency.AdaptiveConcurrency(
+            max_workers, settings.max_adaptive_syncs,
+            settings.spotdl_threads or adaptive_concurrency.DEFAULT_SPOTDL_THREADS,
+            settings.max_spotdl_threads, log)
+        # The pool is sized for the most jobs the controller may allow; it hands out the slots
+        pool_size = max(max_workers, concurrency.max_jobs)
+        log(f"Adaptive concurrency: starting at {concurrency.jobs} parallel sync(s) "
+            f"with {concurrency.threads} spotdl thread(s)")
+    
+    metrics = None
+    if settings.sync_metrics:
+        import sync_metrics
+        metrics = sync_metrics.SyncMetrics(sync_folder)
+    
+    done = len(resumed)
+    results = {"synced": 0, "skipped": len(resumed), "failed": 0, "cancelled": 0}
+    tracker = SyncProgress({**resumed, **playlists}, progress)
+    for name in resumed:
+        tracker.playlist_finished(name)
+    
+    def run_job(name, info):
+        def on_event(event):
+            if event.kind == spotdl_output.TOTAL:
+                tracker.set_tracks(name, event.count)
+                return
+            if event.kind in spotdl_output.FINISHED_KINDS:
+                tracker.track_finished(name)
+            if concurrency and event.kind == spotdl_output.DONE:
+                concurrency.track_done()
+            if event.kind == spotdl_output.FAILED:
+                log(f"  ❌ {name}: {event.track}")
+            if track:
+                track(name, event.kind, event.track)
+        
+        # Paused runs start no new playlists; cancelled ones leave the rest pending in the checkpoint
+        if not control.wait_if_paused():
+            return "cancelled"
+        if concurrency:
+            if not concurrency.acquire(lambda: control.cancelled):
+                return "cancelled"
+            try:
+                return run_playlist(name, info, on_event)
+            finally:
+                concurrency.release()
+        return run_playlist(name, info, on_event)
+    
+    def run_playlist(name, info, on_event):
+        checkpoint.mark(info.get('id'), sync_control.RUNNING)
+        playlist_metrics = None
+        if metrics:
+            playlist_metrics = metrics.playlist(name, info.get('id'))
+            playlist_metrics.begin(os.path.join(sync_folder, name))
+        result = sync_playlist_job(info, name, sync_folder, settings, state, force, log, sp, store, on_event, engine, limiter,
+                                   playlist_metrics, control, concurrency)
+        if metrics:
+            playlist_metrics.finish(os.path.join(sync_folder, name), result)
+            metrics.record(playlist_metrics)
+        checkpoint.mark(info.get('id'), CHECKPOINT_STATUS[result])
+        if result == "cancelled":
+            return result
+        tracker.playlist_finished(name)
+        # Optional delay so each worker paces its own requests (skipped playlists made no requests)
+        if playlist_delay > 0 and result != "skipped":
+            log(f"  Waiting {playlist_delay} seconds before next playlist...")
+            control.sleep(playlist_delay)
+        return result
+    
+    if status:
+        status(f"Syncing playlists... ({done}/{total})")
+    with ThreadPoolExecutor(max_workers=max(1, min(pool_size, len(playlists))), thread_name_prefix="spotdl-sync") as pool:
+        futures = [pool.submit(run_job, name, info) for name, info in playlists.items()]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result] += 1
+            if result != "cancelled":
+                done += 1
+            if status:
+                status(f"Syncing playlists... ({done}/{total})")
+    log(f"{results['synced']} synced, {results['skipped']} unchanged, {results['failed']} failed")
+    if concurrency:
+        log(concurrency.summary())
+    if control.cancelled:
+        checkpoint.flush()
+        log(f"Sync cancelled with {results['cancelled']} playlist(s) left; the next sync resumes from here")
+    else:
+        checkpoint.finish()
+    if metrics:
+        try:
+            summary = metrics.finish()
+            log(f"{summary['downloaded']} track(s) downloaded in {summary['duration']:.0f}s "
+                f"({summary['tracks_per_minute']:.1f}/min, {summary['bytes_written'] / (1024 * 1024):.1f} MB)")
+        except OSError as e:
+            log(f"  ⚠️ Could not write sync metrics: {str(e)}")
+    return results['synced'] + results['skipped']
 
-def remove_deleted_playlists(playlists_to_remove):
-    for name in playlists_to_remove:
-        f = os.path.join(SYNC_FOLDER, name)
 
-        if os.path.isdir(f):
-            if input("Remove the playlist: ", name):
-                shutil.rmtree(f)
-    return
+def fetch_playlists_to_remove(playlists, sync_folder=None):
+    '''
+    Folders of playlists that were synced before but are no longer on Spotify
+    Looked up in the playlist index when called, so folders that are not a playlist's
+    are never picked up
+    '''
+    sync_folder = sync_folder or config.load_settings().sync_folder
+    listed = {info['id'] for info in playlists.values()}
+    return set(PlaylistIndex(sync_folder).orphans(listed).values())
 
+def remove_deleted_playlists(playlists_to_remove, sync_folder=None, log=print):
+    '''
+    Move the given playlist folders to the trash (see garbage_collector), without asking
+    They are deleted for good by a later cleanup pass once TRASH_RETENTION_DAYS have passed
+    '''
+    import garbage_collector
+    sync_folder = sync_folder or config.load_settings().sync_folder
+    index = PlaylistIndex(sync_folder)
+    state = SyncState(sync_folder)
+    trash = garbage_collector.Trash(sync_folder)
+    for playlist_id, folder in index.orphans(()).items():
+        if folder in playlists_to_remove:
+            trash.put(os.path.join(sync_folder, folder))
+            index.forget(playlist_id)
+            state.forget(playlist_id)
+            log(f"Moved to the trash: {folder}")
+
+@profiling.traced()
+def collect_garbage(playlists, settings=None, store=None, store_folders=None, log=print):
+    '''
+    Cleanup pass after a sync: moves what no playlist needs any more to the trash and
+    deletes trash older than TRASH_RETENTION_DAYS. playlists is the full listing
+    store_folders are the sync folders whose playlists use the store; by default the main
+    folder and every account's, so tracks only other accounts use are kept
+    Returns the GcReport, or None if GARBAGE_COLLECT is off
+    '''
+    settings = settings or config.load_settings()
+    if not settings.garbage_collect:
+        return None
+    import garbage_collector
+    if store is None and settings.deduplicate_tracks:
+        store = TrackStore(settings.sync_folder)
+    if store is not None and store_folders is None:
+        import accounts
+        try:
+            store_folders = accounts.store_folders(settings)
+        except ValueError as e:
+            log(f"  ⚠️ Not cleaning the track store: {str(e)}")
+            store = None
+    report = garbage_collector.collect(settings.sync_folder, playlists, settings.trash_retention_days,
+                                       store, store_folders, log)
+    log(report.summary())
+    return report
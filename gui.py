@@ -2,74 +2,20 @@ import sys
 import os
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QPushButton, QLabel, QLineEdit, 
-                               QFileDialog, QTextEdit, QGroupBox, QMessageBox,
+                               QFileDialog, QGroupBox, QMessageBox,
                                QListWidget, QProgressBar, QDialog, QDialogButtonBox,
                                QFormLayout, QToolButton, QTextBrowser, QCheckBox, 
-                               QComboBox, QTabWidget, QListWidgetItem, QScrollArea)
+                               QComboBox, QTabWidget, QListWidgetItem,
+                               QListView, QPlainTextEdit, QTableWidget, QTableWidgetItem,
+                               QHeaderView, QMenu)
 from PySide6.QtCore import Qt, QThread, Signal, QSize, QUrl, QTimer
 from PySide6.QtGui import QIcon, QFont, QDesktopServices
 import get_playlists
-from pathlib import Path
-from cookie_extractor import CookieExtractor
-import time
-import json
-
-# Settings file path
-SETTINGS_PATH = "settings.json"
-
-def migrate_from_env():
-    """Migrate settings from .env file to JSON if .env exists"""
-    if os.path.exists('.env') and not os.path.exists(SETTINGS_PATH):
-        try:
-            from dotenv import dotenv_values
-            env_settings = dotenv_values('.env')
-            
-            # Convert to our settings format
-            settings = {
-                'CLIENT_ID': env_settings.get('CLIENT_ID', '') or env_settings.get('SPOTIPY_CLIENT_ID', ''),
-                'CLIENT_SECRET': env_settings.get('CLIENT_SECRET', '') or env_settings.get('SPOTIPY_CLIENT_SECRET', ''),
-                'USER': env_settings.get('USER', ''),
-                'SYNC_FOLDER': env_settings.get('SYNC_FOLDER', os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync')),
-                'YT_PREMIUM_ENABLED': env_settings.get('YT_PREMIUM_ENABLED', '').lower() == 'true',
-                'YT_COOKIES_FILE': env_settings.get('YT_COOKIES_FILE', ''),
-                'PLAYLIST_DELAY': 0,  # No delays by default
-                'RATE_LIMIT_WAIT': 0  # No wait by default
-            }
-            
-            # Save to JSON
-            save_settings(settings)
-            print("Successfully migrated settings from .env to settings.json")
-            return True
-        except ImportError:
-            # python-dotenv not installed, skip migration
-            pass
-    return False
-
-def save_settings(settings: dict):
-    """Save settings to JSON file"""
-    with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
-        json.dump(settings, f, indent=2)
-
-def load_settings() -> dict:
-    """Load settings from JSON file"""
-    # Try migration first
-    migrate_from_env()
-    
-    try:
-        with open(SETTINGS_PATH, encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Return default settings on first run
-        return {
-            "CLIENT_ID": "",
-            "CLIENT_SECRET": "",
-            "USER": "",
-            "SYNC_FOLDER": os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync'),
-            "YT_PREMIUM_ENABLED": False,
-            "YT_COOKIES_FILE": "",
-            "PLAYLIST_DELAY": 0,  # Delay in seconds between playlists (0 = no delay)
-            "RATE_LIMIT_WAIT": 0  # Wait time in seconds when rate limited (0 = no wait)
-        }
+import config
+import log_sink
+import profiling
+import sync_control
+from playlist_model import PlaylistModel
 
 class SettingsDialog(QDialog):
     """Settings dialog for configuration"""
@@ -296,6 +242,8 @@ class SettingsDialog(QDialog):
         
         # Detect available browsers (cache the result)
         if self._cached_browsers is None:
+            # browser_cookie3 is slow to import, so it is loaded with the settings dialog, not at startup
+            from cookie_extractor import CookieExtractor
             self._cached_browsers = CookieExtractor.get_available_browsers()
         
         if self._cached_browsers:
@@ -426,10 +374,12 @@ class SettingsDialog(QDialog):
         <p><b>Rate Limiting:</b></p>
         <p>By default, there are NO delays between downloads for maximum speed. If you encounter rate limits:</p>
         <ul>
-            <li>The app will retry failed downloads immediately</li>
+            <li>The app honours Spotify's Retry-After and backs off exponentially, pausing all downloads together</li>
             <li>You can manually add delays by editing settings.json:</li>
             <li>&nbsp;&nbsp;- "PLAYLIST_DELAY": seconds between playlists (default: 0)</li>
-            <li>&nbsp;&nbsp;- "RATE_LIMIT_WAIT": seconds to wait on 429 errors (default: 0)</li>
+            <li>&nbsp;&nbsp;- "RATE_LIMIT_WAIT": minimum seconds to wait on 429 errors (default: 0)</li>
+            <li>&nbsp;&nbsp;- "MAX_RETRIES": retries per playlist with exponential backoff (default: 5)</li>
+            <li>&nbsp;&nbsp;- "MAX_PARALLEL_SYNCS": playlists synced in parallel (default: 4)</li>
             <li>Most users won't need any delays</li>
         </ul>
         </body>
@@ -469,27 +419,7 @@ class SettingsDialog(QDialog):
     
     def save_settings_silently(self):
         """Save settings without showing success dialog"""
-        # Create settings dictionary
-        settings = {
-            'CLIENT_ID': self.client_id_input.text(),
-            'CLIENT_SECRET': self.client_secret_input.text(),
-            'USER': self.username_input.text(),
-            'SYNC_FOLDER': self.folder_input.text(),
-            'YT_PREMIUM_ENABLED': self.yt_premium_checkbox.isChecked(),
-            'YT_COOKIES_FILE': self.cookies_input.text()
-        }
-        
-        # Save to JSON file
-        save_settings(settings)
-        
-        # Update get_playlists module variables
-        get_playlists.CLIENT_ID = settings['CLIENT_ID']
-        get_playlists.CLIENT_SECRET = settings['CLIENT_SECRET']
-        get_playlists.USER = settings['USER']
-        get_playlists.SYNC_FOLDER = settings['SYNC_FOLDER']
-        
-        # Create sync folder if it doesn't exist
-        os.makedirs(settings['SYNC_FOLDER'], exist_ok=True)
+        self.write_settings()
         
         # Emit signal that settings were saved
         self.settings_saved.emit()
@@ -520,21 +450,35 @@ class SettingsDialog(QDialog):
             # Generic instructions
             QDesktopServices.openUrl(QUrl("https://github.com/yt-dlp/yt-dlp/wiki/FAQ#how-do-i-pass-cookies-to-yt-dlp"))
         
+    def write_settings(self):
+        """Store the dialog fields; settings the dialog does not show are kept as they are"""
+        settings = config.update_settings(
+            client_id=self.client_id_input.text(),
+            client_secret=self.client_secret_input.text(),
+            user=self.username_input.text(),
+            sync_folder=self.folder_input.text(),
+            yt_premium_enabled=self.yt_premium_checkbox.isChecked(),
+            yt_cookies_file=self.cookies_input.text()
+        )
+        
+        # Create sync folder if it doesn't exist
+        os.makedirs(settings.sync_folder, exist_ok=True)
+        
     def load_config(self):
-        """Load configuration from JSON file"""
-        settings = load_settings()
+        """Load configuration from the settings store"""
+        settings = config.load_settings()
         
         # Load API credentials
-        self.client_id_input.setText(settings.get('CLIENT_ID', ''))
-        self.client_secret_input.setText(settings.get('CLIENT_SECRET', ''))
-        self.username_input.setText(settings.get('USER', ''))
+        self.client_id_input.setText(settings.client_id)
+        self.client_secret_input.setText(settings.client_secret)
+        self.username_input.setText(settings.user)
         
         # Load sync folder
-        self.folder_input.setText(settings.get('SYNC_FOLDER', os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync')))
+        self.folder_input.setText(settings.sync_folder)
         
         # Load YouTube Music Premium settings
-        self.yt_premium_checkbox.setChecked(settings.get('YT_PREMIUM_ENABLED', False))
-        self.cookies_input.setText(settings.get('YT_COOKIES_FILE', ''))
+        self.yt_premium_checkbox.setChecked(settings.yt_premium_enabled)
+        self.cookies_input.setText(settings.yt_cookies_file)
         
     def browse_folder(self):
         """Open folder selection dialog"""
@@ -559,6 +503,7 @@ class SettingsDialog(QDialog):
             
     def extract_from_browser(self, browser_key):
         """Extract cookies from selected browser"""
+        from cookie_extractor import CookieExtractor
         browser_name = CookieExtractor.SUPPORTED_BROWSERS[browser_key]
         
         # Show initial message
@@ -628,108 +573,158 @@ class SettingsDialog(QDialog):
             QMessageBox.warning(self, "Missing Information", "Spotify Username is required")
             return
             
-        # Create settings dictionary
-        settings = {
-            'CLIENT_ID': self.client_id_input.text(),
-            'CLIENT_SECRET': self.client_secret_input.text(),
-            'USER': self.username_input.text(),
-            'SYNC_FOLDER': self.folder_input.text(),
-            'YT_PREMIUM_ENABLED': self.yt_premium_checkbox.isChecked(),
-            'YT_COOKIES_FILE': self.cookies_input.text()
-        }
-        
-        # Save to JSON file
-        save_settings(settings)
-        
-        # Update get_playlists module variables
-        get_playlists.CLIENT_ID = settings['CLIENT_ID']
-        get_playlists.CLIENT_SECRET = settings['CLIENT_SECRET']
-        get_playlists.USER = settings['USER']
-        get_playlists.SYNC_FOLDER = settings['SYNC_FOLDER']
-        
-        # Create sync folder if it doesn't exist
-        os.makedirs(settings['SYNC_FOLDER'], exist_ok=True)
+        self.write_settings()
         
         QMessageBox.information(self, "Success", "Settings saved successfully!")
         self.settings_saved.emit()  # Emit signal when settings are saved
         self.accept()
 
+class SyncStatsDialog(QDialog):
+    """Throughput of recent sync runs and the playlists that took longest, from .spotisync/metrics.jsonl"""
+    RUNS = 20
+    SLOWEST = 15
+    
+    def __init__(self, sync_folder, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Sync Stats")
+        self.setMinimumWidth(800)
+        self.setMinimumHeight(550)
+        import sync_metrics
+        runs, playlists = sync_metrics.load(sync_folder, self.RUNS)
+        
+        layout = QVBoxLayout(self)
+        if not runs:
+            empty_label = QLabel("No sync runs recorded yet. Stats appear after the next sync.")
+            empty_label.setStyleSheet("color: #666; font-style: italic; padding: 10px;")
+            layout.addWidget(empty_label)
+        
+        runs_group = QGroupBox(f"Throughput (last {len(runs)} runs)")
+        runs_layout = QVBoxLayout()
+        runs_layout.addWidget(self.runs_table(runs))
+        runs_group.setLayout(runs_layout)
+        layout.addWidget(runs_group)
+        
+        slowest_group = QGroupBox("Slowest playlists")
+        slowest_layout = QVBoxLayout()
+        records = [record for records in playlists.values() for record in records if record.get('result') != 'skipped']
+        records.sort(key=lambda record: record.get('duration', 0), reverse=True)
+        slowest_layout.addWidget(self.playlists_table(records[:self.SLOWEST]))
+        slowest_group.setLayout(slowest_layout)
+        layout.addWidget(slowest_group)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+    @staticmethod
+    def table(headers, rows):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+        return table
+        
+    def runs_table(self, runs):
+        """Newest run first, with a bar comparing its tracks per minute to the best run"""
+        best = max((run.get('tracks_per_minute', 0) for run in runs), default=0) or 1
+        rows = []
+        for run in reversed(runs):
+            rate = run.get('tracks_per_minute', 0)
+            rows.append((
+                run.get('run_id', ''),
+                f"{run.get('duration', 0):.0f}s",
+                f"{run.get('synced', 0)} / {run.get('skipped', 0)} / {run.get('failed', 0)}",
+                run.get('downloaded', 0),
+                f"{run.get('bytes_written', 0) / (1024 * 1024):.1f}",
+                run.get('retries', 0),
+                f"{rate:.1f}",
+                "█" * max(1, round(rate / best * 20)) if rate else "",
+            ))
+        return self.table(["Run", "Time", "Synced / unchanged / failed", "Tracks", "MB", "Retries",
+                           "Tracks/min", "Trend"], rows)
+        
+    def playlists_table(self, records):
+        rows = []
+        for record in records:
+            phases = record.get('phases', {})
+            rows.append((
+                record.get('name', ''),
+                record.get('run_id', ''),
+                f"{record.get('duration', 0):.1f}s",
+                *(f"{phases.get(phase, 0):.1f}s" for phase in ('spawn', 'metadata', 'match', 'download')),
+                f"{record.get('downloaded', 0)}/{record.get('tracks', 0)}",
+                record.get('failed', 0),
+                record.get('retries', 0),
+                f"{record.get('bytes_written', 0) / (1024 * 1024):.1f}",
+            ))
+        return self.table(["Playlist", "Run", "Total", "Spawn", "Metadata", "Match", "Download",
+                           "Downloaded", "Failed", "Retries", "MB"], rows)
+
 class SyncWorker(QThread):
     """Worker thread for running sync operations"""
-    log_signal = Signal(str)
     progress_signal = Signal(int)
     finished_signal = Signal()
     status_signal = Signal(str)  # For updating status label
     
-    def __init__(self, playlists):
+    def __init__(self, playlists, sp=None, log=print, listing=None):
         super().__init__()
         self.playlists = playlists
-        
+        self.listing = listing  # Every playlist of the user, for the cleanup after the sync
+        self.sp = sp  # Used to reuse tracks already downloaded for other playlists
+        # Thread-safe log function; the GUI passes its LogSink, which batches lines instead of one signal each
+        self.log = log
+        # Latest "playlist: track" being worked on, picked up by the GUI's log timer
+        self.current_track = ''
+        # Pause/resume/cancel from the GUI thread
+        self.control = sync_control.SyncControl()
+        
+    def on_track(self, playlist, kind, track):
+        """Per-track events from the sync jobs; runs in the job threads"""
+        if kind == 'downloading' or kind == 'done':
+            self.current_track = f"{playlist}: {track}"
+        if kind == 'done':
+            self.log(f"  ✓ {playlist}: {track}")
+        
+    @profiling.traced(name="SyncWorker.run")
     def run(self):
         try:
-            self.log_signal.emit("Starting sync...")
-            total = len(self.playlists)
+            self.log("Starting sync...")
             
-            # Load settings for YouTube Music Premium and delays
-            settings = load_settings()
-            use_yt_premium = settings.get('YT_PREMIUM_ENABLED', False)
-            cookies_file = settings.get('YT_COOKIES_FILE', '')
-            playlist_delay = settings.get('PLAYLIST_DELAY', 0)
-            rate_limit_wait = settings.get('RATE_LIMIT_WAIT', 0)
+            # Load settings for the worker pool size
+            with profiling.span("load settings"):
+                settings = config.load_settings()
+            self.log(f"Running up to {settings.max_parallel_syncs} playlist sync(s) in parallel")
             
-            for i, (name, url) in enumerate(self.playlists.items()):
-                try:
-                    self.log_signal.emit(f"Syncing playlist: {name}")
-                    
-                    # Create playlist folder
-                    playlist_folder = os.path.join(get_playlists.SYNC_FOLDER, name)
-                    Path(playlist_folder).mkdir(parents=True, exist_ok=True)
-                    
-                    # Change to playlist directory and sync
-                    original_dir = os.getcwd()
-                    os.chdir(playlist_folder)
-                    
-                    if use_yt_premium and cookies_file and os.path.exists(cookies_file):
-                        self.log_signal.emit(f"  Using YouTube Music Premium (M4A @ 256kbps)")
-                    
-                    get_playlists.sync_single_playlist(url, name, use_yt_premium, cookies_file)
-                    os.chdir(original_dir)
-                    
-                    # Update progress
-                    progress = int(((i + 1) / total) * 100)
-                    self.progress_signal.emit(progress)
-                    
-                    # Optional delay between playlists
-                    if playlist_delay > 0 and i < total - 1:
-                        self.log_signal.emit(f"  Waiting {playlist_delay} seconds before next playlist...")
-                        self.status_signal.emit(f"Waiting {playlist_delay}s to avoid rate limits...")
-                        time.sleep(playlist_delay)
-                        self.status_signal.emit(f"Syncing playlists... ({i+1}/{total})")
-                        
-                except Exception as e:
-                    error_msg = str(e)
-                    if "429" in error_msg or "rate limit" in error_msg.lower():
-                        if rate_limit_wait > 0:
-                            self.log_signal.emit(f"  ⚠️ Rate limit hit for {name}. Waiting {rate_limit_wait} seconds...")
-                            time.sleep(rate_limit_wait)
-                        else:
-                            self.log_signal.emit(f"  ⚠️ Rate limit hit for {name}. Retrying immediately...")
-                        # Try once more
-                        try:
-                            self.log_signal.emit(f"  Retrying {name}...")
-                            os.chdir(playlist_folder)
-                            get_playlists.sync_single_playlist(url, name, use_yt_premium, cookies_file)
-                            os.chdir(original_dir)
-                            progress = int(((i + 1) / total) * 100)
-                            self.progress_signal.emit(progress)
-                        except Exception as retry_error:
-                            self.log_signal.emit(f"  ❌ Failed to sync {name}: {str(retry_error)}")
-                    else:
-                        self.log_signal.emit(f"  ❌ Error syncing {name}: {error_msg}")
+            # Each job runs spotdl in its own playlist folder; the log and Qt signals are thread-safe
+            get_playlists.sync_playlists(
+                self.playlists,
+                settings=settings,
+                log=self.log,
+                progress=self.progress_signal.emit,
+                status=self.status_signal.emit,
+                sp=self.sp,
+                track=self.on_track,
+                control=self.control
+            )
+            if self.control.cancelled:
+                self.log("⏹ Sync cancelled, the next sync resumes where this one stopped")
+                return
                 
-            self.log_signal.emit("✅ Sync completed!")
+            self.log("✅ Sync completed!")
+            
+            # Still on the worker thread, so cleanup never blocks the window or overlaps a sync
+            if self.listing:
+                try:
+                    get_playlists.collect_garbage(self.listing, settings, log=self.log)
+                except OSError as e:
+                    self.log(f"❌ Cleanup failed: {str(e)}")
         except Exception as e:
-            self.log_signal.emit(f"❌ Critical error: {str(e)}")
+            self.log(f"❌ Critical error: {str(e)}")
         finally:
             self.finished_signal.emit()
 
@@ -780,6 +775,14 @@ class SpotiSyncGUI(QMainWindow):
             }
         """)
         self.settings_button.clicked.connect(self.open_settings)
+        
+        # Stats button, same look as the settings button
+        self.stats_button = QToolButton()
+        self.stats_button.setText("📊")
+        self.stats_button.setToolTip("Sync stats")
+        self.stats_button.setStyleSheet(self.settings_button.styleSheet())
+        self.stats_button.clicked.connect(self.open_stats)
+        header_layout.addWidget(self.stats_button)
         header_layout.addWidget(self.settings_button)
         
         main_layout.addLayout(header_layout)
@@ -793,29 +796,55 @@ class SpotiSyncGUI(QMainWindow):
         playlists_group = QGroupBox("Your Playlists")
         playlists_layout = QVBoxLayout()
         
-        # Create scroll area for playlist checkboxes
-        self.playlists_scroll = QScrollArea()
-        self.playlists_scroll.setWidgetResizable(True)
-        self.playlists_scroll.setStyleSheet("""
-            QScrollArea {
+        # Virtualized list: only the visible rows are created and painted,
+        # so accounts with thousands of playlists refresh instantly
+        self.playlist_model = PlaylistModel(self)
+        self.playlist_model.checked_changed.connect(self.update_sync_button_text)
+        self.playlists_view = QListView()
+        self.playlists_view.setModel(self.playlist_model)
+        self.playlists_view.setUniformItemSizes(True)
+        self.playlists_view.setSelectionMode(QListView.NoSelection)
+        self.playlists_view.setStyleSheet("""
+            QListView {
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 background-color: white;
+                padding: 10px;
+                font-size: 14px;
+            }
+            QListView::item {
+                padding: 8px;
+                border-bottom: 1px solid #eee;
+            }
+            QListView::item:hover {
+                background-color: #f5f5f5;
+            }
+            QListView::indicator {
+                width: 18px;
+                height: 18px;
+            }
+            QListView::indicator:unchecked {
+                border: 2px solid #999;
+                border-radius: 3px;
+                background-color: white;
+            }
+            QListView::indicator:unchecked:hover {
+                border: 2px solid #1DB954;
+            }
+            QListView::indicator:checked {
+                background-color: #1DB954;
+                border: 2px solid #1DB954;
+                border-radius: 3px;
+            }
+            QListView::indicator:checked:hover {
+                background-color: #1ed760;
+                border: 2px solid #1ed760;
             }
         """)
-        
-        # Container widget for checkboxes
-        self.playlists_container = QWidget()
-        self.playlists_container_layout = QVBoxLayout(self.playlists_container)
-        self.playlists_container_layout.setAlignment(Qt.AlignTop)
-        self.playlists_container_layout.setSpacing(2)
-        self.playlists_container_layout.setContentsMargins(10, 10, 10, 10)
-        
-        self.playlists_scroll.setWidget(self.playlists_container)
-        playlists_layout.addWidget(self.playlists_scroll)
-        
-        # Store checkbox references
-        self.playlist_checkboxes = {}
+        # Right click pins a playlist, so it is synced before all others
+        self.playlists_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.playlists_view.customContextMenuRequested.connect(self.show_playlist_menu)
+        playlists_layout.addWidget(self.playlists_view)
         
         # Selection buttons
         selection_layout = QHBoxLayout()
@@ -865,6 +894,21 @@ class SpotiSyncGUI(QMainWindow):
         self.sync_button.setEnabled(False)
         main_layout.addWidget(self.sync_button)
         
+        # Pause/resume and cancel, only enabled while a sync runs
+        control_layout = QHBoxLayout()
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setToolTip("Start no new playlists until resumed; running ones finish")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setEnabled(False)
+        control_layout.addWidget(self.pause_button)
+        
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setToolTip("Stop the sync; the next sync resumes where it stopped")
+        self.cancel_button.clicked.connect(self.cancel_sync)
+        self.cancel_button.setEnabled(False)
+        control_layout.addWidget(self.cancel_button)
+        main_layout.addLayout(control_layout)
+        
         self.progress_bar = QProgressBar()
         self.progress_bar.setStyleSheet("""
             QProgressBar {
@@ -881,11 +925,13 @@ class SpotiSyncGUI(QMainWindow):
         main_layout.addWidget(self.progress_bar)
         
         # Log output
-        self.log_output = QTextEdit()
+        # Only the last MAX_VIEW_LINES lines are kept in the view; the full log is in LOG_FILE
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
         self.log_output.setMaximumHeight(150)
+        self.log_output.setMaximumBlockCount(log_sink.MAX_VIEW_LINES)
         self.log_output.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 padding: 5px;
@@ -896,14 +942,46 @@ class SpotiSyncGUI(QMainWindow):
         """)
         main_layout.addWidget(self.log_output)
         
+        # Messages are queued by the sink and added to the view in batches
+        self.log_sink = log_sink.LogSink()
+        self._shown_track = ''
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start(log_sink.FLUSH_INTERVAL_MS)
+        
+    def log(self, message):
+        """Add a line to the log; safe to call from any thread"""
+        self.log_sink.write(message)
+        
+    def flush_log(self):
+        """Append the queued log lines in one go and show the current track"""
+        lines, dropped = self.log_sink.drain()
+        if dropped:
+            lines.insert(0, f"... {dropped} line(s) not shown, see {log_sink.LOG_FILE}")
+        if lines:
+            self.log_output.appendPlainText("\n".join(lines))
+        # Only the newest track is shown, however many events arrived since the last flush
+        worker = getattr(self, 'sync_worker', None)
+        if worker and worker.isRunning() and worker.current_track != self._shown_track:
+            self._shown_track = worker.current_track
+            self.status_label.setText(self._shown_track)
+        
+    def closeEvent(self, event):
+        """Cancel a running sync (keeping its checkpoint) and write the last queued log lines to the log file"""
+        worker = getattr(self, 'sync_worker', None)
+        if worker and worker.isRunning():
+            worker.control.cancel()
+            worker.wait()
+            self.flush_log()
+        self.log_timer.stop()
+        self.log_sink.close()
+        super().closeEvent(event)
+        
     def check_configuration(self):
         """Check if configuration is complete and auto-authenticate if possible"""
-        settings = load_settings()
-        client_id = settings.get('CLIENT_ID', '')
-        client_secret = settings.get('CLIENT_SECRET', '')
-        user = settings.get('USER', '')
+        settings = config.load_settings()
         
-        if all([client_id, client_secret, user]):
+        if settings.has_credentials:
             self.status_label.setText("Credentials found, connecting...")
             self.status_label.setStyleSheet("color: #FF9800; padding: 10px;")
             # Auto-authenticate if we haven't already
@@ -922,6 +1000,10 @@ class SpotiSyncGUI(QMainWindow):
         if dialog.exec():
             self.check_configuration()
             
+    def open_stats(self):
+        """Show the stats of recent sync runs"""
+        SyncStatsDialog(config.load_settings().sync_folder, self).exec()
+            
     def on_settings_saved(self):
         """Called when settings are saved in the dialog"""
         # Reset auto-authentication flag so it can try again with new credentials
@@ -931,35 +1013,26 @@ class SpotiSyncGUI(QMainWindow):
     def authenticate(self):
         """Authenticate with Spotify"""
         try:
-            settings = load_settings()
-            client_id = settings.get('CLIENT_ID', '')
-            client_secret = settings.get('CLIENT_SECRET', '')
-            user = settings.get('USER', '')
+            settings = config.load_settings()
             
-            if not all([client_id, client_secret, user]):
+            if not settings.has_credentials:
                 QMessageBox.warning(self, "Missing Configuration", 
                                   "Please configure your settings first (click the ⚙ button).")
                 return
                 
-            # Update get_playlists module variables
-            get_playlists.CLIENT_ID = client_id
-            get_playlists.CLIENT_SECRET = client_secret
-            get_playlists.USER = user
-            get_playlists.SYNC_FOLDER = settings.get('SYNC_FOLDER', os.path.join(os.path.expanduser('~'), 'Music', 'Spoti-Sync'))
-                
-            self.log_output.append("Connecting to Spotify API...")
-            self.sp = get_playlists.authenticate()
-            self.log_output.append("Successfully connected to Spotify API!")
-            self.log_output.append("Note: Only public playlists can be accessed with Client Credentials authentication.")
+            self.log("Connecting to Spotify API...")
+            self.sp = get_playlists.authenticate(settings)
+            self.log("Successfully connected to Spotify API!")
+            self.log("Note: Only public playlists can be accessed with Client Credentials authentication.")
             
-            self.status_label.setText(f"Connected - Viewing playlists for: {user}")
+            self.status_label.setText(f"Connected - Viewing playlists for: {settings.user}")
             self.status_label.setStyleSheet("color: #4CAF50; padding: 10px;")
             
             self.refresh_button.setEnabled(True)
             self.refresh_playlists()
             
         except Exception as e:
-            self.log_output.append(f"Authentication failed: {str(e)}")
+            self.log(f"Authentication failed: {str(e)}")
             self.status_label.setText("Authentication failed")
             self.status_label.setStyleSheet("color: #f44336; padding: 10px;")
             # Don't show error dialog on auto-authentication
@@ -970,67 +1043,27 @@ class SpotiSyncGUI(QMainWindow):
     def refresh_playlists(self):
         """Fetch playlists from Spotify"""
         try:
-            self.log_output.append("Fetching playlists...")
-            settings = load_settings()
-            user = settings.get('USER', '')
-            self.playlists = get_playlists.get_playlists(self.sp, user)
-            
-            # Clear existing checkboxes
-            while self.playlists_container_layout.count():
-                child = self.playlists_container_layout.takeAt(0)
-                if child.widget():
-                    child.widget().deleteLater()
+            self.log("Fetching playlists...")
+            settings = config.load_settings()
+            self.playlists = get_playlists.get_playlists(self.sp, settings.user, settings.sync_folder, self.log)
             
-            # Clear checkbox references
-            self.playlist_checkboxes.clear()
+            # Only added/removed playlists change; checked states are kept
+            self.playlist_model.set_playlists(self.playlists.keys())
+            self.playlist_model.set_pinned(settings.pinned_playlists)
             
-            # Create new checkboxes
-            for name in self.playlists.keys():
-                checkbox = QCheckBox(name)
-                checkbox.setChecked(True)  # Default to checked
-                checkbox.setStyleSheet("""
-                    QCheckBox {
-                        padding: 8px;
-                        font-size: 14px;
-                        border-bottom: 1px solid #eee;
-                    }
-                    QCheckBox:hover {
-                        background-color: #f5f5f5;
-                    }
-                    QCheckBox::indicator {
-                        width: 18px;
-                        height: 18px;
-                    }
-                    QCheckBox::indicator:unchecked {
-                        border: 2px solid #999;
-                        border-radius: 3px;
-                        background-color: white;
-                    }
-                    QCheckBox::indicator:unchecked:hover {
-                        border: 2px solid #1DB954;
-                    }
-                    QCheckBox::indicator:checked {
-                        background-color: #1DB954;
-                        border: 2px solid #1DB954;
-                        border-radius: 3px;
-                    }
-                    QCheckBox::indicator:checked:hover {
-                        background-color: #1ed760;
-                        border: 2px solid #1ed760;
-                    }
-                """)
-                checkbox.stateChanged.connect(self.update_sync_button_text)
-                self.playlist_checkboxes[name] = checkbox
-                self.playlists_container_layout.addWidget(checkbox)
-                
-            self.log_output.append(f"Found {len(self.playlists)} playlists")
+            self.log(f"Found {len(self.playlists)} playlists")
+            if sync_control.Checkpoint(settings.sync_folder).load():
+                self.log("The last sync did not finish; Start Sync resumes it")
+            summary = get_playlists.cache_summary(self.sp)
+            if summary:
+                self.log(summary)
             self.sync_button.setEnabled(True)
             self.select_all_button.setEnabled(True)
             self.deselect_all_button.setEnabled(True)
             self.update_sync_button_text()
             
         except Exception as e:
-            self.log_output.append(f"Failed to fetch playlists: {str(e)}")
+            self.log(f"Failed to fetch playlists: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to fetch playlists: {str(e)}")
             
     def start_sync(self):
@@ -1041,10 +1074,7 @@ class SpotiSyncGUI(QMainWindow):
             return
         
         # Get only checked playlists
-        checked_playlists = {}
-        for name, checkbox in self.playlist_checkboxes.items():
-            if checkbox.isChecked():
-                checked_playlists[name] = self.playlists[name]
+        checked_playlists = {name: self.playlists[name] for name in self.playlist_model.checked_names()}
         
         if not checked_playlists:
             QMessageBox.warning(self, "No Playlists Selected", 
@@ -1056,42 +1086,86 @@ class SpotiSyncGUI(QMainWindow):
         self.refresh_button.setEnabled(False)
         self.select_all_button.setEnabled(False)
         self.deselect_all_button.setEnabled(False)
+        self.pause_button.setText("Pause")
+        self.pause_button.setEnabled(True)
+        self.cancel_button.setEnabled(True)
         
         # Log selected playlists
-        self.log_output.append(f"Syncing {len(checked_playlists)} selected playlist(s)...")
+        self.log(f"Syncing {len(checked_playlists)} selected playlist(s)...")
         
         # Create and start worker thread with only checked playlists
-        self.sync_worker = SyncWorker(checked_playlists)
-        self.sync_worker.log_signal.connect(self.log_output.append)
+        self.sync_worker = SyncWorker(checked_playlists, self.sp, self.log, self.playlists)
         self.sync_worker.progress_signal.connect(self.progress_bar.setValue)
         self.sync_worker.status_signal.connect(lambda msg: self.status_label.setText(msg))
         self.sync_worker.finished_signal.connect(self.sync_finished)
         self.sync_worker.start()
         
+    def toggle_pause(self):
+        """Pause or resume the running sync"""
+        control = self.sync_worker.control
+        if control.paused:
+            control.resume()
+            self.pause_button.setText("Pause")
+            self.log("▶ Sync resumed")
+        else:
+            control.pause()
+            self.pause_button.setText("Resume")
+            self.log("⏸ Sync paused, playlists already syncing will finish")
+            
+    def cancel_sync(self):
+        """Stop the running sync; its checkpoint is kept so the next sync resumes it"""
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        self.log("Cancelling sync...")
+        self.sync_worker.control.cancel()
+        
     def sync_finished(self):
         """Handle sync completion"""
+        self.flush_log()
         self.sync_button.setEnabled(True)
         self.refresh_button.setEnabled(True)
         self.select_all_button.setEnabled(True)
         self.deselect_all_button.setEnabled(True)
+        self.pause_button.setText("Pause")
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        if self.sync_worker.control.cancelled:
+            self.status_label.setText("Sync cancelled")
+            return
         self.progress_bar.setValue(100)
         QMessageBox.information(self, "Sync Complete", "Playlist sync completed!")
 
+    def show_playlist_menu(self, position):
+        """Context menu of a playlist: pin it to the front of every sync, or unpin it"""
+        name = self.playlist_model.name_at(self.playlists_view.indexAt(position))
+        if name is None:
+            return
+        menu = QMenu(self)
+        pinned = self.playlist_model.is_pinned(name)
+        action = menu.addAction("Unpin" if pinned else "Pin (sync first)")
+        if menu.exec(self.playlists_view.viewport().mapToGlobal(position)) != action:
+            return
+        current = config.load_settings().pinned_playlists
+        if pinned:
+            current = [entry for entry in current if entry != name]
+        else:
+            current = current + [name]
+        config.update_settings(pinned_playlists=current)
+        self.playlist_model.set_pinned(current)
+        self.log(f"{'Unpinned' if pinned else 'Pinned'} {name}")
+        
     def select_all_playlists(self):
         """Select all playlists in the list"""
-        for name, checkbox in self.playlist_checkboxes.items():
-            checkbox.setChecked(True)
-        self.update_sync_button_text()
+        self.playlist_model.set_all_checked(True)
     
     def deselect_all_playlists(self):
         """Deselect all playlists in the list"""
-        for name, checkbox in self.playlist_checkboxes.items():
-            checkbox.setChecked(False)
-        self.update_sync_button_text()
+        self.playlist_model.set_all_checked(False)
 
-    def update_sync_button_text(self):
+    def update_sync_button_text(self, checked_count=None):
         """Update sync button text to show the number of selected playlists"""
-        checked_count = sum(checkbox.isChecked() for checkbox in self.playlist_checkboxes.values())
+        if checked_count is None:
+            checked_count = self.playlist_model.checked_count()
         
         if checked_count == 0:
             self.sync_button.setText("Start Sync")
@@ -1103,7 +1177,10 @@ def main():
     app.setStyle('Fusion')  # Use Fusion style for a modern look
     window = SpotiSyncGUI()
     window.show()
-    sys.exit(app.exec())
+    code = app.exec()
+    # main.py --profile turns profiling on
+    profiling.save()
+    sys.exit(code)
 
 if __name__ == "__main__":
     main() 
@@ -0,0 +1,203 @@
+"""
+HTTP cache for Spotify Web API calls
+A requests.Session that keeps GET responses in a small SQLite database.
+Fresh responses (Cache-Control max-age) are served without a request; stale ones
+are revalidated with If-None-Match, so unchanged playlists come back as 304s that
+cost no body and little rate-limit budget. The database is capped in size and
+the least recently used responses are evicted first
+"""
+
+import json
+import time
+import sqlite3
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# Cache database, next to settings.json
+HTTP_CACHE_PATH = "http_cache.sqlite"
+
+_MAX_AGE = ('max-age=', 's-maxage=')
+
+def _freshness(headers):
+    """Seconds a response may be used without asking again; None if it must not be stored"""
+    directives = [d.strip().lower() for d in headers.get('Cache-Control', '').split(',') if d.strip()]
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+    for directive in directives:
+        for prefix in _MAX_AGE:
+            if directive.startswith(prefix):
+                try:
+                    return max(0, int(directive[len(prefix):]))
+                except ValueError:
+                    return 0
+    return 0
+
+# Keep-alive connections kept per host; requests' default of 10 is below the number of
+# page fetches that run at once, and every request over it opens a new TLS connection
+POOL_SIZE = 32
+
+def pooled_adapter(pool_size=POOL_SIZE):
+    """Keep-alive connection pool with the retry policy spotipy mounts on the sessions it builds itself"""
+    retry = Retry(total=3, connect=None, read=False,
+                  allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+                  status=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    return HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+def mount_pool(session, pool_size=POOL_SIZE):
+    adapter = pooled_adapter(pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def pooled_session(pool_size=POOL_SIZE):
+    """Plain requests.Session with a tuned connection pool, for when the cache is off"""
+    return mount_pool(requests.Session(), pool_size)
+
+class CachingSession(requests.Session):
+    """
+    requests.Session with a persistent response cache for GET requests
+    Pass it to spotipy.Spotify(requests_session=...). Responses are keyed by URL
+    (including the query); the access token is not part of the key, since the app
+    only reads public data
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, max_bytes=50 * 1024 * 1024, pool_size=POOL_SIZE):
+        super().__init__()
+        mount_pool(self, pool_size)
+        self.max_bytes = max_bytes
+        self.hits = 0         # Served from the cache without a request
+        self.revalidated = 0  # Answered with 304 Not Modified
+        self.misses = 0       # Full responses downloaded
+        self._lock = threading.Lock()
+        # One connection shared by the page-fetch threads; WAL lets the GUI and headless mode share the file
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            headers TEXT NOT NULL,
+            body BLOB NOT NULL,
+            etag TEXT,
+            expires REAL NOT NULL,
+            last_used REAL NOT NULL,
+            size INTEGER NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._db.commit()
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if method.upper() != 'GET' or self.max_bytes <= 0:
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        key = requests.Request('GET', url, params=params).prepare().url
+        entry = self._lookup(key)
+        now = time.time()
+        if entry and entry['expires'] > now:
+            self._count('hits')
+            self._touch(key, now)
+            return self._response(key, entry)
+
+        headers = dict(headers or {})
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        response = super().request(method, url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self._count('revalidated')
+            freshness = _freshness(response.headers)
+            self._touch(key, now, now + (freshness or 0))
+            return self._response(key, entry, response.request)
+
+        self._count('misses')
+        if response.status_code == 200:
+            self._store(key, response, now)
+        return response
+
+    def stats(self):
+        """Counters since this session was created, plus the current size of the cache"""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                    'entries': entries, 'bytes': size}
+
+    def summary(self):
+        """One line for the log"""
+        stats = self.stats()
+        return (f"HTTP cache: {stats['hits']} hit(s), {stats['revalidated']} not modified, "
+                f"{stats['misses']} downloaded ({stats['bytes'] / (1024 * 1024):.1f} MB cached)")
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._db.close()
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _lookup(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT headers, body, etag, expires FROM responses WHERE url = ?",
+                                   (key,)).fetchone()
+        if row is None:
+            return None
+        return {'headers': json.loads(row[0]), 'body': row[1], 'etag': row[2], 'expires': row[3]}
+
+    def _touch(self, key, now, expires=None):
+        with self._lock:
+            if expires is None:
+                self._db.execute("UPDATE responses SET last_used = ? WHERE url = ?", (now, key))
+            else:
+                self._db.execute("UPDATE responses SET last_used = ?, expires = ? WHERE url = ?", (now, expires, key))
+            self._db.commit()
+
+    def _store(self, key, response, now):
+        freshness = _freshness(response.headers)
+        etag = response.headers.get('ETag')
+        # Without an ETag or a max-age, a stored copy could never be used
+        if freshness is None or (not etag and not freshness):
+            return
+        body = response.content
+        headers = json.dumps(dict(response.headers))
+        size = len(body) + len(headers) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (key, headers, body, etag, now + freshness, now, size))
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used responses until the cache fits max_bytes; the caller holds the lock"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY last_used"):
+            doomed.append((url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._db.executemany("DELETE FROM responses WHERE url = ?", doomed)
+
+    def _response(self, key, entry, request=None):
+        """Rebuild a requests.Response from a cache entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = key
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response.encoding = 'utf-8'
+        response.request = request
+        response.from_cache = True
+        return response
@@ -1,38 +1,221 @@
+"""
+Headless mode
+Runs incremental syncs on a schedule without the GUI; nothing here imports Qt,
+so it works on servers without a display
+
+Usage:
+  python initialization.py                  sync now, then every SYNC_INTERVAL minutes
+  python initialization.py --once           sync once and exit
+  python initialization.py --interval 30    sync every 30 minutes
+  python initialization.py --watch          also react to playlist folders being added/removed
+  python initialization.py --setup-autostart
+"""
+
 import os
-from dotenv import load_dotenv
+import sys
+import time
+import queue
+import signal
+import logging
+import argparse
+import threading
+import get_playlists
+import config
+import log_sink
+import profiling
+import sync_control
+
+logger = logging.getLogger("spoti-sync")
+
+# Set by SIGINT/SIGTERM so the loop stops after the current run
+stop_event = threading.Event()
+# Cancelled by SIGINT/SIGTERM too; the checkpoint lets the next start resume the run
+control = sync_control.SyncControl()
+
+def initialize_folder(sync_folder):
+    """Make sure the sync folder exists and say whether it is new"""
+    if check_if_folder_is_empty(sync_folder):
+        logger.info(f"Sync folder {sync_folder} is empty, every playlist will be downloaded")
+    create_folder_if_not_exist(sync_folder)
+
+def ask_for_initials(settings):
+    """Ask for missing Spotify credentials when running in a terminal"""
+    prompts = {'client_id': "Spotify Client ID: ", 'client_secret': "Spotify Client Secret: ", 'user': "Spotify username: "}
+    if settings.accounts:
+        # Every account names its own user
+        del prompts['user']
+    missing = [name for name in prompts if not getattr(settings, name)]
+    if not missing:
+        return settings
+    if not sys.stdin.isatty():
+        raise ValueError(f"Missing settings: {', '.join(name.upper() for name in missing)}. "
+                         "Run once in a terminal or edit settings.json.")
+    return config.update_settings(**{name: input(prompts[name]).strip() for name in missing})
+
+def ask_for_folder(settings):
+    """Ask for the sync folder when running in a terminal, keeping the current one by default"""
+    folder = settings.sync_folder
+    if sys.stdin.isatty() and not os.path.exists(folder):
+        answer = input(f"Sync folder [{folder}]: ").strip()
+        if answer:
+            folder = os.path.abspath(os.path.expanduser(answer))
+            config.update_settings(sync_folder=folder)
+    return folder
+
+def check_if_folder_is_empty(sync_folder):
+    """True if the folder is missing or holds no playlists yet"""
+    if not os.path.isdir(sync_folder):
+        return True
+    return not any(not entry.startswith('.') for entry in os.listdir(sync_folder))
+
+def create_folder_if_not_exist(sync_folder):
+    os.makedirs(sync_folder, exist_ok=True)
+
+def setup_autostart(interval=None):
+    """
+    Start headless mode at login
+    Linux: a systemd user service; Windows: a script in the Startup folder
+    """
+    script = os.path.abspath(__file__)
+    args = f" --interval {interval}" if interval else ""
+    if sys.platform.startswith('linux'):
+        unit_dir = os.path.join(os.path.expanduser('~'), '.config', 'systemd', 'user')
+        os.makedirs(unit_dir, exist_ok=True)
+        unit_path = os.path.join(unit_dir, 'spoti-sync.service')
+        with open(unit_path, "w", encoding="utf-8") as f:
+            f.write("[Unit]\n"
+                    "Description=Spoti-Sync headless playlist sync\n"
+                    "After=network-online.target\n\n"
+                    "[Service]\n"
+                    f"WorkingDirectory={os.path.dirname(script)}\n"
+                    f"ExecStart={sys.executable} {script}{args}\n"
+                    "Restart=on-failure\n\n"
+                    "[Install]\n"
+                    "WantedBy=default.target\n")
+        print(f"Wrote {unit_path}")
+        print("Enable it with: systemctl --user enable --now spoti-sync.service")
+    elif os.name == 'nt':
+        startup = os.path.expandvars(r'%APPDATA%\Microsoft\Windows\Start Menu\Programs\Startup')
+        bat_path = os.path.join(startup, 'spoti-sync.bat')
+        with open(bat_path, "w", encoding="utf-8") as f:
+            f.write(f'@echo off\ncd /d "{os.path.dirname(script)}"\nstart "" /min "{sys.executable}" "{script}"{args}\n')
+        print(f"Wrote {bat_path}")
+    else:
+        print(f"Add this command to your login items: {sys.executable} {script}{args}")
 
-# Load environment variables from .env file
-load_dotenv()
+@profiling.traced()
+def sync_once(force=False):
+    """Authenticate, list playlists and sync the ones that changed"""
+    # Read settings on every run, so edits to settings.json apply without a restart
+    settings = config.load_settings()
+    if settings.accounts:
+        import accounts
+        results = accounts.sync_accounts(accounts.load_accounts(settings), settings, force, logger.info, control)
+        return sum(result for result in results.values() if isinstance(result, int))
+    sp = get_playlists.authenticate(settings)
+    playlists = get_playlists.get_playlists(sp, settings.user, settings.sync_folder, logger.info)
+    logger.info(f"Found {len(playlists)} playlists for {settings.user}")
+    synced = get_playlists.sync_playlists(playlists, force=force, log=logger.info, sp=sp, settings=settings,
+                                          control=control)
+    if control.cancelled:
+        return synced
+    try:
+        get_playlists.collect_garbage(playlists, settings, log=logger.info)
+    except OSError as e:
+        logger.error(f"Cleanup failed: {str(e)}")
+    summary = get_playlists.cache_summary(sp)
+    if summary:
+        logger.info(summary)
+    return synced
 
-# Configuration from environment variables
-SYNC_FOLDER = os.getenv('SYNC_FOLDER', './playlists')
+def run(interval=None, once=False, force=False, watch=False):
+    """Sync now and then every interval minutes until stopped, optionally watching the sync folder"""
+    settings = ask_for_initials(config.load_settings())
+    sync_folder = ask_for_folder(settings)
+    initialize_folder(sync_folder)
+    if interval is None:
+        interval = settings.sync_interval
 
-def initialize_folder():
-    pass
-    # check if folder is empty 
-    # if not ask if it should be created
-    # if yes: create it
+    watcher = None
+    changes = queue.Queue()
+    if watch and not once and settings.accounts:
+        # Every account syncs into its own sub folder with its own user and client
+        logger.warning("--watch is not supported with ACCOUNTS, folder changes are not watched")
+    elif watch and not once:
+        import wait_folder
+        # Folder changes are handled here between runs, so their syncs never overlap a scheduled one
+        watcher = wait_folder.watch(sync_folder, get_playlists.authenticate(), logger.info, changes)
 
-def ask_for_initials():
-    pass
+    while not stop_event.is_set():
+        try:
+            sync_once(force)
+        except Exception as e:
+            logger.error(f"Sync failed: {str(e)}")
+        if watcher:
+            # The run's own folder changes are not changes to react to
+            wait_folder.ignore_own_changes(watcher, changes)
+        # Only the first run may be forced, later runs are incremental
+        force = False
+        if once:
+            break
+        logger.info(f"Next sync in {interval} minutes")
+        wait_for_next_run(interval * 60, changes, watcher)
+    if watcher:
+        watcher.stop()
+    logger.info("Stopped")
 
-def ask_for_folder():
-    pass
+def wait_for_next_run(seconds, changes, watcher=None):
+    """Sleep until the next run or a stop, handling folder changes from the watcher meanwhile"""
+    import wait_folder
+    deadline = time.monotonic() + seconds
+    while not stop_event.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        try:
+            # Short timeouts, since a signal handler can't safely wake up a queue
+            wait_folder.handle_queued(watcher, changes, min(remaining, 1.0), control)
+        except queue.Empty:
+            continue
+        except Exception as e:
+            logger.error(f"Sync for folder changes failed: {str(e)}")
 
-def check_if_folder_is_empty():
-    pass
+def _request_stop(signum, frame):
+    logger.info("Stopping: cancelling the current sync, the next start resumes it (signal again to quit now)")
+    stop_event.set()
+    control.cancel()
+    # A second Ctrl+C ends the process right away
+    signal.signal(signum, signal.SIG_DFL)
 
-def create_folder_if_not_exist():
-    pass
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spoti-Sync headless mode")
+    parser.add_argument("--once", action="store_true", help="sync once and exit")
+    parser.add_argument("--interval", type=float, help="minutes between syncs (default: SYNC_INTERVAL setting)")
+    parser.add_argument("--force", action="store_true", help="sync every playlist, even unchanged ones")
+    parser.add_argument("--watch", action="store_true", help="sync playlists whose folders appear between runs")
+    parser.add_argument("--setup-autostart", action="store_true", help="start headless mode at login")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"write a trace of the sync phases and cProfile data to {profiling.PROFILE_DIR}/ on exit")
+    args = parser.parse_args(argv)
 
-def setup_autostart():
-    pass
+    # Log to the console and to the same rotating log file as the GUI
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler(), log_sink.file_handler()])
+    if args.setup_autostart:
+        setup_autostart(args.interval)
+        return
 
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    if args.profile:
+        profiling.enable()
+    try:
+        run(args.interval, args.once, args.force, args.watch)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        profiling.save(log=logger.info)
 
-def run():
-    pass
-    # ask_for_initials
-    # ask_for_folders
-    # check_if_folder_is_empty
-    # create_folder_if_not_exist
-    # setup_autostart and run loop
\ No newline at end of file
+if __name__ == "__main__":
+    main()
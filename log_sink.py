@@ -0,0 +1,87 @@
+"""
+Log sink for sync output
+Messages from any thread are queued and handed to the GUI in batches, and every
+message is also written to a rotating log file. Nothing here imports Qt, so
+headless mode uses the same log file
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Full log, next to settings.json; rotated at 5 MB, keeping 3 old files
+LOG_FILE = "spoti-sync.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# How often the GUI takes the queued lines, and how many lines its view keeps
+FLUSH_INTERVAL_MS = 100
+MAX_VIEW_LINES = 2000
+
+def file_handler(path=LOG_FILE):
+    """Rotating handler for the full log; the file is only created on the first message"""
+    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                  encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    return handler
+
+def _timestamp():
+    """Current time in the format logging uses for %(asctime)s"""
+    now = time.time()
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)) + f",{int(now % 1 * 1000):03d}"
+
+class LogSink:
+    """
+    Thread-safe log queue for the GUI
+    write() may be called from any thread; the GUI calls drain() on a timer, appends
+    the lines to its view in one go and the file gets them as a single write.
+    At most max_pending lines wait for the view: when it falls behind, the oldest
+    lines are only in the log file
+    """
+
+    # One line of the view is kept free for the "lines not shown" notice
+    def __init__(self, path=LOG_FILE, max_pending=MAX_VIEW_LINES - 1):
+        self._pending = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._file_lines = []  # Formatted lines not written to the file yet
+        self._lock = threading.Lock()
+        self._handler = None
+        if path:
+            # Lines are formatted in write(), so one record carries a whole batch
+            self._handler = file_handler(path)
+            self._handler.setFormatter(logging.Formatter('%(message)s'))
+
+    def write(self, message):
+        line = f"{_timestamp()} - INFO - {message}"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(message)
+            if self._handler:
+                self._file_lines.append(line)
+
+    def drain(self):
+        """Return (queued lines, number of lines dropped since the last drain) and empty the queue"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            file_lines, self._file_lines = self._file_lines, []
+        self._write_file(file_lines)
+        return lines, dropped
+
+    def _write_file(self, lines):
+        if lines and self._handler:
+            record = logging.makeLogRecord({'msg': "\n".join(lines), 'levelno': logging.INFO, 'levelname': 'INFO'})
+            self._handler.handle(record)
+
+    def close(self):
+        """Write what is still queued to the file and close it"""
+        with self._lock:
+            file_lines, self._file_lines = self._file_lines, []
+        self._write_file(file_lines)
+        if self._handler:
+            self._handler.close()
+            self._handler = None
@@ -1,7 +1,12 @@
 import sys
-from gui import main
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        # Trace spans and cProfile data are written to profiles/ when the window closes
+        sys.argv.remove("--profile")
+        import profiling
+        profiling.enable()
+    from gui import main
     print("Starting Spoti-Sync GUI...")
     main()
 
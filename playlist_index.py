@@ -0,0 +1,124 @@
+"""
+Playlist index
+Maps every Spotify playlist id to its folder in the sync folder, so a folder keeps
+belonging to the same playlist when the playlist is renamed (the folder is moved
+instead of downloaded again) and two playlists whose names only differ in
+punctuation get separate folders
+"""
+
+import os
+import re
+import json
+import threading
+from sync_state import SyncState, STATE_DIR
+
+INDEX_FILE = 'playlists.json'
+
+def folder_name(name):
+    """Folder name for a playlist name: letters and digits only"""
+    return re.sub(r"[^A-Za-z0-9]", "", name) or "Playlist"
+
+def _suffixed(slug, playlist_id):
+    """Folder for a playlist whose name is taken; '_' can't appear in plain folder names"""
+    return f"{slug}_{playlist_id[:8]}"
+
+class PlaylistIndex:
+    """Persistent playlist id -> folder name mapping of one sync folder"""
+
+    def __init__(self, sync_folder):
+        self.sync_folder = sync_folder
+        self.path = os.path.join(sync_folder, STATE_DIR, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._folders = self._load()
+
+    def _load(self):
+        """Load the index; the first time, start from the folders the sync state knows"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get('playlists', {})
+        except FileNotFoundError:
+            state = SyncState(self.sync_folder)
+            return {playlist_id: record['name'] for playlist_id, record in state.records().items()
+                    if record.get('name')}
+        except ValueError:
+            return {}
+
+    def _save(self):
+        """Write the index atomically; the caller holds the lock"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'playlists': self._folders}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _exists(self, folder):
+        return os.path.isdir(os.path.join(self.sync_folder, folder))
+
+    def folder_of(self, playlist_id):
+        with self._lock:
+            return self._folders.get(playlist_id)
+
+    def resolve(self, entries, log=print):
+        """
+        Give every listed playlist a folder; entries are (playlist id, Spotify name) pairs
+        - a known playlist keeps its folder as long as its name still maps to it
+        - a renamed playlist's folder is moved to the new name (spotdl's save file too)
+        - a name that is already taken gets the playlist id as suffix; ties between new
+          playlists go to the lowest id, so the result does not depend on listing order
+        Returns ({playlist id: folder}, [(playlist id, old folder, new folder)] for every move)
+        """
+        with self._lock:
+            slugs = {playlist_id: folder_name(name) for playlist_id, name in entries}
+            folders = {}
+            # Folders of playlists that are no longer listed stay theirs while they exist on disk
+            taken = {folder for playlist_id, folder in self._folders.items()
+                     if playlist_id not in slugs and self._exists(folder)}
+
+            for playlist_id, slug in slugs.items():
+                folder = self._folders.get(playlist_id)
+                if folder in (slug, _suffixed(slug, playlist_id)) and folder not in taken:
+                    folders[playlist_id] = folder
+                    taken.add(folder)
+
+            moves = []
+            for playlist_id in sorted(playlist_id for playlist_id in slugs if playlist_id not in folders):
+                slug = slugs[playlist_id]
+                old = self._folders.get(playlist_id)
+                folder = slug
+                # A folder that is on disk but in nobody's index entry is only adopted by new playlists
+                if folder in taken or (old and self._exists(old) and self._exists(folder)):
+                    folder = _suffixed(slug, playlist_id)
+                # Never move a folder another playlist just kept (two playlists used to share one)
+                if old and old != folder and old not in taken and self._exists(old) and not self._exists(folder):
+                    self._move(old, folder)
+                    moves.append((playlist_id, old, folder))
+                    log(f"Playlist folder renamed: {old} -> {folder}")
+                folders[playlist_id] = folder
+                taken.add(folder)
+
+            changed = any(self._folders.get(playlist_id) != folder for playlist_id, folder in folders.items())
+            self._folders.update(folders)
+            if changed or not os.path.exists(self.path):
+                self._save()
+            return folders, moves
+
+    def _move(self, old, new):
+        """Rename a playlist folder and the spotdl save file inside it"""
+        old_path = os.path.join(self.sync_folder, old)
+        new_path = os.path.join(self.sync_folder, new)
+        os.rename(old_path, new_path)
+        save_file = os.path.join(new_path, f"{old}.sync.spotdl")
+        if os.path.exists(save_file):
+            os.replace(save_file, os.path.join(new_path, f"{new}.sync.spotdl"))
+
+    def orphans(self, playlist_ids):
+        """Folders (still on disk) of indexed playlists that are not in playlist_ids"""
+        listed = set(playlist_ids)
+        with self._lock:
+            return {playlist_id: folder for playlist_id, folder in self._folders.items()
+                    if playlist_id not in listed and self._exists(folder)}
+
+    def forget(self, playlist_id):
+        with self._lock:
+            if self._folders.pop(playlist_id, None) is not None:
+                self._save()
@@ -0,0 +1,124 @@
+"""
+Playlist list model
+Backs the playlist list in the main window with a QAbstractListModel, so the
+view only creates and paints the rows that are visible. Refreshing inserts and
+removes only the playlists that changed and keeps what the user checked
+"""
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, Signal
+
+class PlaylistModel(QAbstractListModel):
+    """Checkable playlist names; new playlists start checked"""
+    checked_changed = Signal(int)  # Number of checked playlists
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._names = []
+        self._unchecked = set()  # Most playlists are checked, so only the exceptions are stored
+        self._pinned = set()  # Synced before all others, see PINNED_PLAYLISTS
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._names[index.row()]
+        if role == Qt.DisplayRole:
+            return f"📌 {name}" if name in self._pinned else name
+        if role == Qt.CheckStateRole:
+            return Qt.Unchecked if name in self._unchecked else Qt.Checked
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        name = self._names[index.row()]
+        if Qt.CheckState(value) == Qt.Checked:
+            self._unchecked.discard(name)
+        else:
+            self._unchecked.add(name)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.checked_changed.emit(self.checked_count())
+        return True
+
+    def names(self):
+        return list(self._names)
+
+    def name_at(self, index):
+        return self._names[index.row()] if index.isValid() else None
+
+    def set_pinned(self, names):
+        self._pinned = set(names)
+        if self._names:
+            self.dataChanged.emit(self.index(0), self.index(len(self._names) - 1), [Qt.DisplayRole])
+
+    def is_pinned(self, name):
+        return name in self._pinned
+
+    def checked_count(self):
+        return len(self._names) - len(self._unchecked)
+
+    def checked_names(self):
+        """Checked playlists in list order"""
+        return [name for name in self._names if name not in self._unchecked]
+
+    def set_all_checked(self, checked):
+        """Check or uncheck every playlist with a single change notification"""
+        self._unchecked = set() if checked else set(self._names)
+        if self._names:
+            self.dataChanged.emit(self.index(0), self.index(len(self._names) - 1), [Qt.CheckStateRole])
+        self.checked_changed.emit(self.checked_count())
+
+    def set_playlists(self, names):
+        """
+        Show the given playlist names, in order
+        Rows that are still there are kept (with their checked state); removed and added
+        playlists are applied as contiguous row ranges. If the order of the remaining
+        playlists changed, the model is reset instead
+        """
+        names = list(dict.fromkeys(names))
+        wanted = set(names)
+        current = set(self._names)
+        kept = [name for name in names if name in current]
+        if kept != [name for name in self._names if name in wanted]:
+            self.beginResetModel()
+            self._names = names
+            self._unchecked &= wanted
+            self.endResetModel()
+            self.checked_changed.emit(self.checked_count())
+            return
+
+        # Remove from the bottom up, so the row numbers of earlier ranges stay valid
+        removed = [row for row, name in enumerate(self._names) if name not in wanted]
+        for first, last in reversed(_ranges(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._names[first:last + 1]
+            self.endRemoveRows()
+        self._unchecked &= wanted
+
+        # Kept rows are already in the order of names; inserting the missing ones
+        # in ascending order puts each of them straight into its final row
+        added = [row for row, name in enumerate(names) if name not in current]
+        for first, last in _ranges(added):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._names[first:first] = names[first:last + 1]
+            self.endInsertRows()
+
+        if removed or added:
+            self.checked_changed.emit(self.checked_count())
+
+def _ranges(rows):
+    """Group sorted row numbers into (first, last) runs"""
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in ranges]
@@ -0,0 +1,150 @@
+"""
+Profiling mode
+Trace spans around the sync phases, exported as a Chrome trace (open it in
+chrome://tracing or https://ui.perfetto.dev), plus cProfile statistics of the Python
+code that runs inside the spans. Turned on with --profile for main.py and headless
+mode; while it is off, span() hands out one shared no-op context manager
+"""
+
+import os
+import sys
+import json
+import time
+import functools
+import threading
+import contextlib
+
+PROFILE_DIR = 'profiles'
+
+_NULL = contextlib.nullcontext()
+_enabled = False
+_events = []
+_events_lock = threading.Lock()
+_local = threading.local()
+_start = 0.0
+_thread_names = {}
+_cprofile = False
+_profiles = []  # cProfile.Profile objects to merge on save
+_global_profile = None
+
+def enabled():
+    return _enabled
+
+def enable(cprofile=True):
+    """Start recording spans (and cProfile data)"""
+    global _enabled, _start, _cprofile, _global_profile
+    _start = time.perf_counter()
+    _cprofile = cprofile
+    if cprofile and sys.version_info >= (3, 12):
+        # cProfile runs on sys.monitoring here, which sees every thread but allows one profiler at a time
+        import cProfile
+        _global_profile = cProfile.Profile()
+        _global_profile.enable()
+        _profiles.append(_global_profile)
+    _enabled = True
+
+def span(name, **args):
+    """Context manager that records name as one trace span; free while profiling is off"""
+    if not _enabled:
+        return _NULL
+    return _Span(name, args)
+
+def traced(label=None, name=None):
+    """
+    Decorator running the function inside a span named after it (or name);
+    label(*args, **kwargs) adds a detail such as the playlist
+    """
+    def decorate(func):
+        span_name = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {'detail': label(*args, **kwargs)} if label else {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class _Span:
+    __slots__ = ('name', 'args', 'begin', 'profile')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.profile = None
+
+    def __enter__(self):
+        depth = getattr(_local, 'depth', 0)
+        _local.depth = depth + 1
+        if depth == 0 and _cprofile and _global_profile is None:
+            # Before Python 3.12 cProfile only sees the thread that enabled it, so each thread gets one
+            self.profile = getattr(_local, 'profile', None)
+            if self.profile is None:
+                import cProfile
+                self.profile = _local.profile = cProfile.Profile()
+                with _events_lock:
+                    _profiles.append(self.profile)
+            self.profile.enable()
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        if self.profile is not None:
+            self.profile.disable()
+        _local.depth -= 1
+        event = {
+            'name': self.name, 'cat': 'spotisync', 'ph': 'X',
+            'ts': (self.begin - _start) * 1e6, 'dur': (end - self.begin) * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+        }
+        if self.args:
+            event['args'] = {key: str(value) for key, value in self.args.items()}
+        if exc_info[0] is not None:
+            event.setdefault('args', {})['error'] = exc_info[0].__name__
+        with _events_lock:
+            _events.append(event)
+            _thread_names[event['tid']] = threading.current_thread().name
+        return False
+
+def save(folder=PROFILE_DIR, log=print):
+    """
+    Write the spans as trace-<time>.json and the merged cProfile data as profile-<time>.prof
+    (for pstats or snakeviz), log the slowest functions and stop profiling
+    """
+    global _enabled, _global_profile
+    if not _enabled:
+        return None
+    _enabled = False
+    if _global_profile is not None:
+        _global_profile.disable()
+        _global_profile = None
+
+    os.makedirs(folder, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    with _events_lock:
+        events = list(_events)
+        profiles = list(_profiles)
+        _events.clear()
+        _profiles.clear()
+        names = dict(_thread_names)
+    threads = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+               for tid, name in names.items()]
+    trace_path = os.path.join(folder, f"trace-{stamp}.json")
+    with open(trace_path, "w", encoding="utf-8") as f:
+        json.dump({'traceEvents': threads + events, 'displayTimeUnit': 'ms'}, f)
+    log(f"Trace with {len(events)} span(s) written to {trace_path}")
+
+    if profiles:
+        import io
+        import pstats
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        profile_path = os.path.join(folder, f"profile-{stamp}.prof")
+        stats.dump_stats(profile_path)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(20)
+        log(f"cProfile data written to {profile_path}; slowest functions:\n{text.getvalue()}")
+    return trace_path
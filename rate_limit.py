@@ -0,0 +1,243 @@
+"""
+Rate limiting shared by all sync jobs
+Classifies spotdl/spotipy errors, honours Retry-After, backs off exponentially
+with jitter and keeps a circuit breaker per upstream (Spotify, YouTube)
+"""
+
+import re
+import time
+import random
+import threading
+
+SPOTIFY = 'spotify'
+YOUTUBE = 'youtube'
+UPSTREAMS = (SPOTIFY, YOUTUBE)
+
+class SyncError(Exception):
+    """A playlist sync failed and retrying will not help"""
+
+class TransientError(SyncError):
+    """A network or server error that is worth retrying"""
+
+    def __init__(self, message, upstream=None):
+        super().__init__(message)
+        self.upstream = upstream
+
+class RateLimitError(TransientError):
+    """An upstream answered 429; retry_after is in seconds when the upstream sent one"""
+
+    def __init__(self, upstream=SPOTIFY, retry_after=None):
+        name = 'YouTube' if upstream == YOUTUBE else 'Spotify API'
+        super().__init__(f"Rate limit error: Too many requests to {name}", upstream)
+        self.retry_after = retry_after
+
+_RATE_LIMITED = re.compile(r'\b429\b|too many requests|rate[ /-]?(?:request )?limit', re.IGNORECASE)
+# Only error, warning and HTTP status lines can report a rate limit; other lines may hold song titles
+_ERROR_LINE = re.compile(r'error|exception|warning|http|status|retry|too many requests|reached a rate', re.IGNORECASE)
+# "Retry-After: 30", "Retry will occur after: 30 s" (spotipy), "retry after 30 seconds"
+_RETRY_AFTER = re.compile(r'retry(?:-after| will occur after| after):?\s*(\d+(?:\.\d+)?)', re.IGNORECASE)
+_TRANSIENT = re.compile(
+    r'HTTP Error 5\d\d|\b50[234]\b.*(?:error|gateway|unavailable)|timed? ?out|connection (?:reset|aborted|refused)'
+    r'|temporary failure in name resolution|remote end closed connection', re.IGNORECASE)
+_YOUTUBE = re.compile(r'youtube|yt-dlp|googlevideo|AudioProvider', re.IGNORECASE)
+
+def upstream_of(text):
+    """Guess which upstream a line of output is about"""
+    return YOUTUBE if _YOUTUBE.search(text) else SPOTIFY
+
+def classify_line(line):
+    """Return a RateLimitError if a line of output reports a rate limit, else None"""
+    if not _RATE_LIMITED.search(line) or not _ERROR_LINE.search(line):
+        return None
+    match = _RETRY_AFTER.search(line)
+    return RateLimitError(upstream_of(line), float(match.group(1)) if match else None)
+
+def classify_output(lines, returncode):
+    """Turn the output of a failed spotdl run into the matching SyncError subclass"""
+    rate_limit = None
+    transient = None
+    for line in lines:
+        found = classify_line(line)
+        if found:
+            # Keep the most specific report (the one with a Retry-After)
+            if rate_limit is None or found.retry_after is not None:
+                rate_limit = found
+        elif transient is None and _TRANSIENT.search(line):
+            transient = TransientError(f"Network error: {line.strip()}", upstream_of(line))
+    if rate_limit:
+        return rate_limit
+    if transient:
+        return transient
+    output = "\n".join(lines)
+    return SyncError(f"Command failed with error (exit code {returncode}): {output}")
+
+def classify_exception(error):
+    """Turn an exception raised by spotipy/spotdl inside this process into a SyncError"""
+    if isinstance(error, SyncError):
+        return error
+    status = getattr(error, 'http_status', None)
+    headers = getattr(error, 'headers', None) or {}
+    if status == 429:
+        retry_after = headers.get('Retry-After') or headers.get('retry-after')
+        return RateLimitError(SPOTIFY, float(retry_after) if retry_after else None)
+    if isinstance(status, int) and status >= 500:
+        return TransientError(f"Spotify server error {status}", SPOTIFY)
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return TransientError(f"Network error: {str(error)}", upstream_of(str(error)))
+    text = str(error)
+    return classify_line(text) or SyncError(text)
+
+def backoff_delay(attempt, base=1.0, cap=300.0):
+    """Exponential backoff with equal jitter: half fixed, half random"""
+    delay = min(cap, base * (2 ** max(0, attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class _Upstream:
+    """Rate-limit and circuit-breaker state of one upstream"""
+
+    def __init__(self, reset_timeout):
+        self.failures = 0            # Consecutive rate-limit failures
+        self.cooldown_until = 0.0    # Nobody starts a job before this time
+        self.state = RateLimiter.CLOSED
+        self.open_until = 0.0
+        self.reset_timeout = reset_timeout
+        self.trial_running = False   # A half-open circuit lets one job through
+
+class RateLimiter:
+    """
+    Shared gate in front of every sync job
+    A 429 seen by one job pauses all jobs on that upstream for its Retry-After,
+    so the app backs off together instead of hammering the API
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, min_wait=0.0, base_delay=1.0, max_delay=300.0,
+                 failure_threshold=5, reset_timeout=60.0, max_reset_timeout=900.0, log=None):
+        self.min_wait = min_wait
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.initial_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.log = log
+        self._upstreams = {name: _Upstream(reset_timeout) for name in UPSTREAMS}
+        self._cond = threading.Condition()
+
+    def _wait_time(self, upstream, now):
+        """Seconds until a job may use this upstream; the caller holds the lock"""
+        if now < upstream.cooldown_until:
+            return upstream.cooldown_until - now
+        if upstream.state == self.OPEN:
+            if now < upstream.open_until:
+                return upstream.open_until - now
+            upstream.state = self.HALF_OPEN
+        if upstream.state == self.HALF_OPEN and upstream.trial_running:
+            # Re-check once a second until the trial job reports back
+            return 1.0
+        return 0.0
+
+    def acquire(self, upstreams=UPSTREAMS, should_stop=None):
+        """
+        Block until every upstream a job needs is available
+        Returns the upstreams whose half-open trial the job now holds; pass them to
+        on_failure() or release() so only the job's own trial slots are freed
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self._wait_time(self._upstreams[name], now) for name in upstreams)
+                if wait <= 0:
+                    trials = tuple(name for name in upstreams if self._upstreams[name].state == self.HALF_OPEN)
+                    for name in trials:
+                        self._upstreams[name].trial_running = True
+                    return trials
+                if should_stop and should_stop():
+                    return ()
+                self._cond.wait(min(wait, 1.0))
+
+    def on_success(self, upstreams=UPSTREAMS):
+        """A job finished without being rate limited: close any circuit it was testing"""
+        with self._cond:
+            for name in upstreams:
+                upstream = self._upstreams[name]
+                upstream.failures = 0
+                if upstream.state == self.HALF_OPEN:
+                    upstream.state = self.CLOSED
+                    upstream.reset_timeout = self.initial_reset_timeout
+                    self._log(f"  ✅ {name} circuit closed, resuming normal speed")
+                upstream.trial_running = False
+            self._cond.notify_all()
+
+    def on_failure(self, trials):
+        """A job failed for a reason unrelated to rate limits: free the trial slots acquire() gave it"""
+        self.release(trials)
+
+    def release(self, trials):
+        """A job gave up before finishing (e.g. it was cancelled): free the trial slots acquire() gave it, nothing else"""
+        with self._cond:
+            for name in trials:
+                self._upstreams[name].trial_running = False
+            self._cond.notify_all()
+
+    def observe(self, error):
+        """
+        A running job saw a rate limit that its own client retries (spotipy does this)
+        Other jobs hold off for the Retry-After, but no failure is counted
+        """
+        if error.retry_after is None:
+            return
+        with self._cond:
+            upstream = self._upstreams[error.upstream]
+            upstream.cooldown_until = max(upstream.cooldown_until, time.monotonic() + error.retry_after)
+
+    def on_rate_limit(self, error):
+        """A job failed with a RateLimitError; returns the seconds every job on that upstream now waits"""
+        with self._cond:
+            upstream = self._upstreams[error.upstream]
+            upstream.failures += 1
+            delay = max(self.min_wait, backoff_delay(upstream.failures, self.base_delay, self.max_delay))
+            if error.retry_after is not None:
+                # The upstream told us exactly how long; add a little jitter so jobs don't restart in lockstep
+                delay = max(self.min_wait, error.retry_after * random.uniform(1.0, 1.1))
+            now = time.monotonic()
+            upstream.cooldown_until = max(upstream.cooldown_until, now + delay)
+
+            if upstream.state == self.HALF_OPEN:
+                # The trial failed: open again for twice as long
+                upstream.reset_timeout = min(self.max_reset_timeout, upstream.reset_timeout * 2)
+                self._open(error.upstream, upstream, now, delay)
+            elif upstream.state == self.CLOSED and upstream.failures >= self.failure_threshold:
+                self._open(error.upstream, upstream, now, delay)
+            upstream.trial_running = False
+            self._cond.notify_all()
+            return max(delay, upstream.open_until - now) if upstream.state == self.OPEN else delay
+
+    def _open(self, name, upstream, now, delay):
+        upstream.state = self.OPEN
+        upstream.open_until = now + max(delay, upstream.reset_timeout)
+        self._log(f"  ⛔ {name} circuit open for {upstream.open_until - now:.0f}s after repeated rate limits")
+
+    def state(self, name):
+        """Current circuit state of an upstream"""
+        with self._cond:
+            return self._upstreams[name].state
+
+    def _log(self, message):
+        if self.log:
+            self.log(message)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_limiter(min_wait=0.0, log=None):
+    """The limiter shared by every sync in this process"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter(min_wait=min_wait, log=log)
+        else:
+            _shared.min_wait = min_wait
+            _shared.log = log or _shared.log
+        return _shared
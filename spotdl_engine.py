@@ -0,0 +1,123 @@
+"""
+In-process spotdl engine
+Drives spotdl's Python API inside the running process, so the interpreter,
+the spotdl import, ffmpeg discovery and the Spotify/YouTube sessions are
+set up once per run instead of once per playlist
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sync_control import SyncCancelled
+
+# spotdl's default output file name, placed inside the playlist folder
+OUTPUT_TEMPLATE = "{artists} - {title}.{output-ext}"
+
+class _EventHandler(logging.Handler):
+    """Pass spotdl log records on as output lines of the playlist being synced"""
+
+    def __init__(self):
+        super().__init__()
+        self.on_line = None
+
+    def emit(self, record):
+        if self.on_line:
+            self.on_line(record.getMessage())
+
+class SpotdlEngine:
+    """One initialized spotdl downloader shared by every playlist of a run"""
+
+    def __init__(self, client_id, client_secret, use_yt_premium=False, cookies_file=''):
+        # Imported here so the subprocess path never pays for spotdl
+        from spotdl import Spotdl
+        from spotdl.console.sync import sync as spotdl_sync
+
+        settings = {}
+        if use_yt_premium and cookies_file and os.path.exists(cookies_file):
+            # Same options the subprocess path passes on the command line
+            settings.update({'cookie_file': cookies_file, 'format': 'm4a', 'bitrate': 'disable'})
+
+        self._spotdl = Spotdl(client_id=client_id, client_secret=client_secret,
+                              downloader_settings=settings)
+        self._sync = spotdl_sync
+        # spotdl's downloader keeps per-playlist settings (output, save file, threads), so
+        # playlists take turns and in-process syncs are serial; spotdl still downloads the
+        # tracks of each playlist in parallel
+        self._lock = threading.Lock()
+        self._handler = _EventHandler()
+        logging.getLogger('spotdl').addHandler(self._handler)
+
+    def sync(self, url, name, cwd, on_line=None, threads=0, control=None):
+        """
+        Sync one playlist into cwd, like `spotdl sync <url> --save-file <name>.sync.spotdl --threads <threads>`
+        on_line receives spotdl's log messages, the same lines the subprocess path prints
+        control (a sync_control.SyncControl) is checked before every song; once the run is
+        cancelled no new song starts and SyncCancelled is raised
+        """
+        downloader = self._spotdl.downloader
+        with self._lock:
+            if control and control.cancelled:
+                raise SyncCancelled(name)
+            downloader.settings['output'] = os.path.join(cwd, OUTPUT_TEMPLATE)
+            downloader.settings['save_file'] = os.path.join(cwd, f"{name}.sync.spotdl")
+            if threads:
+                self._set_threads(downloader, threads)
+            download_song = downloader.download_song
+            if control:
+                downloader.download_song = self._cancellable(download_song, control, name)
+            self._handler.on_line = on_line
+            try:
+                self._sync([url], downloader)
+            finally:
+                self._handler.on_line = None
+                downloader.download_song = download_song
+            if control and control.cancelled:
+                raise SyncCancelled(name)
+
+    @staticmethod
+    def _set_threads(downloader, threads):
+        """Give the downloader as many parallel downloads as spotdl's --threads would"""
+        if downloader.settings.get('threads') == threads:
+            return
+        downloader.settings['threads'] = threads
+        # Both are sized from the settings when the downloader is built
+        downloader.semaphore = asyncio.Semaphore(threads)
+        executor = getattr(downloader, 'thread_executor', None)
+        downloader.thread_executor = ThreadPoolExecutor(max_workers=threads)
+        if executor:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _cancellable(download_song, control, name):
+        """Wrap the downloader's download_song so no song starts after a cancel"""
+        def download(song):
+            if control.cancelled:
+                raise SyncCancelled(name)
+            return download_song(song)
+        return download
+
+    def close(self):
+        """Detach the log handler"""
+        logging.getLogger('spotdl').removeHandler(self._handler)
+
+_engine = None
+_engine_key = None
+_engine_lock = threading.Lock()
+
+def get_engine(client_id, client_secret, use_yt_premium=False, cookies_file=''):
+    """
+    Return the shared engine, creating it on first use
+    A new engine is only built when the credentials or download options change
+    (spotdl allows one Spotify client per process, so that may raise; callers fall back to subprocesses)
+    """
+    global _engine, _engine_key
+    key = (client_id, client_secret, use_yt_premium, cookies_file)
+    with _engine_lock:
+        if _engine is None or _engine_key != key:
+            if _engine is not None:
+                _engine.close()
+            _engine = SpotdlEngine(client_id, client_secret, use_yt_premium, cookies_file)
+            _engine_key = key
+        return _engine
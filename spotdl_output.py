@@ -0,0 +1,69 @@
+"""
+spotdl output parser
+Turns the lines spotdl prints while syncing into structured per-track events
+"""
+
+import re
+from dataclasses import dataclass
+
+# Event kinds, in the order a track normally goes through them
+MATCHED = 'matched'
+DOWNLOADING = 'downloading'
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+# Not a track event: spotdl reports how many songs the playlist has
+TOTAL = 'total'
+
+# Kinds that mean spotdl is finished with a track
+FINISHED_KINDS = {DONE, SKIPPED, FAILED}
+
+@dataclass
+class TrackEvent:
+    """One step of a track in spotdl's output"""
+    kind: str
+    track: str = ''
+    detail: str = ''
+    count: int = 0
+
+# Checked in order; the first pattern that matches wins
+_PATTERNS = [
+    (TOTAL, re.compile(r'Found (\d+) songs? in')),
+    (DONE, re.compile(r'Downloaded "(.+?)":\s*(\S*)')),
+    (SKIPPED, re.compile(r'Skipping (.+?)(?: \(([^)]*)\).*)?$')),
+    # Errors spotdl reports per song; HTTP errors of the whole run are handled by rate_limit
+    (FAILED, re.compile(r'\b(?:LookupError|AudioProviderError|DownloaderError|FFmpegError|MetadataError|SongError)'
+                        r': (?:No results found for song: )?(.+)$')),
+    (FAILED, re.compile(r'(?:Failed to download|Error downloading) "?(.+?)"?$')),
+    (MATCHED, re.compile(r'(?:Found url for|Matched) "?(.+?)"?(?:: (\S+))?$')),
+    (DOWNLOADING, re.compile(r'Downloading "?(.+?)"?$')),
+]
+
+# Failure messages that name the song instead of the error
+_NAMES_SONG = re.compile(r'No results found for song: |(?:Failed to download|Error downloading) ')
+
+def error_text(line, event):
+    """
+    What a line of output says about errors, without the song titles it names, since a song
+    may well be called "429" or "Rate Limit". Track progress lines say nothing ('')
+    """
+    if event is None or event.kind == TOTAL:
+        return line
+    if event.kind != FAILED:
+        return ''
+    if event.track and _NAMES_SONG.search(line):
+        return line.replace(event.track, '')
+    return line
+
+def parse_line(line):
+    """Parse one line of spotdl output, returning a TrackEvent or None"""
+    for kind, pattern in _PATTERNS:
+        match = pattern.search(line)
+        if not match:
+            continue
+        if kind == TOTAL:
+            return TrackEvent(kind, count=int(match.group(1)))
+        groups = match.groups()
+        detail = groups[1] if len(groups) > 1 and groups[1] else ''
+        return TrackEvent(kind, groups[0].strip(), detail)
+    return None
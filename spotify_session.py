@@ -0,0 +1,113 @@
+"""
+Spotify client shared by the whole app
+One pooled keep-alive HTTP session (with the response cache) serves every consumer,
+including the concurrent page fetchers and parallel sync jobs, and the access token
+is kept on disk until it expires, so a new GUI session or headless run skips the
+token request
+"""
+
+import os
+import re
+import json
+import threading
+import spotipy
+from spotipy.cache_handler import CacheHandler
+from spotipy.oauth2 import SpotifyClientCredentials
+import http_cache
+
+# Access token per client id, next to settings.json
+TOKEN_CACHE_PATH = ".spotify-token-{client_id}.json"
+
+class TokenCache(CacheHandler):
+    """
+    Keeps the access token in memory and in a file only the user can read
+    spotipy's own file cache reads the file before every API call and shares one file
+    between all client ids; this one reads it once per client id
+    """
+
+    def __init__(self, client_id):
+        self.path = TOKEN_CACHE_PATH.format(client_id=client_id)
+        self._token = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get_cached_token(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._token = json.load(f)
+                except (OSError, ValueError):
+                    self._token = None
+            return self._token
+
+    def save_token_to_cache(self, token_info):
+        with self._lock:
+            self._token = token_info
+            self._loaded = True
+            try:
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(token_info, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                # The token still works from memory for this run
+                print(f"Could not save the Spotify token: {e}")
+
+class _ClientCredentials(SpotifyClientCredentials):
+    """Client credentials flow where parallel requests wait for one token request instead of each making one"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._token_lock = threading.Lock()
+
+    def get_access_token(self, *args, **kwargs):
+        with self._token_lock:
+            return super().get_access_token(*args, **kwargs)
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+def shared_session(cache_bytes=0, pool_size=http_cache.POOL_SIZE):
+    """The HTTP session every Spotify request in this process goes through"""
+    global _session
+    with _lock:
+        if _session is None:
+            if cache_bytes > 0:
+                _session = http_cache.CachingSession(max_bytes=cache_bytes, pool_size=pool_size)
+            else:
+                _session = http_cache.pooled_session(pool_size)
+        elif isinstance(_session, http_cache.CachingSession):
+            _session.max_bytes = cache_bytes
+        return _session
+
+def get_client(client_id, client_secret, cache_bytes=0, pool_size=http_cache.POOL_SIZE, api_base=''):
+    """
+    Spotify client for these credentials, created once and then reused
+    The token request and every API call share the pooled session
+    api_base points the client at another server with Spotify's paths (/api/token, /v1/...)
+    """
+    session = shared_session(cache_bytes, pool_size)
+    with _lock:
+        key = (client_id, client_secret, api_base)
+        if key not in _clients:
+            token_key = client_id
+            if api_base:
+                # A token from another server must never be sent to Spotify, or the other way round
+                token_key = f"{client_id}-{re.sub(r'[^A-Za-z0-9]', '', api_base)}"
+            auth_manager = _ClientCredentials(
+                client_id=client_id,
+                client_secret=client_secret,
+                requests_session=session,
+                cache_handler=TokenCache(token_key)
+            )
+            client = spotipy.Spotify(auth_manager=auth_manager, requests_session=session)
+            if api_base:
+                api_base = api_base.rstrip('/')
+                auth_manager.OAUTH_TOKEN_URL = f"{api_base}/api/token"
+                client.prefix = f"{api_base}/v1/"
+            _clients[key] = client
+        return _clients[key]
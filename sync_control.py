@@ -0,0 +1,220 @@
+"""
+Pause, resume and cancel for sync runs
+SyncControl is shared by whoever starts a run (GUI buttons, headless signal handler)
+and the sync jobs: paused runs start no new playlists, cancelled runs stop their spotdl
+processes gracefully. The checkpoint file records which playlists of a run are done,
+so a run that was cancelled or killed resumes where it stopped instead of starting over
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import subprocess
+from sync_state import STATE_DIR
+
+CHECKPOINT_FILE = 'checkpoint.json'
+# The checkpoint is written at most this often while a run goes on (and always at its end)
+CHECKPOINT_INTERVAL = 1.0
+# Seconds spotdl gets to exit after an interrupt before it is terminated, and again before it is killed
+STOP_GRACE = 5.0
+
+# Checkpoint statuses
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+class SyncCancelled(Exception):
+    """The run was cancelled while this playlist was syncing"""
+
+class SyncControl:
+    """Thread-safe pause/resume/cancel switch for one sync run (or several in a row)"""
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        """Start no new playlists; the ones already syncing finish"""
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        """Start no new playlists and stop the spotdl processes that are running"""
+        self._cancelled.set()
+        self._running.set()  # Wake up jobs waiting in wait_if_paused so they can give up
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            threading.Thread(target=stop_process, args=(process,), daemon=True).start()
+
+    def reset(self):
+        """Allow the next run after a cancel"""
+        self._cancelled.clear()
+        self._running.set()
+
+    def wait_if_paused(self):
+        """Block while paused; returns False if the run was cancelled"""
+        self._running.wait()
+        return not self.cancelled
+
+    def sleep(self, seconds):
+        """time.sleep that ends early on cancel; returns False if the run was cancelled"""
+        return not self._cancelled.wait(seconds)
+
+    def register(self, process):
+        with self._lock:
+            self._processes.add(process)
+        if self.cancelled:
+            stop_process(process)
+
+    def unregister(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+def stop_process(process, grace=STOP_GRACE):
+    """Ask spotdl to stop like Ctrl+C would, then terminate it, then kill it"""
+    steps = [process.terminate, process.kill]
+    if sys.platform != "win32":
+        # KeyboardInterrupt lets spotdl clean up its temporary files
+        steps.insert(0, lambda: process.send_signal(signal.SIGINT))
+    for step in steps:
+        if process.poll() is not None:
+            return
+        try:
+            step()
+            process.wait(grace)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+        except OSError:
+            return
+
+class Checkpoint:
+    """
+    <sync folder>/.spotisync/checkpoint.json: status of every playlist of the runs in progress
+    A run that completes removes its own playlists and the file once it is empty, so entries
+    left in it mean a run was interrupted. Runs over a few playlists (the GUI's selection,
+    the folder watcher) add to the file and leave the entries of an interrupted full run alone
+    """
+
+    def __init__(self, sync_folder):
+        self.path = os.path.join(sync_folder, STATE_DIR, CHECKPOINT_FILE)
+        self._lock = threading.Lock()
+        self._playlists = {}
+        self._run = set()  # Ids of the playlists of this run
+        self._started = time.time()
+        self._dirty = False
+        self._written = 0.0
+
+    def load(self):
+        """{playlist id: entry} of interrupted runs, or {}"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get('playlists', {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def start(self, playlists, previous=None):
+        """
+        Begin a run over playlists ({name: info}); entries of interrupted runs are kept,
+        so playlists that are done stay done if the run is interrupted again
+        """
+        previous = self.load() if previous is None else previous
+        with self._lock:
+            self._playlists = dict(previous)
+            self._run = set()
+            for name, info in playlists.items():
+                if not info.get('id'):
+                    continue
+                self._run.add(info['id'])
+                entry = previous.get(info['id'])
+                if not entry or entry.get('status') != DONE:
+                    self._playlists[info['id']] = {'name': name, 'status': PENDING,
+                                                   'snapshot_id': info.get('snapshot_id', '')}
+            self._dirty = True
+        self.flush()
+
+    def mark(self, playlist_id, status):
+        if not playlist_id:
+            return
+        with self._lock:
+            entry = self._playlists.get(playlist_id)
+            if entry is None:
+                return
+            entry['status'] = status
+            self._dirty = True
+            due = time.time() - self._written >= CHECKPOINT_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the checkpoint if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'started': self._started, 'playlists': self._playlists}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._written = time.time()
+
+    def finish(self):
+        """The run completed: drop its playlists, and the file once no interrupted run is left"""
+        with self._lock:
+            for playlist_id in self._run:
+                self._playlists.pop(playlist_id, None)
+            self._run = set()
+            self._dirty = True
+            empty = not self._playlists
+        if empty:
+            self.clear()
+        else:
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._dirty = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+def resume_order(playlists, previous):
+    """
+    Split playlists for a resumed run: (still to do, done before the interruption)
+    Playlists that were syncing when the run stopped go first; a done playlist is only
+    skipped while its snapshot still matches, so upstream changes are not missed
+    """
+    in_flight, rest, done = {}, {}, {}
+    for name, info in playlists.items():
+        entry = previous.get(info.get('id'))
+        if not entry:
+            rest[name] = info
+        elif entry.get('status') == DONE and entry.get('snapshot_id') == info.get('snapshot_id', ''):
+            done[name] = info
+        elif entry.get('status') in (RUNNING, CANCELLED):
+            in_flight[name] = info
+        else:
+            rest[name] = info
+    return {**in_flight, **rest}, done
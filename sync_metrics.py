@@ -0,0 +1,248 @@
+"""
+Sync metrics
+Records where each playlist sync spends its time (starting spotdl, fetching Spotify
+metadata, matching songs, downloading), how much it wrote and how often it was retried.
+Every playlist and every run is appended to <sync folder>/.spotisync/metrics.jsonl and
+the latest run is written as a Prometheus text file (metrics.prom) for node_exporter's
+textfile collector
+"""
+
+import os
+import json
+import time
+import threading
+from dataclasses import dataclass, field, asdict
+import spotdl_output
+from sync_state import STATE_DIR, AUDIO_EXTENSIONS
+
+METRICS_FILE = 'metrics.jsonl'
+PROMETHEUS_FILE = 'metrics.prom'
+# metrics.jsonl is moved to metrics.jsonl.1 once it grows past this
+METRICS_MAX_BYTES = 5 * 1024 * 1024
+
+# Phases of a playlist sync, in order
+SPAWN = 'spawn'        # Starting spotdl until its first output (metadata too, if spotdl prints nothing before)
+METADATA = 'metadata'  # Until spotdl has the playlist's songs from Spotify
+MATCH = 'match'        # Looking up songs on YouTube
+DOWNLOAD = 'download'  # Downloading and converting
+PHASES = (SPAWN, METADATA, MATCH, DOWNLOAD)
+
+# The phase the time leading up to an event of this kind belongs to
+_EVENT_PHASES = {
+    spotdl_output.TOTAL: METADATA,
+    spotdl_output.MATCHED: MATCH,
+    spotdl_output.DOWNLOADING: DOWNLOAD,
+    spotdl_output.DONE: DOWNLOAD,
+    spotdl_output.SKIPPED: DOWNLOAD,
+    spotdl_output.FAILED: DOWNLOAD,
+}
+
+def audio_sizes(folder):
+    """{file name: size} of the audio files in a folder"""
+    try:
+        with os.scandir(folder) as entries:
+            return {entry.name: entry.stat().st_size for entry in entries
+                    if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS}
+    except FileNotFoundError:
+        return {}
+
+@dataclass
+class PlaylistMetrics:
+    """Timings and counters of one playlist in one run; durations are in seconds"""
+    name: str
+    playlist_id: str = ''
+    run_id: str = ''
+    started: float = 0
+    duration: float = 0
+    phases: dict = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    tracks: int = 0
+    downloaded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    retries: int = 0
+    bytes_written: int = 0
+    result: str = ''
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._mark = None
+        self._files = {}
+
+    def begin(self, folder):
+        self.started = time.time()
+        self.files_present(folder)
+
+    def files_present(self, folder):
+        """Take the folder's files as already there, so they don't count as written (e.g. after linking stored tracks)"""
+        self._files = audio_sizes(folder)
+
+    def spotdl_started(self):
+        """A spotdl attempt starts (again, after a retry); the time until its first line is spawn time"""
+        with self._lock:
+            self._mark = (time.perf_counter(), SPAWN)
+
+    def on_line(self, event):
+        """Every output line of spotdl, with its parsed TrackEvent or None"""
+        now = time.perf_counter()
+        with self._lock:
+            if self._mark is None:
+                return
+            since, phase = self._mark
+            if phase == SPAWN:
+                # The first line ends the spawn phase whatever it is
+                self.phases[SPAWN] += now - since
+                self._mark = (now, METADATA)
+                since, phase = self._mark
+            if event is None:
+                return
+            phase = _EVENT_PHASES.get(event.kind, phase)
+            self.phases[phase] += now - since
+            self._mark = (now, phase)
+            if event.kind == spotdl_output.TOTAL:
+                self.tracks = event.count
+            elif event.kind == spotdl_output.DONE:
+                self.downloaded += 1
+            elif event.kind == spotdl_output.SKIPPED:
+                self.skipped += 1
+            elif event.kind == spotdl_output.FAILED:
+                self.failed += 1
+
+    def finish(self, folder, result):
+        self.duration = time.time() - self.started
+        self.result = result
+        before = self._files
+        self.bytes_written = sum(size for name, size in audio_sizes(folder).items() if before.get(name) != size)
+
+    def to_dict(self):
+        data = {'type': 'playlist'}
+        data.update(asdict(self))
+        return data
+
+class SyncMetrics:
+    """Collects the metrics of one sync run and writes them out"""
+
+    def __init__(self, sync_folder):
+        self.folder = os.path.join(sync_folder, STATE_DIR)
+        self.path = os.path.join(self.folder, METRICS_FILE)
+        self.started = time.time()
+        self.run_id = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))
+        self.playlists = []
+        self._lock = threading.Lock()
+
+    def playlist(self, name, playlist_id=''):
+        return PlaylistMetrics(name, playlist_id or '', self.run_id)
+
+    def record(self, metrics):
+        """Append a finished playlist to metrics.jsonl right away, so a crash keeps it"""
+        with self._lock:
+            self.playlists.append(metrics)
+            try:
+                self._append(metrics.to_dict())
+            except OSError:
+                pass  # Still part of the run summary
+
+    def summary(self):
+        """The run as one dict"""
+        with self._lock:
+            playlists = list(self.playlists)
+        duration = time.time() - self.started
+        downloaded = sum(p.downloaded for p in playlists)
+        return {
+            'type': 'run',
+            'run_id': self.run_id,
+            'started': self.started,
+            'duration': duration,
+            'playlists': len(playlists),
+            'synced': sum(p.result == 'synced' for p in playlists),
+            'skipped': sum(p.result == 'skipped' for p in playlists),
+            'failed': sum(p.result == 'failed' for p in playlists),
+            'downloaded': downloaded,
+            'failed_tracks': sum(p.failed for p in playlists),
+            'retries': sum(p.retries for p in playlists),
+            'bytes_written': sum(p.bytes_written for p in playlists),
+            'phases': {phase: sum(p.phases[phase] for p in playlists) for phase in PHASES},
+            'tracks_per_minute': downloaded / duration * 60 if duration > 0 else 0,
+        }
+
+    def finish(self):
+        """Append the run summary and rewrite the Prometheus file; returns the summary"""
+        summary = self.summary()
+        with self._lock:
+            self._append(summary)
+            self._write_prometheus(summary, list(self.playlists))
+        return summary
+
+    def _append(self, record):
+        """The caller holds the lock"""
+        os.makedirs(self.folder, exist_ok=True)
+        try:
+            if os.path.getsize(self.path) > METRICS_MAX_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+        except FileNotFoundError:
+            pass
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _write_prometheus(self, summary, playlists):
+        """Text exposition format; written to a temp file first, as the textfile collector requires"""
+        lines = []
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP spotisync_{name} {help_text}")
+            lines.append(f"# TYPE spotisync_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"spotisync_{name}{{{label_text}}} {value}" if label_text
+                             else f"spotisync_{name} {value}")
+
+        metric("last_run_timestamp_seconds", "gauge", "Start of the last sync run", [({}, summary['started'])])
+        metric("run_duration_seconds", "gauge", "Wall time of the last sync run", [({}, summary['duration'])])
+        metric("run_playlists", "gauge", "Playlists of the last run by result",
+               [({'result': result}, summary[result]) for result in ('synced', 'skipped', 'failed')])
+        metric("run_tracks_downloaded", "gauge", "Tracks downloaded in the last run", [({}, summary['downloaded'])])
+        metric("run_bytes_written", "gauge", "Audio bytes written in the last run", [({}, summary['bytes_written'])])
+        metric("run_retries", "gauge", "Retries in the last run", [({}, summary['retries'])])
+        metric("run_tracks_per_minute", "gauge", "Download throughput of the last run",
+               [({}, round(summary['tracks_per_minute'], 3))])
+        synced = [p for p in playlists if p.result != 'skipped']
+        metric("playlist_phase_seconds", "gauge", "Time per sync phase of each playlist in the last run",
+               [({'playlist': p.name, 'phase': phase}, round(p.phases[phase], 3)) for p in synced for phase in PHASES])
+        metric("playlist_duration_seconds", "gauge", "Sync time of each playlist in the last run",
+               [({'playlist': p.name}, round(p.duration, 3)) for p in synced])
+        metric("playlist_tracks", "gauge", "Tracks of each playlist in the last run by outcome",
+               [({'playlist': p.name, 'outcome': outcome}, getattr(p, outcome))
+                for p in synced for outcome in ('downloaded', 'skipped', 'failed')])
+        metric("playlist_bytes_written", "gauge", "Audio bytes written per playlist in the last run",
+               [({'playlist': p.name}, p.bytes_written) for p in synced])
+        metric("playlist_retries", "gauge", "Retries per playlist in the last run",
+               [({'playlist': p.name}, p.retries) for p in synced])
+
+        path = os.path.join(self.folder, PROMETHEUS_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def load(sync_folder, runs=20):
+    """The last runs from metrics.jsonl: (run summaries, {run id: [playlist records]}), oldest run first"""
+    path = os.path.join(sync_folder, STATE_DIR, METRICS_FILE)
+    summaries = []
+    playlists = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('type') == 'run':
+                    summaries.append(record)
+                elif record.get('type') == 'playlist':
+                    playlists.setdefault(record.get('run_id'), []).append(record)
+    except FileNotFoundError:
+        pass
+    summaries = summaries[-runs:]
+    kept = {summary['run_id'] for summary in summaries}
+    return summaries, {run_id: records for run_id, records in playlists.items() if run_id in kept}
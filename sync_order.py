@@ -0,0 +1,62 @@
+"""
+Sync order
+Jobs start in the order of the dict passed to the thread pool, so the order decides
+how soon each playlist is up to date. One huge playlist at the front holds up a whole
+worker for its download, while running cheap playlists first gets the most playlists
+done in the least time (shortest job first)
+"""
+
+LISTING = 'listing'    # Spotify's order
+SHORTEST = 'shortest'  # Least estimated work first
+STALE = 'stale'        # Longest since its last successful sync first
+POLICIES = (LISTING, SHORTEST, STALE)
+
+# Rough relative cost of a spotdl run: starting it and fetching the playlist, each track
+# it has to look at, and each track it has to download
+RUN_COST = 1.0
+TRACK_COST = 0.01
+DOWNLOAD_COST = 1.0
+
+def estimated_cost(info, record, force=False):
+    """
+    Relative work of syncing a playlist, from its track count and the last sync's record
+    Unchanged playlists are skipped without starting spotdl, so they cost nothing
+    """
+    tracks = info.get('tracks') or 0
+    if record and not force and info.get('snapshot_id') and record.get('snapshot_id') == info['snapshot_id']:
+        return 0.0
+    # Tracks that were not there at the last sync will be downloaded
+    new_tracks = tracks - record.get('files', 0) if record else tracks
+    return RUN_COST + TRACK_COST * tracks + DOWNLOAD_COST * max(0, new_tracks)
+
+def _pin_rank(name, info, pinned):
+    """Position in PINNED_PLAYLISTS (matched by folder name, Spotify name or id), or None"""
+    for rank, entry in enumerate(pinned):
+        if entry in (name, info.get('name'), info.get('id')):
+            return rank
+    return None
+
+def order(playlists, policy=SHORTEST, state=None, pinned=(), force=False):
+    """
+    Return playlists as a new dict in the order they should be synced
+    Pinned playlists come first, in the order they are pinned; the policy orders the rest
+    Ties keep Spotify's order
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown SYNC_ORDER_POLICY {policy!r}, use one of: {', '.join(POLICIES)}")
+    records = state.records() if state else {}
+
+    def key(item):
+        position, (name, info) = item
+        rank = _pin_rank(name, info, pinned)
+        if rank is not None:
+            return (0, rank, position)
+        record = records.get(info.get('id'))
+        if policy == SHORTEST:
+            return (1, estimated_cost(info, record, force), position)
+        if policy == STALE:
+            # Never synced counts as the stalest
+            return (1, record.get('synced_at', 0) if record else 0, position)
+        return (1, 0, position)
+
+    return dict(item for position, item in sorted(enumerate(playlists.items()), key=key))
@@ -0,0 +1,130 @@
+"""
+Sync state store
+Remembers the Spotify snapshot_id of every playlist that synced successfully,
+so unchanged playlists can be skipped without starting spotdl
+"""
+
+import os
+import json
+import time
+import threading
+from config import _file_lock
+
+# Hidden folder inside the sync folder that holds Spoti-Sync's own data
+STATE_DIR = '.spotisync'
+STATE_FILE = 'state.json'
+
+# Several SyncState instances may share a folder (sync, index, garbage collector, watcher)
+_save_lock = threading.Lock()
+
+AUDIO_EXTENSIONS = {'.mp3', '.m4a', '.opus', '.ogg', '.flac', '.wav'}
+
+def count_audio_files(folder):
+    """Count the audio files directly inside a playlist folder"""
+    try:
+        with os.scandir(folder) as entries:
+            return sum(1 for entry in entries
+                       if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS)
+    except FileNotFoundError:
+        return 0
+
+class SyncState:
+    """Persistent per-playlist record of the last successful sync"""
+
+    def __init__(self, sync_folder):
+        self.path = os.path.join(sync_folder, STATE_DIR, STATE_FILE)
+        self._lock = threading.Lock()
+        self._playlists = self._load()
+        # {playlist id: changed fields, or None if it was forgotten} not yet written by this instance
+        self._changes = {}
+
+    def _load(self):
+        """Load the state file, starting empty if it is missing or broken"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get('playlists', {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self):
+        """
+        Write this instance's changes atomically (temp file + rename)
+        The file is read again under a lock and only the changed records are replaced,
+        so other instances and processes writing the same state file are not overwritten
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with _save_lock, _file_lock(self.path + ".lock"), self._lock:
+            playlists = self._load()
+            for playlist_id, fields in self._changes.items():
+                if fields is None:
+                    playlists.pop(playlist_id, None)
+                elif playlist_id in playlists:
+                    playlists[playlist_id].update(fields)
+                elif 'snapshot_id' in fields:
+                    # A rename alone does not bring back a record forgotten meanwhile
+                    playlists[playlist_id] = fields
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({'playlists': playlists}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._playlists = playlists
+            self._changes = {}
+
+    def get(self, playlist_id):
+        """Return the stored record of a playlist or None"""
+        with self._lock:
+            return self._playlists.get(playlist_id)
+
+    def records(self):
+        """Copy of all records, keyed by playlist id"""
+        with self._lock:
+            return {playlist_id: dict(record) for playlist_id, record in self._playlists.items()}
+
+    def find_by_name(self, name):
+        """Return the id of the playlist last synced into the folder called name, or None"""
+        with self._lock:
+            for playlist_id, record in self._playlists.items():
+                if record.get('name') == name:
+                    return playlist_id
+        return None
+
+    def is_unchanged(self, playlist_id, snapshot_id, folder, name):
+        """Check if a playlist still matches its last sync and its local folder is intact"""
+        record = self.get(playlist_id)
+        if not record or not snapshot_id or record.get('snapshot_id') != snapshot_id:
+            return False
+        # The folder must still hold the spotdl save file and every downloaded track
+        if not os.path.isfile(os.path.join(folder, f"{name}.sync.spotdl")):
+            return False
+        return count_audio_files(folder) >= record.get('files', 0)
+
+    def mark_synced(self, playlist_id, snapshot_id, folder, name):
+        """Record a successful sync and persist it right away"""
+        with self._lock:
+            self._playlists[playlist_id] = {
+                'name': name,
+                'snapshot_id': snapshot_id,
+                'files': count_audio_files(folder),
+                'synced_at': time.time()
+            }
+            self._changes[playlist_id] = dict(self._playlists[playlist_id])
+        self.save()
+
+    def rename(self, playlist_id, name):
+        """The playlist's folder was moved: keep its record valid under the new name"""
+        with self._lock:
+            record = self._playlists.get(playlist_id)
+            if record is None:
+                return
+            record['name'] = name
+            self._changes.setdefault(playlist_id, {})['name'] = name
+        self.save()
+
+    def forget(self, playlist_id):
+        """Drop the record of a playlist so the next run syncs it again"""
+        with self._lock:
+            removed = self._playlists.pop(playlist_id, None)
+            if removed:
+                self._changes[playlist_id] = None
+        if removed:
+            self.save()
@@ -0,0 +1,70 @@
+"""Checkpoint: an interrupted run resumes where it stopped, partial runs keep its entries"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync_control
+from sync_control import Checkpoint, resume_order
+
+def listing(*names, snapshot='s1'):
+    return {name: {'id': name.lower(), 'snapshot_id': snapshot} for name in names}
+
+class Resume(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def interrupted_run(self):
+        """A run over A, B, C, D stopped with A done, B syncing and C cancelled"""
+        checkpoint = Checkpoint(self.folder.name)
+        checkpoint.start(listing('A', 'B', 'C', 'D'))
+        checkpoint.mark('a', sync_control.DONE)
+        checkpoint.mark('b', sync_control.RUNNING)
+        checkpoint.mark('c', sync_control.CANCELLED)
+        checkpoint.flush()
+        return Checkpoint(self.folder.name).load()
+
+    def test_resume_order(self):
+        todo, done = resume_order(listing('A', 'B', 'C', 'D', 'E'), self.interrupted_run())
+        self.assertEqual(list(todo), ['B', 'C', 'D', 'E'])
+        self.assertEqual(list(done), ['A'])
+
+    def test_changed_snapshot_is_synced_again(self):
+        previous = self.interrupted_run()
+        todo, done = resume_order(listing('A', snapshot='s2'), previous)
+        self.assertEqual(list(todo), ['A'])
+        self.assertEqual(done, {})
+
+    def test_done_stays_done_when_interrupted_again(self):
+        previous = self.interrupted_run()
+        checkpoint = Checkpoint(self.folder.name)
+        checkpoint.start(listing('A', 'B', 'C', 'D'), previous)
+        checkpoint.flush()
+        entries = Checkpoint(self.folder.name).load()
+        self.assertEqual(entries['a']['status'], sync_control.DONE)
+        self.assertEqual(entries['b']['status'], sync_control.PENDING)
+
+    def test_partial_run_keeps_interrupted_entries(self):
+        previous = self.interrupted_run()
+        checkpoint = Checkpoint(self.folder.name)
+        checkpoint.start(listing('E'))
+        checkpoint.mark('e', sync_control.DONE)
+        checkpoint.finish()
+        self.assertEqual(Checkpoint(self.folder.name).load(), previous)
+
+    def test_completed_run_removes_the_file(self):
+        previous = self.interrupted_run()
+        checkpoint = Checkpoint(self.folder.name)
+        checkpoint.start(listing('A', 'B', 'C', 'D'), previous)
+        checkpoint.finish()
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+if __name__ == "__main__":
+    unittest.main()
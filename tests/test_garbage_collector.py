@@ -0,0 +1,75 @@
+"""quarantine_tracks: only files of songs removed from a playlist go to the trash"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import garbage_collector
+
+ONE = {'song_id': 'one', 'artists': ['Artist'], 'name': 'One'}
+TWO = {'song_id': 'two', 'artists': ['Artist'], 'name': 'Two'}
+
+class QuarantineTracks(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.root = self.folder.name
+        self.playlist = os.path.join(self.root, 'Mix')
+        os.makedirs(self.playlist)
+        self.trash = garbage_collector.Trash(self.root)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def add(self, *names):
+        for name in names:
+            with open(os.path.join(self.playlist, name), 'w') as f:
+                f.write('audio')
+
+    def listed(self, *songs):
+        with open(os.path.join(self.playlist, 'Mix.sync.spotdl'), 'w', encoding='utf-8') as f:
+            json.dump({'songs': list(songs)}, f)
+
+    def collect(self):
+        count, _ = garbage_collector.quarantine_tracks(self.root, ['Mix'], self.trash)
+        return count, sorted(name for name in os.listdir(self.playlist) if name.endswith('.mp3'))
+
+    def test_removed_song_goes_to_trash(self):
+        self.add('Artist - One.mp3', 'Artist - Two.mp3')
+        self.listed(ONE, TWO)
+        self.assertEqual(self.collect(), (0, ['Artist - One.mp3', 'Artist - Two.mp3']))
+
+        self.listed(ONE)
+        self.assertEqual(self.collect(), (1, ['Artist - One.mp3']))
+        self.assertTrue(os.path.isfile(os.path.join(self.trash.batch, 'Mix', 'Artist - Two.mp3')))
+
+    def test_unmatched_names_are_kept(self):
+        # Truncated or templated names never match a song, so they are never moved
+        self.add('Artist - One.mp3', 'Artist - Tw.mp3', '01 Two.mp3')
+        self.listed(ONE, TWO)
+        self.collect()
+        self.listed(ONE)
+        self.assertEqual(self.collect(), (0, ['01 Two.mp3', 'Artist - One.mp3', 'Artist - Tw.mp3']))
+
+    def test_first_pass_moves_nothing(self):
+        self.add('Artist - One.mp3', 'Artist - Two.mp3')
+        self.listed(ONE)
+        self.assertEqual(self.collect(), (0, ['Artist - One.mp3', 'Artist - Two.mp3']))
+
+    def test_file_needed_by_another_listed_song_is_kept(self):
+        self.add('Artist - One.mp3')
+        self.listed(ONE)
+        self.collect()
+        self.listed(dict(ONE, song_id='one-remaster'))
+        self.assertEqual(self.collect(), (0, ['Artist - One.mp3']))
+
+    def test_folder_without_save_file_is_left_alone(self):
+        self.add('Artist - One.mp3')
+        self.assertEqual(self.collect(), (0, ['Artist - One.mp3']))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""PlaylistIndex.resolve: name collisions get suffixed folders, renames move the folder"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playlist_index import PlaylistIndex
+
+class Resolve(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.root = self.folder.name
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def resolve(self, entries):
+        folders, moves = PlaylistIndex(self.root).resolve(entries, log=lambda message: None)
+        for folder in folders.values():
+            os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+        return folders, moves
+
+    def test_collision_goes_to_lowest_id(self):
+        folders, moves = self.resolve([('bbbbbbbbbb', 'Chill!'), ('aaaaaaaaaa', 'Chill?')])
+        self.assertEqual(folders, {'aaaaaaaaaa': 'Chill', 'bbbbbbbbbb': 'Chill_bbbbbbbb'})
+        self.assertEqual(moves, [])
+
+    def test_collision_does_not_depend_on_order(self):
+        first, _ = self.resolve([('aaaaaaaaaa', 'Chill?'), ('bbbbbbbbbb', 'Chill!')])
+        second, _ = PlaylistIndex(self.root).resolve([('bbbbbbbbbb', 'Chill!'), ('aaaaaaaaaa', 'Chill?')],
+                                                     log=lambda message: None)
+        self.assertEqual(first, second)
+
+    def test_existing_playlist_keeps_its_folder(self):
+        self.resolve([('aaaaaaaaaa', 'Chill')])
+        folders, moves = self.resolve([('bbbbbbbbbb', 'Chill'), ('aaaaaaaaaa', 'Chill')])
+        self.assertEqual(folders['aaaaaaaaaa'], 'Chill')
+        self.assertEqual(folders['bbbbbbbbbb'], 'Chill_bbbbbbbb')
+        self.assertEqual(moves, [])
+
+    def test_rename_moves_folder_and_save_file(self):
+        self.resolve([('aaaaaaaaaa', 'Old Name')])
+        open(os.path.join(self.root, 'OldName', 'OldName.sync.spotdl'), 'w').close()
+
+        folders, moves = self.resolve([('aaaaaaaaaa', 'New Name')])
+        self.assertEqual(folders, {'aaaaaaaaaa': 'NewName'})
+        self.assertEqual(moves, [('aaaaaaaaaa', 'OldName', 'NewName')])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'OldName')))
+        self.assertTrue(os.path.isfile(os.path.join(self.root, 'NewName', 'NewName.sync.spotdl')))
+
+    def test_rename_onto_taken_name_is_suffixed(self):
+        self.resolve([('aaaaaaaaaa', 'Mix'), ('bbbbbbbbbb', 'Other')])
+        folders, moves = self.resolve([('aaaaaaaaaa', 'Mix'), ('bbbbbbbbbb', 'Mix')])
+        self.assertEqual(folders, {'aaaaaaaaaa': 'Mix', 'bbbbbbbbbb': 'Mix_bbbbbbbb'})
+        self.assertEqual(moves, [('bbbbbbbbbb', 'Other', 'Mix_bbbbbbbb')])
+
+    def test_unlisted_playlist_keeps_its_folder(self):
+        self.resolve([('aaaaaaaaaa', 'Mix')])
+        folders, _ = self.resolve([('bbbbbbbbbb', 'Mix')])
+        self.assertEqual(folders, {'bbbbbbbbbb': 'Mix_bbbbbbbb'})
+        self.assertEqual(PlaylistIndex(self.root).orphans(['bbbbbbbbbb']), {'aaaaaaaaaa': 'Mix'})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""classify_line: rate limits in error lines are found, song titles are not rate limits"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limit
+import spotdl_output
+
+def classify(line):
+    """Classify a line of spotdl output the way sync_single_playlist does"""
+    return rate_limit.classify_line(spotdl_output.error_text(line, spotdl_output.parse_line(line)))
+
+class ClassifyLine(unittest.TestCase):
+
+    def test_http_429(self):
+        error = classify("HTTP Error 429: Too Many Requests")
+        self.assertIsInstance(error, rate_limit.RateLimitError)
+        self.assertEqual(error.upstream, rate_limit.SPOTIFY)
+        self.assertIsNone(error.retry_after)
+
+    def test_youtube_429_in_a_failed_download(self):
+        error = classify("AudioProviderError: YT-DLP download error - HTTP Error 429: Too Many Requests")
+        self.assertIsNotNone(error)
+        self.assertEqual(error.upstream, rate_limit.YOUTUBE)
+
+    def test_retry_after(self):
+        error = classify("Your application has reached a rate/request limit. Retry will occur after: 30 s")
+        self.assertEqual(error.retry_after, 30.0)
+
+    def test_song_titles_are_not_rate_limits(self):
+        for line in ('Downloaded "Artist - 429": https://music.youtube.com/watch?v=x',
+                     'Skipping Artist - Rate Limit (file already exists) (duplicate)',
+                     'Downloading "Artist - Too Many Requests"',
+                     'LookupError: No results found for song: Artist - Error 429'):
+            with self.subTest(line=line):
+                self.assertIsNone(classify(line))
+
+    def test_other_lines(self):
+        self.assertIsNone(rate_limit.classify_line("Found 20 songs in Mix (Playlist)"))
+        self.assertIsNone(rate_limit.classify_line("Artist - Rate Limit"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Cancelling a playlist job must not leave the shared limiter's half-open trial slot taken"""
+
+import os
+import sys
+import threading
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import rate_limit
+import sync_control
+import get_playlists
+
+def half_open_limiter():
+    """A limiter whose circuits are due for their trial job"""
+    limiter = rate_limit.RateLimiter()
+    for upstream in limiter._upstreams.values():
+        upstream.state = rate_limit.RateLimiter.OPEN
+        upstream.open_until = 0.0
+    return limiter
+
+def acquires(limiter, timeout=3.0):
+    """True if acquire() returns within timeout"""
+    thread = threading.Thread(target=limiter.acquire, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+class CancelDuringHalfOpen(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.settings = config.Settings(sync_folder=self.folder.name, max_retries=0)
+        self.info = {'url': 'https://open.spotify.com/playlist/x', 'id': 'x', 'snapshot_id': 's'}
+        self.original = get_playlists.sync_single_playlist
+
+    def tearDown(self):
+        get_playlists.sync_single_playlist = self.original
+        self.folder.cleanup()
+
+    def run_job(self, limiter, control):
+        return get_playlists.sync_playlist_job(self.info, "x", self.folder.name, self.settings,
+                                               log=lambda message: None, limiter=limiter, control=control)
+
+    def test_cancel_while_spotdl_runs(self):
+        limiter = half_open_limiter()
+        control = sync_control.SyncControl()
+
+        def cancelled_spotdl(*args, **kwargs):
+            control.cancel()
+            raise sync_control.SyncCancelled("x")
+        get_playlists.sync_single_playlist = cancelled_spotdl
+
+        self.assertEqual(self.run_job(limiter, control), "cancelled")
+        self.assertTrue(acquires(limiter))
+
+    def test_cancel_before_spotdl_starts(self):
+        limiter = half_open_limiter()
+        control = sync_control.SyncControl()
+        control.cancel()
+
+        self.assertEqual(self.run_job(limiter, control), "cancelled")
+        self.assertTrue(acquires(limiter))
+
+    def test_release_keeps_other_jobs_trial(self):
+        limiter = half_open_limiter()
+        trials = limiter.acquire()
+        self.assertEqual(set(trials), set(rate_limit.UPSTREAMS))
+
+        waiting = threading.Thread(target=limiter.acquire, daemon=True)
+        waiting.start()
+        # A job that started before the circuits opened holds no trial slot
+        limiter.release(())
+        waiting.join(1.5)
+        self.assertTrue(waiting.is_alive())
+        limiter.release(trials)
+        waiting.join(3.0)
+        self.assertFalse(waiting.is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
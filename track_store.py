@@ -0,0 +1,173 @@
+"""
+Shared track store
+Keeps one copy of every downloaded track, keyed by Spotify track id, and
+fills playlist folders with links to it so a track is only downloaded once
+"""
+
+import os
+import re
+import json
+import shutil
+import threading
+from sync_state import STATE_DIR, AUDIO_EXTENSIONS
+
+STORE_DIR = 'tracks'
+INDEX_FILE = 'index.json'
+
+def link_file(src, dst):
+    """Link src to dst, preferring hardlinks, then symlinks, then a plain copy"""
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return 'symlink'
+    except OSError:
+        shutil.copy2(src, dst)
+        return 'copy'
+
+def _normalize(text):
+    """Reduce a track title to lowercase letters and digits for fuzzy file matching"""
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+def _song_id(song):
+    """Get the Spotify track id of a song entry from a spotdl save file"""
+    if song.get('song_id'):
+        return song['song_id']
+    url = song.get('url') or ''
+    return url.rstrip('/').rsplit('/', 1)[-1].split('?')[0] or None
+
+def read_save_file(path):
+    """Return the songs listed in a spotdl .sync.spotdl save file"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+    if isinstance(data, dict):
+        return data.get('songs', [])
+    return data if isinstance(data, list) else []
+
+class TrackStore:
+    """Content-addressed store of tracks shared by all playlist folders"""
+
+    def __init__(self, sync_folder):
+        self.root = os.path.join(sync_folder, STATE_DIR, STORE_DIR)
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._tracks = self._load()
+
+    def _load(self):
+        """Load the store index, starting empty if it is missing or broken"""
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        """Write the index atomically; the caller holds the lock"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._tracks, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def path_of(self, track_id):
+        """Return the stored file of a track, or None if it is not in the store"""
+        with self._lock:
+            return self._path_of(track_id)
+
+    def _path_of(self, track_id):
+        """path_of for callers that hold the lock"""
+        entry = self._tracks.get(track_id)
+        if not entry:
+            return None
+        path = os.path.join(self.root, entry['file'])
+        return path if os.path.exists(path) else None
+
+    def track_ids(self):
+        with self._lock:
+            return list(self._tracks)
+
+    def forget(self, track_ids):
+        """Drop tracks from the index, after their files were moved out of the store"""
+        with self._lock:
+            removed = [self._tracks.pop(track_id, None) for track_id in track_ids]
+            if any(removed):
+                self._save()
+
+    def link_into(self, track_ids, folder):
+        """
+        Link every stored track of a playlist into its folder under the name spotdl uses,
+        so spotdl finds the file and skips the download. Returns the number of links made
+        """
+        linked = 0
+        for track_id in track_ids:
+            src = self.path_of(track_id)
+            if not src:
+                continue
+            with self._lock:
+                filename = self._tracks[track_id]['filename']
+            dst = os.path.join(folder, filename)
+            if os.path.lexists(dst):
+                continue
+            link_file(src, dst)
+            linked += 1
+        return linked
+
+    def ingest(self, folder, save_file):
+        """
+        Move freshly downloaded tracks of a playlist folder into the store and link them back
+        Files that duplicate a stored track are replaced by a link. Returns the number of new tracks
+        """
+        songs = read_save_file(os.path.join(folder, save_file))
+        if not songs:
+            return 0
+
+        # Map normalized "artists - title" stems to the audio files in the folder
+        files = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in AUDIO_EXTENSIONS and not entry.is_symlink():
+                    files[_normalize(stem)] = entry.name
+
+        added = 0
+        indexed = False
+        for song in songs:
+            track_id = _song_id(song)
+            if not track_id:
+                continue
+            artists = song.get('artists') or [song.get('artist', '')]
+            filename = files.get(_normalize(f"{', '.join(artists)} - {song.get('name', '')}"))
+            if not filename:
+                continue
+            local_path = os.path.join(folder, filename)
+            # Parallel jobs can download the same new track: checking, moving and indexing it
+            # under one lock makes sure only one copy becomes the stored one
+            with self._lock:
+                stored = self._path_of(track_id)
+                if not stored:
+                    ext = os.path.splitext(filename)[1].lower()
+                    relative = os.path.join(track_id[:2], f"{track_id}{ext}")
+                    stored = os.path.join(self.root, relative)
+                    os.makedirs(os.path.dirname(stored), exist_ok=True)
+                    if not os.path.exists(stored):
+                        os.replace(local_path, stored)
+                        link_file(stored, local_path)
+                        added += 1
+                    # A file left at the target without an index entry is kept and linked below
+                    self._tracks[track_id] = {'file': relative, 'filename': filename}
+                    indexed = True
+            # Another playlist already holds this track: replace the copy with a link
+            if not os.path.samefile(stored, local_path):
+                os.remove(local_path)
+                link_file(stored, local_path)
+
+        if indexed:
+            with self._lock:
+                self._save()
+        return added
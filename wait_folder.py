@@ -1,44 +1,132 @@
-# todo: 
-# write what happens if folder is added or removed
-# test with test folder 
-# test with sleep(5 sec)
-#
-
-
-from config import *
-import os.path
-import time
-import logging   
-
-logging.basicConfig(filename='std.log', filemode='w', format='%(name)s - %(levelname)s - %(message)s')
-
-
-
-old_list = os.listdir(SYNC_FOLDER)
-
-
-# wait until folder is created
-while True: 
-    logging.info('Fetching folder')
-    new_list = os.listdir(SYNC_FOLDER) # fetch         #code here
-    time.sleep(1)
-
-
-    if len(new_list) > len(old_list): # new folder added
-
-        # code here
-        
-        old_list = new_list()
-    elif len(new_list) < len(old_list): # folder deleted
-        # code here
-        
-        old_list = new_list()
-
-
-    else:
-        pass
-
-
-
-
-    
\ No newline at end of file
+"""
+Watch the sync folder and react when playlist folders are added, removed or renamed
+  - added: if the folder name matches one of the user's playlists, that playlist is synced
+  - removed: the playlist's sync state is dropped, so the next run downloads it again
+  - renamed: handled as the old folder removed and the new one added
+
+Usage: python wait_folder.py
+"""
+
+import queue
+import logging
+import get_playlists
+import config
+import folder_watcher
+from sync_state import SyncState
+
+logger = logging.getLogger("spoti-sync")
+
+class FolderChangeHandler:
+    """
+    Turn FolderChanges into targeted syncs and state cleanup
+    With a queue, changes are only put on it and whoever drains it calls handle(), so the
+    syncs they start never overlap a scheduled run (see initialization.run)
+    """
+
+    def __init__(self, sync_folder, sp=None, log=logger.info, queue=None):
+        self.sync_folder = sync_folder
+        self.sp = sp
+        self.log = log
+        self.queue = queue
+        self._playlists = None
+
+    def _playlist(self, name):
+        """Look up a playlist by folder name, refreshing the listing once if it is unknown"""
+        if self.sp is None:
+            return None
+        if self._playlists is None or name not in self._playlists:
+            self._playlists = get_playlists.get_playlists(self.sp, config.load_settings().user,
+                                                          self.sync_folder, self.log)
+        return self._playlists.get(name)
+
+    def __call__(self, changes):
+        if self.queue is not None:
+            self.queue.put(changes)
+        else:
+            self.handle(changes)
+
+    def handle(self, changes, control=None):
+        """Forget removed folders and sync the playlists of added ones; control can cancel the sync"""
+        state = SyncState(self.sync_folder)
+        to_sync = {}
+        for change in changes:
+            if change.kind == folder_watcher.RENAMED:
+                self.log(f"Playlist folder renamed: {change.old_name} -> {change.name}")
+                removed, added = [change.old_name], [change.name]
+            elif change.kind == folder_watcher.REMOVED:
+                self.log(f"Playlist folder removed: {change.name}")
+                removed, added = [change.name], []
+            else:
+                self.log(f"Playlist folder added: {change.name}")
+                removed, added = [], [change.name]
+
+            for name in removed:
+                playlist_id = state.find_by_name(name)
+                if playlist_id:
+                    state.forget(playlist_id)
+            for name in added:
+                info = self._playlist(name)
+                if info:
+                    to_sync[name] = info
+
+        if to_sync:
+            self.log(f"Syncing {len(to_sync)} playlist(s) for new folders")
+            get_playlists.sync_playlists(to_sync, self.sync_folder, log=self.log, sp=self.sp, control=control)
+
+def watch(sync_folder, sp=None, log=logger.info, queue=None):
+    """
+    Start watching the sync folder in a background thread and return the watcher
+    With a queue, changes are queued for watcher.callback.handle() instead of handled on the watcher thread
+    """
+    watcher = folder_watcher.FolderWatcher(sync_folder, FolderChangeHandler(sync_folder, sp, log, queue), log=log)
+    watcher.start()
+    log(f"Watching {sync_folder} ({watcher.backend})")
+    return watcher
+
+def ignore_own_changes(watcher, changes):
+    """
+    Drop the folder changes made by a sync that just ended (playlist folders it created,
+    renamed or moved to the trash), so they are not handled as if the user had made them
+    A folder the user added meanwhile was synced by that run if it is one of their playlists
+    """
+    watcher.rebase()
+    while True:
+        try:
+            changes.get_nowait()
+        except queue.Empty:
+            return
+
+def handle_queued(watcher, changes, timeout=None, control=None):
+    """Handle the next batch of queued changes, waiting up to timeout; raises queue.Empty if none came"""
+    batch = changes.get(timeout=timeout)
+    try:
+        watcher.callback.handle(batch, control)
+    finally:
+        ignore_own_changes(watcher, changes)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    settings = config.load_settings()
+    if settings.accounts:
+        logger.error("Watching is not supported with ACCOUNTS; every account syncs into its own folder")
+        return
+    sp = None
+    try:
+        sp = get_playlists.authenticate(settings)
+    except Exception as e:
+        logger.warning(f"Not authenticated, new folders will not be synced: {str(e)}")
+    changes = queue.Queue()
+    watcher = watch(settings.sync_folder, sp, logger.info, changes)
+    try:
+        while True:
+            try:
+                handle_queued(watcher, changes, timeout=1.0)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"Sync for folder changes failed: {str(e)}")
+    except KeyboardInterrupt:
+        watcher.stop()
+
+if __name__ == "__main__":
+    main()